@@ -10,6 +10,8 @@ Generuje HTML raport analityczny na podstawie danych finansowych.
 UŻYCIE:
     python analyze.py           # Pyta o ticker
     python analyze.py GEN       # Bezpośrednio dla tickera
+    python analyze.py GEN XTB   # Kilka spółek równolegle
+    python analyze.py --all     # Wszystkie spółki z raporty/ równolegle
 
 STRUKTURA FOLDERÓW:
     raporty/{TICKER}/
@@ -26,21 +28,38 @@ STRUKTURA FOLDERÓW:
 import os
 import sys
 import re
-import glob
+import csv
+import json
+import functools
+import hashlib
+import pickle
+import threading
 from datetime import datetime
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Callable, Dict, List, Optional, Tuple, Any
 from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
 import base64
-from io import BytesIO
+from io import BytesIO, StringIO
 
+import numpy as np
 import pandas as pd
 import matplotlib
 matplotlib.use('Agg')  # Non-interactive backend
-import matplotlib.pyplot as plt
+# Tekst SVG jako <text> zamiast ścieżek glifów - mniejszy plik, brak kolizji id.
+# Ustawione globalnie: rc_context przy zapisie nie jest bezpieczny wątkowo.
+matplotlib.rcParams['svg.fonttype'] = 'none'
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 import matplotlib.dates as mdates
 from matplotlib.ticker import FuncFormatter
 
 # Opcjonalne importy
+try:
+    import fitz  # PyMuPDF - szybsza ekstrakcja tekstu niż PyPDF2
+    HAS_FITZ = True
+except ImportError:
+    HAS_FITZ = False
+
 try:
     import PyPDF2
     HAS_PYPDF = True
@@ -53,6 +72,30 @@ try:
 except ImportError:
     HAS_DOCX = False
 
+try:
+    from numba import njit  # JIT dla kerneli numerycznych
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+    
+    def njit(*args, **kwargs):
+        """Zastępczy dekorator - bez numba kernel działa jako zwykły Python/NumPy"""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+
+try:
+    import pybase64  # base64 z SIMD (AVX2/NEON) - szybszy dla dużych PNG
+    HAS_PYBASE64 = True
+except ImportError:
+    HAS_PYBASE64 = False
+
+try:
+    from PIL import Image  # Szybsze kodowanie PNG (niższy poziom kompresji)
+    HAS_PIL = True
+except ImportError:
+    HAS_PIL = False
+
 
 # =============================================================================
 # KONFIGURACJA
@@ -60,6 +103,16 @@ except ImportError:
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 RAPORTY_DIR = os.path.join(BASE_DIR, "raporty")
+CACHE_DIR = os.path.join(BASE_DIR, ".cache")  # Cache sparsowanych plików (klucz: nazwa + mtime)
+
+# Format wykresów w raporcie: 'svg' (inline, skalowalne, mniejszy HTML), 'png' (base64)
+# lub 'jpeg' (base64, 90 DPI, jakość 85 - najmniejszy raster; wymaga Pillow)
+CHART_FORMAT = 'svg'
+JPEG_QUALITY = 85
+
+# Pula do równoległego renderowania wykresów: 'thread' (bez kosztu startu procesów
+# i kopiowania danych) lub 'process' (omija GIL przy dużych wykresach)
+CHART_POOL = 'thread'
 
 # Kolory dla wykresów
 COLORS = {
@@ -89,41 +142,78 @@ ALERT_THRESHOLDS = {
     'current_ratio_low': 1.0,       # <1.0 płynność = alert
 }
 
+# Prekompilowane wyrażenia regularne (parsery)
+QUARTER_RE = re.compile(r'(\d{4})/Q(\d)')
+HEADER_RE = re.compile(r'^.*Q[1-4].*$', re.M)
+TABS_RE = re.compile(r'\t+')
+NEG_PAREN_RE = re.compile(r'^\((.*)\)$')
+# Jedno przejście po tekście PDF: data raportu | zatrudnienie | komentarz zarządu.
+# Lookahead nie konsumuje tekstu, więc dopasowania się nie przesłaniają.
+# Komentarz: znacznik + reszta okna, łącznie maks. COMMENT_MAX_CHARS znaków.
+COMMENT_MAX_CHARS = 1500
+PDF_SCAN_RE = re.compile(
+    r'(?=Warszawa[,\s]+(?P<date>\d{1,2}[.\-/]\d{1,2}[.\-/]\d{4})'
+    r'|(?i:zatrudni)[^\d]*(?P<emp>\d+[,.]?\d*)'
+    r'|(?P<com>Komentarz Zarządu(?s:.){0,%d}))' % (COMMENT_MAX_CHARS - len('Komentarz Zarządu'))
+)
+FTE_RE = re.compile(r'FTE:\s*(\d+[,.]?\d*)')
+SHAREHOLDER_FULL_RE = re.compile(r'(.+?):\s*(\d+[,.]?\d*)%\s*kapitału\s*/\s*(\d+[,.]?\d*)%\s*głosów')
+SHAREHOLDER_SIMPLE_RE = re.compile(r'(.+?):\s*(\d+[,.]?\d*)%')
+
+# Prekompilowane wyrażenia regularne (raport HTML / załączniki)
+ATTACHMENT_EXT_RE = re.compile(r'\.(pdf|docx|doc)$', re.IGNORECASE)
+BULLET_RE = re.compile(r'^- ', re.MULTILINE)
+
+# Escapowanie tekstu do HTML jednym przebiegiem str.translate (zamiast html.escape)
+_ESCAPE = str.maketrans({'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#x27;'})
+
 
 # =============================================================================
 # DATA CLASSES
 # =============================================================================
 
-@dataclass
+def empty_series() -> pd.Series:
+    """Pusta seria float64 (domyślna wartość pozycji finansowej)"""
+    return pd.Series(dtype='float64')
+
+
+# slots=True (Python 3.10+): brak __dict__ na instancję - mniej pamięci przy analizie wielu spółek
+@dataclass(slots=True)
 class FinancialData:
-    """Przechowuje sparsowane dane finansowe"""
+    """
+    Przechowuje sparsowane dane finansowe.
+    
+    Każda pozycja finansowa to pd.Series float64 indeksowana nazwą kwartału
+    (tablica numpy pod spodem), z zakresem kwartałów pliku źródłowego.
+    """
     ticker: str
     quarters: List[str] = field(default_factory=list)
+    quarter_index: Dict[Tuple[int, int], int] = field(default_factory=dict)  # (rok, kwartał) -> pozycja
     
     # RZiS
-    revenue: Dict[str, float] = field(default_factory=dict)
-    costs: Dict[str, float] = field(default_factory=dict)
-    gross_profit: Dict[str, float] = field(default_factory=dict)
-    ebit: Dict[str, float] = field(default_factory=dict)
-    net_profit: Dict[str, float] = field(default_factory=dict)
+    revenue: pd.Series = field(default_factory=empty_series)
+    costs: pd.Series = field(default_factory=empty_series)
+    gross_profit: pd.Series = field(default_factory=empty_series)
+    ebit: pd.Series = field(default_factory=empty_series)
+    net_profit: pd.Series = field(default_factory=empty_series)
     
     # Bilans
-    total_assets: Dict[str, float] = field(default_factory=dict)
-    fixed_assets: Dict[str, float] = field(default_factory=dict)
-    current_assets: Dict[str, float] = field(default_factory=dict)
-    cash: Dict[str, float] = field(default_factory=dict)
-    inventory: Dict[str, float] = field(default_factory=dict)
-    receivables: Dict[str, float] = field(default_factory=dict)
-    equity: Dict[str, float] = field(default_factory=dict)
-    long_term_debt: Dict[str, float] = field(default_factory=dict)
-    short_term_debt: Dict[str, float] = field(default_factory=dict)
+    total_assets: pd.Series = field(default_factory=empty_series)
+    fixed_assets: pd.Series = field(default_factory=empty_series)
+    current_assets: pd.Series = field(default_factory=empty_series)
+    cash: pd.Series = field(default_factory=empty_series)
+    inventory: pd.Series = field(default_factory=empty_series)
+    receivables: pd.Series = field(default_factory=empty_series)
+    equity: pd.Series = field(default_factory=empty_series)
+    long_term_debt: pd.Series = field(default_factory=empty_series)
+    short_term_debt: pd.Series = field(default_factory=empty_series)
     
     # Przepływy
-    ocf: Dict[str, float] = field(default_factory=dict)  # Operating Cash Flow
-    icf: Dict[str, float] = field(default_factory=dict)  # Investing Cash Flow
-    fcf: Dict[str, float] = field(default_factory=dict)  # Financing Cash Flow
-    capex: Dict[str, float] = field(default_factory=dict)
-    depreciation: Dict[str, float] = field(default_factory=dict)
+    ocf: pd.Series = field(default_factory=empty_series)  # Operating Cash Flow
+    icf: pd.Series = field(default_factory=empty_series)  # Investing Cash Flow
+    fcf: pd.Series = field(default_factory=empty_series)  # Financing Cash Flow
+    capex: pd.Series = field(default_factory=empty_series)
+    depreciation: pd.Series = field(default_factory=empty_series)
     
     # Metadane
     report_date: Optional[str] = None
@@ -131,9 +221,15 @@ class FinancialData:
     employees: Optional[float] = None
     management_comment: Optional[str] = None
     shareholders: List[Dict] = field(default_factory=list)
+    
+    def index_quarters(self):
+        """Buduje indeks (rok, kwartał) -> pozycja w quarters (pierwsze wystąpienie)"""
+        self.quarter_index = {}
+        for i, q in enumerate(self.quarters):
+            self.quarter_index.setdefault(parse_quarter(q), i)
 
 
-@dataclass
+@dataclass(slots=True)
 class ContextData:
     """Przechowuje kontekst z pliku _kontekst.txt"""
     employees: Optional[float] = None
@@ -144,7 +240,7 @@ class ContextData:
     raw_sections: Dict[str, str] = field(default_factory=dict)
 
 
-@dataclass
+@dataclass(slots=True)
 class Alert:
     """Alert/obserwacja z analizy"""
     type: str  # 'success', 'warning', 'danger', 'info'
@@ -153,7 +249,7 @@ class Alert:
     value: Optional[str] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class Attachment:
     """Dodatkowy plik załączony do raportu"""
     filename: str
@@ -162,6 +258,134 @@ class Attachment:
     description: Optional[str] = None
 
 
+# =============================================================================
+# CACHE NA DYSKU
+# =============================================================================
+
+_CACHE_MISS = object()
+
+# Wersja formatu cache - podbić przy zmianie parserów, mapowania pozycji
+# (row_mappings, map_statement_rows) lub układu FinancialData/ContextData
+CACHE_VERSION = 1
+
+
+class UncachedResult(Exception):
+    """
+    Wynik parsera, który nie trafia do cache (brak biblioteki, błąd odczytu).
+    
+    Parser udekorowany disk_cached zgłasza go zamiast return - dekorator
+    zwraca .result bez zapisu, więc kolejne wywołanie spróbuje ponownie.
+    """
+    
+    def __init__(self, result: Any):
+        super().__init__()
+        self.result = result
+
+
+def cache_path_for(name: str, paths: List[str], ext: str, variant: str = '') -> str:
+    """
+    Ścieżka pliku cache dla wyniku zależnego od plików źródłowych.
+    
+    Klucz to skrót blake2b z (ścieżka, mtime, rozmiar) każdego pliku,
+    więc zmiana dowolnego z nich unieważnia cache. W kluczu są też
+    CACHE_VERSION i variant: dodatkowy składnik (np. dostępny backend PDF).
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"v{CACHE_VERSION}:{variant}\n".encode('utf-8'))
+    for path in paths:
+        st = os.stat(path)
+        digest.update(f"{os.path.abspath(path)}:{st.st_mtime_ns}:{st.st_size}\n".encode('utf-8'))
+    return os.path.join(CACHE_DIR, f"{name}.{digest.hexdigest()}.{ext}")
+
+
+def read_cache(cache_path: str, fmt: str = 'pickle') -> Any:
+    """Wczytuje wynik z cache; _CACHE_MISS gdy brak lub uszkodzony (None to poprawny wynik)"""
+    if not os.path.exists(cache_path):
+        return _CACHE_MISS
+    try:
+        if fmt == 'pickle':
+            with open(cache_path, 'rb') as f:
+                return pickle.load(f)
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception:
+        return _CACHE_MISS  # Uszkodzony cache - parsuj ponownie
+
+
+def write_cache(cache_path: str, result: Any, fmt: str = 'pickle') -> None:
+    """Zapisuje wynik do cache i usuwa poprzednie wersje wpisu - błędy zapisu są ignorowane"""
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        if fmt == 'pickle':
+            with open(cache_path, 'wb') as f:
+                pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+        else:
+            with open(cache_path, 'w', encoding='utf-8') as f:
+                json.dump(result, f, ensure_ascii=False)
+    except (OSError, TypeError, pickle.PicklingError):
+        return  # Brak cache nie blokuje analizy
+    prune_cache(cache_path)
+
+
+def prune_cache(cache_path: str) -> None:
+    """
+    Usuwa pozostałe wpisy tej samej nazwy ({nazwa}.{skrót}.{ext}) - po zmianie
+    pliku źródłowego stary skrót nie zostanie już odczytany.
+    """
+    directory, filename = os.path.split(cache_path)
+    prefix = filename.rsplit('.', 2)[0] + '.'
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                # Tylko {prefix}{skrót}.{ext} - nie wpisy dłuższej nazwy z tym samym początkiem
+                if (entry.name != filename and entry.name.startswith(prefix)
+                        and entry.name[len(prefix):].count('.') == 1):
+                    try:
+                        os.remove(entry.path)
+                    except OSError:
+                        pass
+    except OSError:
+        pass
+
+
+def disk_cached(fmt: str = 'pickle', variant: Optional[Callable[[], str]] = None):
+    """
+    Dekorator: zapamiętuje wynik parsera pliku w CACHE_DIR.
+    
+    Klucz: nazwa funkcji + (ścieżka, mtime, rozmiar) pliku - patrz cache_path_for.
+    Nazwa wpisu zawiera skrót ścieżki, więc prune_cache usuwa tylko stare wersje tego pliku.
+    fmt: 'pickle' (DataFrame, dataclassy) lub 'json' (słowniki).
+    variant: funkcja zwracająca dodatkowy składnik klucza, liczona przy każdym wywołaniu.
+    Wynik zgłoszony jako UncachedResult jest zwracany, ale nie zapisywany.
+    """
+    ext = 'pkl' if fmt == 'pickle' else 'json'
+    
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(filepath: str):
+            try:
+                if not os.path.exists(filepath):
+                    return func(filepath)
+                
+                path_key = hashlib.blake2b(os.path.abspath(filepath).encode('utf-8'), digest_size=8).hexdigest()
+                cache_path = cache_path_for(f"{func.__name__}.{path_key}", [filepath], ext,
+                                            variant() if variant is not None else '')
+                result = read_cache(cache_path, fmt)
+                if result is _CACHE_MISS:
+                    result = func(filepath)
+                    write_cache(cache_path, result, fmt)
+                return result
+            except UncachedResult as e:
+                return e.result
+        return wrapper
+    return decorator
+
+
+def pdf_backend() -> str:
+    """Dostępne biblioteki PDF - składnik klucza cache parserów PDF"""
+    return f"fitz={HAS_FITZ},pypdf={HAS_PYPDF}"
+
+
 # =============================================================================
 # PARSERY DANYCH
 # =============================================================================
@@ -183,20 +407,36 @@ def parse_number(val: str) -> float:
         return 0.0
 
 
+def parse_number_series(s: pd.Series) -> pd.Series:
+    """Wektorowa wersja parse_number dla całej kolumny stringów"""
+    cleaned = (s.astype(str)
+               .str.replace(' ', '', regex=False)
+               .str.replace('\xa0', '', regex=False)
+               .str.replace(',', '.', regex=False)
+               .str.replace(NEG_PAREN_RE, r'-\1', regex=True))
+    # Puste / NaN / '-' / nieparsowalne -> 0.0
+    cleaned = cleaned.where(s.notna(), '')
+    return pd.to_numeric(cleaned, errors='coerce').fillna(0.0).astype(float)
+
+
+# Etykiety kwartałów powtarzają się między wykresami i spółkami (tryb wsadowy)
+@functools.lru_cache(maxsize=4096)
 def parse_quarter(q_str: str) -> Tuple[int, int]:
     """Parsuje '2024/Q3 (wrz 24)' -> (2024, 3)"""
-    match = re.search(r'(\d{4})/Q(\d)', q_str)
+    match = QUARTER_RE.search(q_str)
     if match:
         return int(match.group(1)), int(match.group(2))
     return 0, 0
 
 
+@functools.lru_cache(maxsize=256)
 def quarter_to_date(year: int, quarter: int) -> datetime:
     """Konwertuje rok/kwartał na datę (koniec kwartału)"""
     month = quarter * 3
     return datetime(year, month, 28)
 
 
+@disk_cached('pickle')
 def parse_biznesradar_file(filepath: str) -> pd.DataFrame:
     """Parsuje plik TXT z BiznesRadar (tab-separated)"""
     if not os.path.exists(filepath):
@@ -205,81 +445,120 @@ def parse_biznesradar_file(filepath: str) -> pd.DataFrame:
     with open(filepath, 'r', encoding='utf-8') as f:
         content = f.read()
     
-    # Normalizuj znaki końca linii
+    # Normalizuj znaki końca linii i zwiń wielokrotne taby (jedno przejście po całym tekście)
     content = content.replace('\r\n', '\n').replace('\r', '\n')
-    lines = content.split('\n')
+    content = TABS_RE.sub('\t', content)
     
     # Znajdź nagłówek (linia z kwartałami)
-    header_idx = None
-    for i, line in enumerate(lines):
-        if 'Q1' in line or 'Q2' in line or 'Q3' in line or 'Q4' in line:
-            header_idx = i
-            break
-    
-    if header_idx is None:
+    header_match = HEADER_RE.search(content)
+    if header_match is None:
         return pd.DataFrame()
     
-    # Parsuj nagłówki (kwartały) - obsłuż podwójne taby
-    header_line = lines[header_idx]
-    # Zamień podwójne taby na pojedyncze
-    while '\t\t' in header_line:
-        header_line = header_line.replace('\t\t', '\t')
-    
-    headers = header_line.strip().split('\t')
+    # Parsuj nagłówki (kwartały)
+    headers = header_match.group(0).strip().split('\t')
     headers = [h.strip() for h in headers if h.strip()]
     
     # Filtruj tylko kwartały
     quarters = [h for h in headers if 'Q1' in h or 'Q2' in h or 'Q3' in h or 'Q4' in h]
     
-    # Parsuj dane
-    data = {}
-    for line in lines[header_idx + 1:]:
-        if not line.strip():
-            continue
-        
-        # Zamień podwójne taby
-        while '\t\t' in line:
-            line = line.replace('\t\t', '\t')
-        
-        parts = line.strip().split('\t')
-        if len(parts) < 2:
-            continue
-        
-        row_name = parts[0].strip()
-        if not row_name or row_name == 'Data publikacji':
-            continue
-        
-        values = []
-        for p in parts[1:]:
-            values.append(parse_number(p))
-        
-        # Dopasuj długość do liczby kwartałów
-        while len(values) < len(quarters):
-            values.append(0.0)
-        
-        data[row_name] = values[:len(quarters)]
+    # Dane: zostaw linie z co najmniej 2 polami
+    body = content[header_match.end():]
+    lines = [line for line in (l.strip() for l in body.split('\n')) if '\t' in line]
+    if not lines:
+        return pd.DataFrame()
     
-    # Stwórz DataFrame z kwartałami jako kolumnami
-    if not data:
+    n_fields = max(line.count('\t') for line in lines) + 1
+    raw = pd.read_csv(StringIO('\n'.join(lines)), sep='\t', header=None,
+                      names=range(n_fields), dtype=str, keep_default_na=False,
+                      quoting=csv.QUOTE_NONE, engine='c')
+    
+    row_names = raw[0].str.strip()
+    raw = raw[(row_names != '') & (row_names != 'Data publikacji')]
+    if raw.empty:
         return pd.DataFrame()
     
-    df = pd.DataFrame(data, index=quarters)
-    return df.T
+    # Dopasuj liczbę kolumn do liczby kwartałów (brakujące wartości = 0)
+    values = raw.reindex(columns=range(1, len(quarters) + 1))
+    
+    # Konwersja liczb (jak parse_number): spacje, przecinki, ujemne w nawiasach
+    values = values.apply(parse_number_series, axis=0)
+    
+    # Stwórz DataFrame z kwartałami jako kolumnami (przy duplikatach wygrywa ostatni wiersz)
+    values.index = row_names[raw.index]
+    values.columns = quarters
+    values.index.name = None
+    return values.groupby(level=0, sort=False).last()
+
+
+def map_statement_rows(df: pd.DataFrame, row_mappings: Dict[str, str],
+                       keep: str = 'last') -> pd.DataFrame:
+    """
+    Mapuje wiersze sprawozdania na atrybuty FinancialData jedną operacją.
+    
+    Zwraca DataFrame (indeks = nazwa atrybutu, kolumny = kwartały). Gdy kilka
+    wierszy mapuje się na ten sam atrybut, keep='last' wybiera ostatni
+    z row_mappings, a keep='first' pierwszy.
+    """
+    # Tylko wiersze obecne w pliku, w kolejności row_mappings (ważne dla first/last)
+    present = df.loc[pd.Index(list(row_mappings)).intersection(df.index, sort=False)]
+    grouped = present.groupby(present.index.map(row_mappings), sort=False)
+    mapped = grouped.last() if keep == 'last' else grouped.first()
+    return mapped.astype('float64')
 
 
 def load_financial_data(ticker: str, folder_path: str) -> FinancialData:
     """Wczytuje wszystkie dane finansowe dla spółki"""
     data = FinancialData(ticker=ticker)
     
-    # Znajdź pliki (z tickerem na początku nazwy)
+    # Znajdź pliki (z tickerem na początku nazwy) - jedno przejście po folderze
     ticker_lower = ticker.lower()
-    bilans_files = glob.glob(os.path.join(folder_path, f'{ticker_lower}_bilans*.txt'))
-    rzis_files = glob.glob(os.path.join(folder_path, f'{ticker_lower}_rzis*.txt'))
-    przeplywy_files = glob.glob(os.path.join(folder_path, f'{ticker_lower}_przeplywy*.txt'))
+    prefixes = {
+        'bilans': f'{ticker_lower}_bilans',
+        'rzis': f'{ticker_lower}_rzis',
+        'cf': f'{ticker_lower}_przeplywy',
+    }
+    sources = {'rzis': [], 'bilans': [], 'cf': []}
+    with os.scandir(folder_path) as entries:
+        for entry in entries:
+            if not entry.name.endswith('.txt') or not entry.is_file():
+                continue
+            for label, prefix in prefixes.items():
+                if entry.name.startswith(prefix):
+                    sources[label].append(entry.path)
+                    break
+    
+    paths = [files[0] for files in sources.values() if files]
+    if not paths:
+        return data
+    
+    # Cały wynik (po mapowaniu pozycji) w cache - klucz ze wszystkich trzech plików
+    cache_path = cache_path_for(f'load_financial_data.{ticker}', paths, 'pkl')
+    cached = read_cache(cache_path)
+    if cached is not _CACHE_MISS:
+        return cached
+    
+    data = build_financial_data(ticker, sources)
+    write_cache(cache_path, data)
+    return data
+
+
+def build_financial_data(ticker: str, sources: Dict[str, List[str]]) -> FinancialData:
+    """Parsuje pliki sprawozdań (sources: {'rzis'|'bilans'|'cf': [ścieżki]}) do FinancialData"""
+    data = FinancialData(ticker=ticker)
+    
+    # Wczytaj wszystkie trzy pliki równolegle (I/O + parser C zwalniają GIL)
+    frames = {}
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        futures = {
+            executor.submit(parse_biznesradar_file, files[0]): label
+            for label, files in sources.items() if files
+        }
+        for future in as_completed(futures):
+            frames[futures[future]] = future.result()
     
     # Parsuj RZiS
-    if rzis_files:
-        df_rzis = parse_biznesradar_file(rzis_files[0])
+    if 'rzis' in frames:
+        df_rzis = frames['rzis']
         if not df_rzis.empty:
             data.quarters = list(df_rzis.columns)
             
@@ -295,15 +574,14 @@ def load_financial_data(ticker: str, folder_path: str) -> FinancialData:
                 'Zysk netto akcjonariuszy jednostki dominującej': 'net_profit',
             }
             
-            for row_name, attr_name in row_mappings.items():
-                if row_name in df_rzis.index:
-                    for q in data.quarters:
-                        if q in df_rzis.columns:
-                            getattr(data, attr_name)[q] = df_rzis.loc[row_name, q]
+            # Późniejsze (bardziej szczegółowe) pozycje nadpisują wcześniejsze
+            mapped = map_statement_rows(df_rzis, row_mappings, keep='last')
+            for attr_name in mapped.index:
+                setattr(data, attr_name, mapped.loc[attr_name])
     
     # Parsuj Bilans
-    if bilans_files:
-        df_bilans = parse_biznesradar_file(bilans_files[0])
+    if 'bilans' in frames:
+        df_bilans = frames['bilans']
         if not df_bilans.empty:
             if not data.quarters:
                 data.quarters = list(df_bilans.columns)
@@ -323,15 +601,16 @@ def load_financial_data(ticker: str, folder_path: str) -> FinancialData:
                 'Zobowiązania krótkoterminowe': 'short_term_debt',
             }
             
-            for row_name, attr_name in row_mappings.items():
-                if row_name in df_bilans.index:
-                    for q in df_bilans.columns:
-                        if q not in getattr(data, attr_name):
-                            getattr(data, attr_name)[q] = df_bilans.loc[row_name, q]
+            # Wygrywa pierwsza znaleziona pozycja
+            mapped = map_statement_rows(df_bilans, row_mappings, keep='first')
+            for attr_name in mapped.index:
+                setattr(data, attr_name, mapped.loc[attr_name])
+    
+    data.index_quarters()
     
     # Parsuj Przepływy
-    if przeplywy_files:
-        df_cf = parse_biznesradar_file(przeplywy_files[0])
+    if 'cf' in frames:
+        df_cf = frames['cf']
         if not df_cf.empty:
             row_mappings = {
                 'Przepływy pieniężne z działalności operacyjnej': 'ocf',
@@ -341,14 +620,45 @@ def load_financial_data(ticker: str, folder_path: str) -> FinancialData:
                 'Amortyzacja': 'depreciation',
             }
             
-            for row_name, attr_name in row_mappings.items():
-                if row_name in df_cf.index:
-                    for q in df_cf.columns:
-                        getattr(data, attr_name)[q] = df_cf.loc[row_name, q]
+            mapped = map_statement_rows(df_cf, row_mappings, keep='last')
+            for attr_name in mapped.index:
+                setattr(data, attr_name, mapped.loc[attr_name])
     
     return data
 
 
+def iter_pdf_pages(filepath: str, max_pages: int = 5):
+    """Generator tekstu kolejnych stron PDF (leniwie, maks. max_pages stron)"""
+    if HAS_FITZ:
+        with fitz.open(filepath) as doc:
+            for page in doc.pages(stop=min(max_pages, doc.page_count)):
+                yield page.get_text('text')
+    else:
+        with open(filepath, 'rb') as f:
+            reader = PyPDF2.PdfReader(f)
+            for page in reader.pages[:max_pages]:
+                yield page.extract_text() or ''
+
+
+def scan_pdf_text(text: str) -> Tuple[Optional[str], Optional[float], Optional[str]]:
+    """Zwraca (data raportu, zatrudnienie, fragment komentarza zarządu) - pierwsze wystąpienia"""
+    report_date, employees, comment = None, None, None
+    
+    for match in PDF_SCAN_RE.finditer(text):
+        if match.group('date') and report_date is None:
+            report_date = match.group('date')
+        elif match.group('emp') and employees is None:
+            employees = parse_number(match.group('emp'))
+        elif match.group('com') and comment is None:
+            comment = match.group('com')
+        
+        if report_date is not None and employees is not None and comment is not None:
+            break
+    
+    return report_date, employees, comment
+
+
+@disk_cached('json', variant=pdf_backend)
 def parse_quarterly_pdf(filepath: str) -> Dict[str, Any]:
     """Parsuje raport kwartalny PDF (podstawowe info)"""
     result = {
@@ -358,38 +668,73 @@ def parse_quarterly_pdf(filepath: str) -> Dict[str, Any]:
         'shareholders': [],
     }
     
-    if not HAS_PYPDF or not os.path.exists(filepath):
+    if not os.path.exists(filepath):
         return result
+    if not (HAS_FITZ or HAS_PYPDF):
+        raise UncachedResult(result)  # Po instalacji biblioteki parsuj ponownie
     
     try:
-        with open(filepath, 'rb') as f:
-            reader = PyPDF2.PdfReader(f)
-            text = ''
-            for page in reader.pages[:5]:  # Pierwsze 5 stron
-                text += page.extract_text() or ''
-        
-        # Szukaj daty raportu
-        date_match = re.search(r'Warszawa[,\s]+(\d{1,2}[.\-/]\d{1,2}[.\-/]\d{4})', text)
-        if date_match:
-            result['report_date'] = date_match.group(1)
-        
-        # Szukaj zatrudnienia
-        emp_match = re.search(r'zatrudni[^\d]*(\d+[,.]?\d*)', text, re.IGNORECASE)
-        if emp_match:
-            result['employees'] = parse_number(emp_match.group(1))
-        
-        # Szukaj komentarza zarządu (fragment)
-        if 'Komentarz Zarządu' in text:
-            start = text.find('Komentarz Zarządu')
-            end = min(start + 1500, len(text))
-            result['management_comment'] = text[start:end].strip()
+        # Czytaj strony po kolei (pierwsze 5) i przerwij, gdy wszystko znalezione
+        text = ''
+        report_date, employees, comment = None, None, None
+        for page_text in iter_pdf_pages(filepath):
+            text += page_text
+            report_date, employees, comment = scan_pdf_text(text)
+            # Komentarz może ciągnąć się na następną stronę - czekaj na pełne okno
+            if (report_date is not None and employees is not None
+                    and comment is not None and len(comment) >= COMMENT_MAX_CHARS):
+                break
+        
+        result['report_date'] = report_date
+        result['employees'] = employees
+        
+        # Komentarz zarządu (fragment)
+        if comment is not None:
+            result['management_comment'] = comment.strip()
         
     except Exception as e:
         print(f"  ⚠️ Błąd parsowania PDF: {e}")
+        raise UncachedResult(result)  # Błąd mógł być przejściowy - bez zapisu do cache
+    
+    return result
+
+
+@disk_cached('json', variant=pdf_backend)
+def parse_pdf_report_date(filepath: str) -> Dict[str, Any]:
+    """
+    Lekka wersja parse_quarterly_pdf - tylko data raportu.
+    
+    Używana, gdy plik kontekstu dostarcza zatrudnienie i komentarz zarządu:
+    czyta strony tylko do znalezienia daty (zwykle pierwszą).
+    """
+    result = {
+        'report_date': None,
+        'employees': None,
+        'management_comment': None,
+        'shareholders': [],
+    }
+    
+    if not os.path.exists(filepath):
+        return result
+    if not (HAS_FITZ or HAS_PYPDF):
+        raise UncachedResult(result)  # Po instalacji biblioteki parsuj ponownie
+    
+    try:
+        text = ''
+        for page_text in iter_pdf_pages(filepath):
+            text += page_text
+            report_date, _, _ = scan_pdf_text(text)
+            if report_date is not None:
+                result['report_date'] = report_date
+                break
+    except Exception as e:
+        print(f"  ⚠️ Błąd parsowania PDF: {e}")
+        raise UncachedResult(result)  # Błąd mógł być przejściowy - bez zapisu do cache
     
     return result
 
 
+@disk_cached('pickle')
 def parse_context_file(filepath: str) -> Optional[ContextData]:
     """Parsuje plik _kontekst.txt z ręcznie przygotowanym kontekstem"""
     if not os.path.exists(filepath):
@@ -400,7 +745,7 @@ def parse_context_file(filepath: str) -> Optional[ContextData]:
             content = f.read()
     except Exception as e:
         print(f"  ⚠️ Błąd czytania kontekstu: {e}")
-        return None
+        raise UncachedResult(None)
     
     context = ContextData()
     current_section = None
@@ -435,7 +780,7 @@ def parse_context_file(filepath: str) -> Optional[ContextData]:
     
     # Zatrudnienie
     if 'ZATRUDNIENIE' in context.raw_sections:
-        fte_match = re.search(r'FTE:\s*(\d+[,.]?\d*)', context.raw_sections['ZATRUDNIENIE'])
+        fte_match = FTE_RE.search(context.raw_sections['ZATRUDNIENIE'])
         if fte_match:
             context.employees = parse_number(fte_match.group(1))
     
@@ -444,7 +789,7 @@ def parse_context_file(filepath: str) -> Optional[ContextData]:
         shareholders = []
         for line in context.raw_sections['AKCJONARIAT'].split('\n'):
             # Format: "Nazwa: XX.XX% kapitału / YY.YY% głosów"
-            match = re.match(r'(.+?):\s*(\d+[,.]?\d*)%\s*kapitału\s*/\s*(\d+[,.]?\d*)%\s*głosów', line)
+            match = SHAREHOLDER_FULL_RE.match(line)
             if match:
                 shareholders.append({
                     'name': match.group(1).strip(),
@@ -453,7 +798,7 @@ def parse_context_file(filepath: str) -> Optional[ContextData]:
                 })
             else:
                 # Prostszy format: "Nazwa: XX.XX%"
-                match2 = re.match(r'(.+?):\s*(\d+[,.]?\d*)%', line)
+                match2 = SHAREHOLDER_SIMPLE_RE.match(line)
                 if match2:
                     shareholders.append({
                         'name': match2.group(1).strip(),
@@ -503,12 +848,12 @@ def calculate_metrics(data: FinancialData) -> Dict[str, Any]:
     prev_year = None
     
     # Znajdź kwartał rok temu
+    if not data.quarter_index:
+        data.index_quarters()
     year, q = parse_quarter(latest)
-    for quarter in data.quarters:
-        y, qq = parse_quarter(quarter)
-        if y == year - 1 and qq == q:
-            prev_year = quarter
-            break
+    prev_idx = data.quarter_index.get((year - 1, q))
+    if prev_idx is not None:
+        prev_year = data.quarters[prev_idx]
     
     # === Przychody ===
     if latest in data.revenue:
@@ -518,8 +863,7 @@ def calculate_metrics(data: FinancialData) -> Dict[str, Any]:
             metrics['revenue_yoy'] = ((data.revenue[latest] / data.revenue[prev_year]) - 1) * 100
         
         # TTM (trailing 12 months)
-        ttm_quarters = data.quarters[-4:] if len(data.quarters) >= 4 else data.quarters
-        metrics['revenue_ttm'] = sum(data.revenue.get(q, 0) for q in ttm_quarters)
+        metrics['revenue_ttm'] = float(data.revenue.iloc[-4:].sum())
     
     # === Zysk netto ===
     if latest in data.net_profit:
@@ -532,8 +876,7 @@ def calculate_metrics(data: FinancialData) -> Dict[str, Any]:
                 metrics['net_profit_yoy'] = 999  # Turnaround
         
         # TTM
-        ttm_quarters = data.quarters[-4:] if len(data.quarters) >= 4 else data.quarters
-        metrics['net_profit_ttm'] = sum(data.net_profit.get(q, 0) for q in ttm_quarters)
+        metrics['net_profit_ttm'] = float(data.net_profit.iloc[-4:].sum())
     
     # === Marże ===
     if metrics.get('revenue_latest', 0) > 0:
@@ -729,27 +1072,133 @@ def generate_alerts(data: FinancialData, metrics: Dict[str, Any]) -> List[Alert]
 # WYKRESY
 # =============================================================================
 
-def fig_to_base64(fig) -> str:
-    """Konwertuje matplotlib figure do base64 string"""
+def render_sparkline_svg(values, color: str, width: int = 120, height: int = 32) -> str:
+    """
+    Mini-wykres trendu (sparkline) jako inline SVG - bez matplotlib.
+    
+    Dla prostych linii formatowanie stringa SVG jest o rzędy wielkości
+    szybsze niż Figure + render Agg + PNG + base64.
+    """
+    vals = np.asarray(values, dtype=np.float64)
+    if vals.size < 2:
+        return ''
+    
+    lo, hi = vals.min(), vals.max()
+    span = (hi - lo) or 1.0
+    pad = 2  # Margines, żeby linia nie była ucięta przy krawędzi
+    xs = np.linspace(pad, width - pad, vals.size)
+    ys = height - pad - (vals - lo) / span * (height - 2 * pad)
+    points = ' '.join(f'{x:.1f},{y:.1f}' for x, y in zip(xs, ys))
+    
+    return (f'<svg class="sparkline" viewBox="0 0 {width} {height}" width="{width}" height="{height}">'
+            f'<polyline fill="none" stroke="{color}" stroke-width="2" points="{points}"/></svg>')
+
+
+@functools.lru_cache(maxsize=256)
+def short_quarter_label(q: str) -> str:
+    """'2024/Q3 (wrz 24)' -> '2024/Q3' (etykieta osi / nagłówek tabeli)"""
+    return q.split('(')[0].strip()
+
+
+def tail_quarters(series: pd.Series, n: int) -> Tuple[List[str], List[str]]:
+    """Ostatnie n kwartałów serii i ich krótkie etykiety (bez kopiowania całego indeksu)"""
+    quarters = list(series.index[-n:])
+    return quarters, [short_quarter_label(q) for q in quarters]
+
+
+# Stałe marginesy wykresów (zmierzone raz dla szablonu) zamiast tight_layout;
+# bottom=0.22 mieści obrócone etykiety kwartałów
+CHART_MARGINS = {'left': 0.1, 'right': 0.95, 'top': 0.9, 'bottom': 0.22}
+
+
+# Pula figur - jedna na rozmiar wykresu i wątek. Tworzenie Figure (canvas Agg,
+# cache fontów, lokatory osi) jest droższe niż sam rysunek, a stały rozmiar
+# pozwala pominąć realokację bufora canvasu przy każdym wykresie.
+# Figury tworzone obiektowo (bez pyplot) - każdy wątek ma własną pulę.
+_FIG_POOL = threading.local()
+
+
+def get_chart_axes(figsize: Tuple[float, float]):
+    """Zwraca (fig, ax) z puli wątku - figura o zadanym rozmiarze z wyczyszczoną osią"""
+    cache = getattr(_FIG_POOL, 'figures', None)
+    if cache is None:
+        cache = _FIG_POOL.figures = {}
+    
+    fig = cache.get(figsize)
+    if fig is None:
+        fig = Figure(figsize=figsize)
+        FigureCanvasAgg(fig)
+        cache[figsize] = fig
+        return fig, fig.add_subplot()
+    
+    ax = fig.axes[0]
+    # Dodatkowe osie (np. twinx) tworzy wykres każdorazowo od nowa
+    for extra in fig.axes[1:]:
+        extra.remove()
+    ax.clear()
+    return fig, ax
+
+
+def fig_to_base64(fig, fmt: str = 'png') -> str:
+    """Konwertuje matplotlib figure do base64 string (fmt: 'png' lub 'jpeg')"""
     buf = BytesIO()
-    fig.savefig(buf, format='png', dpi=100, bbox_inches='tight', 
-                facecolor='white', edgecolor='none')
-    buf.seek(0)
-    img_str = base64.b64encode(buf.read()).decode('utf-8')
-    plt.close(fig)
-    return img_str
+    if fmt == 'jpeg' and HAS_PIL:
+        # JPEG z canvasu Agg - kilkukrotnie mniejszy niż PNG, mniej pracy dla base64
+        fig.set_dpi(90)
+        fig.canvas.draw()
+        rgba = np.asarray(fig.canvas.buffer_rgba())
+        Image.fromarray(rgba[..., :3]).save(buf, format='JPEG', quality=JPEG_QUALITY)
+    elif HAS_PIL:
+        # Raster prosto z canvasu Agg + PNG z lekką kompresją zlib
+        # (bez bbox_inches='tight' - to renderuje figurę dwukrotnie)
+        fig.set_dpi(100)
+        fig.canvas.draw()
+        rgba = np.asarray(fig.canvas.buffer_rgba())
+        Image.fromarray(rgba[..., :3]).save(buf, format='PNG', compress_level=1, optimize=False)
+    else:
+        fig.savefig(buf, format='png', dpi=100, facecolor='white', edgecolor='none')
+    # getbuffer() - bez kopiowania bajtów obrazu
+    if HAS_PYBASE64:
+        return pybase64.b64encode_as_string(buf.getbuffer())
+    return base64.b64encode(buf.getbuffer()).decode('ascii')
+
+
+def fig_to_svg(fig) -> str:
+    """Konwertuje matplotlib figure do inline SVG (bez base64)"""
+    buf = BytesIO()
+    fig.savefig(buf, format='svg', facecolor='white', edgecolor='none')
+    svg = buf.getvalue().decode('utf-8')
+    # Pomiń prolog XML / DOCTYPE - w HTML osadzamy sam element <svg>
+    return svg[svg.find('<svg'):].strip()
+
+
+def render_figure(fig) -> str:
+    """Renderuje wykres w formacie CHART_FORMAT"""
+    if CHART_FORMAT == 'svg':
+        return fig_to_svg(fig)
+    return fig_to_base64(fig, CHART_FORMAT)
+
+
+def embed_chart(chart: str, alt: str) -> str:
+    """Zwraca znacznik HTML wykresu (inline SVG lub <img> z base64 PNG/JPEG)"""
+    if chart.startswith('<svg'):
+        return chart.replace('<svg', f'<svg role="img" aria-label="{alt}"', 1)
+    # Base64 JPEG zaczyna się od znacznika SOI (FF D8 FF -> '/9j/')
+    mime = 'image/jpeg' if chart.startswith('/9j/') else 'image/png'
+    return f'<img src="data:{mime};base64,{chart}" alt="{alt}">'
 
 
 def create_revenue_chart(data: FinancialData) -> str:
     """Tworzy wykres przychodów i zysku"""
-    if not data.revenue:
+    if data.revenue.empty:
         return ""
     
-    fig, ax1 = plt.subplots(figsize=(10, 5))
+    fig, ax1 = get_chart_axes((10, 5))
     
-    quarters = list(data.revenue.keys())[-12:]  # Ostatnie 12 kwartałów
-    revenues = [data.revenue.get(q, 0) for q in quarters]
-    profits = [data.net_profit.get(q, 0) for q in quarters]
+    quarters, labels = tail_quarters(data.revenue, 12)  # Ostatnie 12 kwartałów
+    # Wartości ogona serii bez wyszukiwania po kluczu; zysk dopasowany do kwartałów przychodów
+    revenues = data.revenue.iloc[-12:].to_numpy()
+    profits = data.net_profit.reindex(quarters, fill_value=0).to_numpy()
     
     x = range(len(quarters))
     
@@ -766,14 +1215,12 @@ def create_revenue_chart(data: FinancialData) -> str:
     ax2.set_ylabel('Zysk netto (tys. PLN)', color=COLORS['profit'])
     ax2.tick_params(axis='y', labelcolor=COLORS['profit'])
     
-    # Koloruj zysk/stratę
-    for i, p in enumerate(profits):
-        color = COLORS['success'] if p >= 0 else COLORS['danger']
-        ax2.plot(i, p, 'o', color=color, markersize=8, zorder=5)
+    # Koloruj zysk/stratę - jeden scatter z tablicą kolorów (s=64 to markersize=8)
+    point_colors = np.where(profits >= 0, COLORS['success'], COLORS['danger'])
+    ax2.scatter(np.arange(len(profits)), profits, c=point_colors, s=64, zorder=5)
     
     # Labels
     ax1.set_xticks(x)
-    labels = [q.split('(')[0].strip() for q in quarters]
     ax1.set_xticklabels(labels, rotation=45, ha='right', fontsize=8)
     
     ax1.set_title(f'{data.ticker} - Przychody i Zysk Netto', fontsize=14, fontweight='bold')
@@ -783,19 +1230,19 @@ def create_revenue_chart(data: FinancialData) -> str:
     lines2, labels2 = ax2.get_legend_handles_labels()
     ax1.legend(lines1 + lines2, labels1 + labels2, loc='upper left')
     
-    plt.tight_layout()
-    return fig_to_base64(fig)
+    fig.subplots_adjust(**{**CHART_MARGINS, 'right': 0.9})  # miejsce na prawą oś zysku
+    return render_figure(fig)
 
 
 def create_cash_chart(data: FinancialData) -> str:
     """Tworzy wykres pozycji gotówkowej"""
-    if not data.cash:
+    if data.cash.empty:
         return ""
     
-    fig, ax = plt.subplots(figsize=(10, 4))
+    fig, ax = get_chart_axes((10, 4))
     
-    quarters = list(data.cash.keys())[-12:]
-    cash = [data.cash.get(q, 0) for q in quarters]
+    quarters, labels = tail_quarters(data.cash, 12)
+    cash = data.cash.iloc[-12:].to_numpy()
     
     x = range(len(quarters))
     
@@ -804,43 +1251,38 @@ def create_cash_chart(data: FinancialData) -> str:
     ax.plot(x, cash, color=COLORS['cash'], linewidth=2, marker='o', markersize=6)
     
     # Annotate last value
-    if cash:
+    if len(cash):
         ax.annotate(f'{cash[-1]:,.0f}', xy=(len(cash)-1, cash[-1]), 
                    xytext=(10, 10), textcoords='offset points',
                    fontsize=10, fontweight='bold', color=COLORS['cash'])
     
     ax.set_xticks(x)
-    labels = [q.split('(')[0].strip() for q in quarters]
     ax.set_xticklabels(labels, rotation=45, ha='right', fontsize=8)
     
     ax.set_ylabel('Gotówka (tys. PLN)')
     ax.set_title(f'{data.ticker} - Pozycja Gotówkowa', fontsize=14, fontweight='bold')
     ax.yaxis.set_major_formatter(FuncFormatter(lambda x, p: f'{x:,.0f}'))
     
-    plt.tight_layout()
-    return fig_to_base64(fig)
+    fig.subplots_adjust(**CHART_MARGINS)
+    return render_figure(fig)
 
 
 def create_margins_chart(data: FinancialData) -> str:
     """Tworzy wykres marż"""
-    if not data.revenue or not data.ebit:
+    if data.revenue.empty or data.ebit.empty:
         return ""
     
-    fig, ax = plt.subplots(figsize=(10, 4))
+    fig, ax = get_chart_axes((10, 4))
     
-    quarters = list(data.revenue.keys())[-12:]
+    quarters, labels = tail_quarters(data.revenue, 12)
     
-    ebit_margin = []
-    net_margin = []
-    
-    for q in quarters:
-        rev = data.revenue.get(q, 0)
-        if rev > 0:
-            ebit_margin.append((data.ebit.get(q, 0) / rev) * 100)
-            net_margin.append((data.net_profit.get(q, 0) / rev) * 100)
-        else:
-            ebit_margin.append(0)
-            net_margin.append(0)
+    # Marże jednym wektorowym dzieleniem (0 gdy brak przychodów)
+    rev = data.revenue.iloc[-12:].to_numpy(dtype=np.float64)
+    ebit = data.ebit.reindex(quarters, fill_value=0).to_numpy(dtype=np.float64)
+    net = data.net_profit.reindex(quarters, fill_value=0).to_numpy(dtype=np.float64)
+    has_rev = rev > 0
+    ebit_margin = np.divide(ebit, rev, out=np.zeros_like(rev), where=has_rev) * 100
+    net_margin = np.divide(net, rev, out=np.zeros_like(rev), where=has_rev) * 100
     
     x = range(len(quarters))
     
@@ -853,7 +1295,6 @@ def create_margins_chart(data: FinancialData) -> str:
     ax.fill_between(x, 0, net_margin, alpha=0.2, color=COLORS['secondary'])
     
     ax.set_xticks(x)
-    labels = [q.split('(')[0].strip() for q in quarters]
     ax.set_xticklabels(labels, rotation=45, ha='right', fontsize=8)
     
     ax.set_ylabel('Marża (%)')
@@ -861,22 +1302,22 @@ def create_margins_chart(data: FinancialData) -> str:
     ax.legend(loc='upper left')
     ax.yaxis.set_major_formatter(FuncFormatter(lambda x, p: f'{x:.0f}%'))
     
-    plt.tight_layout()
-    return fig_to_base64(fig)
+    fig.subplots_adjust(**CHART_MARGINS)
+    return render_figure(fig)
 
 
 def create_cashflow_chart(data: FinancialData) -> str:
     """Tworzy wykres przepływów pieniężnych"""
-    if not data.ocf:
+    if data.ocf.empty:
         return ""
     
-    fig, ax = plt.subplots(figsize=(10, 4))
+    fig, ax = get_chart_axes((10, 4))
     
-    quarters = list(data.ocf.keys())[-8:]  # Ostatnie 8 kwartałów
+    quarters, labels = tail_quarters(data.ocf, 8)  # Ostatnie 8 kwartałów
     
-    ocf = [data.ocf.get(q, 0) for q in quarters]
-    icf = [data.icf.get(q, 0) for q in quarters]
-    fcf = [data.fcf.get(q, 0) for q in quarters]
+    ocf = data.ocf.iloc[-8:].to_numpy()
+    icf = data.icf.reindex(quarters, fill_value=0).to_numpy()
+    fcf = data.fcf.reindex(quarters, fill_value=0).to_numpy()
     
     x = range(len(quarters))
     width = 0.25
@@ -888,65 +1329,111 @@ def create_cashflow_chart(data: FinancialData) -> str:
     ax.axhline(y=0, color='gray', linestyle='-', alpha=0.5)
     
     ax.set_xticks(x)
-    labels = [q.split('(')[0].strip() for q in quarters]
     ax.set_xticklabels(labels, rotation=45, ha='right', fontsize=8)
     
     ax.set_ylabel('Przepływy (tys. PLN)')
     ax.set_title(f'{data.ticker} - Przepływy Pieniężne', fontsize=14, fontweight='bold')
     ax.legend(loc='upper left')
     
-    plt.tight_layout()
-    return fig_to_base64(fig)
+    fig.subplots_adjust(**CHART_MARGINS)
+    return render_figure(fig)
+
+
+@njit(cache=True)
+def season_stats(qs: np.ndarray, vals: np.ndarray) -> np.ndarray:
+    """
+    Statystyki box-plot per kwartał (Q1-Q4), jak matplotlib boxplot (whis=1.5).
+    
+    Zwraca tablicę 4x6: [whislo, q1, mediana, q3, whishi, średnia];
+    NaN dla kwartałów bez danych.
+    """
+    out = np.full((4, 6), np.nan)
+    for k in range(4):
+        g = vals[qs == k + 1]
+        if g.size == 0:
+            continue
+        q1 = np.percentile(g, 25)
+        med = np.percentile(g, 50)
+        q3 = np.percentile(g, 75)
+        iqr = q3 - q1
+        
+        # Wąsy: skrajne wartości w granicach 1.5 * IQR
+        hi = g[g <= q3 + 1.5 * iqr]
+        lo = g[g >= q1 - 1.5 * iqr]
+        whishi = q3 if hi.size == 0 or hi.max() < q3 else hi.max()
+        whislo = q1 if lo.size == 0 or lo.min() > q1 else lo.min()
+        
+        out[k, 0] = whislo
+        out[k, 1] = q1
+        out[k, 2] = med
+        out[k, 3] = q3
+        out[k, 4] = whishi
+        out[k, 5] = g.mean()
+    return out
 
 
 def create_seasonality_chart(data: FinancialData) -> str:
     """Tworzy wykres sezonowości (Q1 vs Q2 vs Q3 vs Q4)"""
-    if not data.revenue:
+    if data.revenue.empty:
         return ""
     
-    fig, ax = plt.subplots(figsize=(8, 5))
+    fig, ax = get_chart_axes((8, 5))
     
-    # Grupuj po kwartałach
-    q1, q2, q3, q4 = [], [], [], []
+    # Grupuj po kwartałach - statystyki liczone jednym kernelem
+    qs = np.array([parse_quarter(q)[1] for q in data.revenue.index], dtype=np.int64)
+    vals = data.revenue.to_numpy(dtype=np.float64)
+    stats = season_stats(qs, vals)
     
-    for q, val in data.revenue.items():
-        _, quarter = parse_quarter(q)
-        if quarter == 1:
-            q1.append(val)
-        elif quarter == 2:
-            q2.append(val)
-        elif quarter == 3:
-            q3.append(val)
-        elif quarter == 4:
-            q4.append(val)
-    
-    quarters_data = [q1, q2, q3, q4]
     quarters_labels = ['Q1', 'Q2', 'Q3', 'Q4']
-    
-    # Box plot
-    bp = ax.boxplot(quarters_data, labels=quarters_labels, patch_artist=True)
+    bxp_stats = []
+    for k, label in enumerate(quarters_labels):
+        whislo, q1, med, q3, whishi, _ = stats[k]
+        group = vals[qs == k + 1]
+        bxp_stats.append({
+            'label': label, 'whislo': whislo, 'q1': q1, 'med': med, 'q3': q3, 'whishi': whishi,
+            'fliers': group[(group < whislo) | (group > whishi)],
+        })
+    
+    # Box plot z gotowych statystyk
+    bp = ax.bxp(bxp_stats, patch_artist=True)
     
     colors = [COLORS['info'], COLORS['warning'], COLORS['success'], COLORS['primary']]
     for patch, color in zip(bp['boxes'], colors):
         patch.set_facecolor(color)
         patch.set_alpha(0.6)
     
-    # Średnie
-    means = [sum(q)/len(q) if q else 0 for q in quarters_data]
+    # Średnie (0 dla kwartałów bez danych)
+    means = np.nan_to_num(stats[:, 5], nan=0.0)
     ax.scatter(range(1, 5), means, color='red', s=100, zorder=5, label='Średnia')
     
     ax.set_ylabel('Przychody (tys. PLN)')
     ax.set_title(f'{data.ticker} - Sezonowość Przychodów', fontsize=14, fontweight='bold')
     ax.legend()
     
-    plt.tight_layout()
-    return fig_to_base64(fig)
+    fig.subplots_adjust(**{**CHART_MARGINS, 'left': 0.12, 'bottom': 0.1})  # węższa figura, etykiety poziome
+    return render_figure(fig)
+
+
+# (klucz, funkcja, etykieta sukcesu, etykieta błędu)
+CHART_JOBS = [
+    ('revenue', create_revenue_chart, 'Przychody i zysk', 'przychodów'),
+    ('margins', create_margins_chart, 'Marże', 'marż'),
+    ('cash', create_cash_chart, 'Gotówka', 'gotówki'),
+    ('cashflow', create_cashflow_chart, 'Cash Flow', 'cash flow'),
+    ('seasonality', create_seasonality_chart, 'Sezonowość', 'sezonowości'),
+]
 
 
 # =============================================================================
 # GENEROWANIE HTML
 # =============================================================================
 
+@functools.lru_cache(maxsize=64)
+def quarterly_report_re(ticker: str) -> re.Pattern:
+    """Wzorzec nazwy głównego raportu kwartalnego: {ticker}_YYYY_Q.pdf"""
+    return re.compile(rf'{re.escape(ticker.lower())}_\d{{4}}_\d\.pdf')
+
+
 def find_attachments(folder_path: str, ticker: str) -> List[Attachment]:
     """Znajduje dodatkowe pliki (PDF, DOCX) w folderze"""
     attachments = []
@@ -954,61 +1441,55 @@ def find_attachments(folder_path: str, ticker: str) -> List[Attachment]:
     # Pliki do pominięcia (dane źródłowe)
     skip_patterns = ['bilans', 'rzis', 'przeplywy', 'raport_analityczny']
     
-    for ext in ['*.pdf', '*.PDF', '*.docx', '*.DOCX', '*.doc', '*.DOC']:
-        for filepath in glob.glob(os.path.join(folder_path, ext)):
-            filename = os.path.basename(filepath)
-            filename_lower = filename.lower()
-            
-            # Pomiń pliki z danymi źródłowymi
-            if any(skip in filename_lower for skip in skip_patterns):
-                continue
-            
-            # Sprawdź czy to główny raport kwartalny (ticker_YYYY_Q.pdf)
-            # np. gen_2025_3.pdf - to raport kwartalny, nie załącznik
-            is_quarterly_report = False
-            if filename_lower.startswith(ticker.lower()):
-                # Sprawdź czy pasuje do wzorca raportu kwartalnego
-                if re.match(rf'{ticker.lower()}_\d{{4}}_\d\.pdf', filename_lower):
-                    is_quarterly_report = True
-            
-            filetype = 'pdf' if filepath.lower().endswith('.pdf') else 'docx'
-            
-            # Opis z nazwy pliku
-            desc = filename.replace('_', ' ').replace('-', ' ')
-            desc = re.sub(r'\.(pdf|docx|doc)$', '', desc, flags=re.IGNORECASE)
-            
-            # Jeśli to raport kwartalny, dodaj z odpowiednim opisem
-            if is_quarterly_report:
-                desc = f"📋 Raport Kwartalny - {desc}"
-            
-            attachments.append(Attachment(
-                filename=filename,
-                filepath=filepath,
-                filetype=filetype,
-                description=desc
-            ))
+    # Jedno przejście po folderze; kolejność: PDF, DOCX, DOC (jak wcześniej przy glob)
+    extensions = ('.pdf', '.docx', '.doc')
+    with os.scandir(folder_path) as entries:
+        candidates = [
+            e for e in entries
+            if not e.name.startswith('.') and e.name.lower().endswith(extensions) and e.is_file()
+        ]
+    candidates.sort(key=lambda e: extensions.index(os.path.splitext(e.name)[1].lower()))
+    
+    for entry in candidates:
+        filepath = entry.path
+        filename = entry.name
+        filename_lower = filename.lower()
+        
+        # Pomiń pliki z danymi źródłowymi
+        if any(skip in filename_lower for skip in skip_patterns):
+            continue
+        
+        # Sprawdź czy to główny raport kwartalny (ticker_YYYY_Q.pdf)
+        # np. gen_2025_3.pdf - to raport kwartalny, nie załącznik
+        is_quarterly_report = False
+        if filename_lower.startswith(ticker.lower()):
+            # Sprawdź czy pasuje do wzorca raportu kwartalnego
+            if quarterly_report_re(ticker).match(filename_lower):
+                is_quarterly_report = True
+        
+        filetype = 'pdf' if filepath.lower().endswith('.pdf') else 'docx'
+        
+        # Opis z nazwy pliku
+        desc = filename.replace('_', ' ').replace('-', ' ')
+        desc = ATTACHMENT_EXT_RE.sub('', desc)
+        
+        # Jeśli to raport kwartalny, dodaj z odpowiednim opisem
+        if is_quarterly_report:
+            desc = f"📋 Raport Kwartalny - {desc}"
+        
+        attachments.append(Attachment(
+            filename=filename,
+            filepath=filepath,
+            filetype=filetype,
+            description=desc
+        ))
     
     return attachments
 
 
-def generate_html_report(data: FinancialData, metrics: Dict[str, Any], 
-                         alerts: List[Alert], attachments: List[Attachment],
-                         charts: Dict[str, str], context: Optional[ContextData] = None) -> str:
-    """Generuje kompletny raport HTML"""
-    
-    # Timestamp
-    generated = datetime.now().strftime('%Y-%m-%d %H:%M')
-    latest_q = data.quarters[-1] if data.quarters else 'N/A'
-    
-    # === HTML START ===
-    html = f'''<!DOCTYPE html>
-<html lang="pl">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>{data.ticker} - Raport Analityczny</title>
-    <style>
-        :root {{
+# Arkusz stylów raportu - stała modułu (nie f-string), bez podwajania klamer
+_CSS_BLOCK = """<style>
+        :root {
             --primary: #2E86AB;
             --secondary: #A23B72;
             --success: #28A745;
@@ -1017,255 +1498,261 @@ def generate_html_report(data: FinancialData, metrics: Dict[str, Any],
             --info: #17A2B8;
             --light: #F8F9FA;
             --dark: #343A40;
-        }}
+        }
         
-        * {{
+        * {
             box-sizing: border-box;
             margin: 0;
             padding: 0;
-        }}
+        }
         
-        body {{
+        body {
             font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, Oxygen, Ubuntu, sans-serif;
             line-height: 1.6;
             color: #333;
             background: #f5f5f5;
             padding: 20px;
-        }}
+        }
         
-        .container {{
+        .container {
             max-width: 1200px;
             margin: 0 auto;
             background: white;
             border-radius: 12px;
             box-shadow: 0 4px 6px rgba(0,0,0,0.1);
             overflow: hidden;
-        }}
+        }
         
-        header {{
+        header {
             background: linear-gradient(135deg, var(--primary), var(--secondary));
             color: white;
             padding: 30px;
-        }}
+        }
         
-        header h1 {{
+        header h1 {
             font-size: 2.5rem;
             margin-bottom: 10px;
-        }}
+        }
         
-        header .subtitle {{
+        header .subtitle {
             opacity: 0.9;
             font-size: 1.1rem;
-        }}
+        }
         
-        .meta {{
+        .meta {
             display: flex;
             gap: 30px;
             margin-top: 15px;
             font-size: 0.9rem;
             opacity: 0.85;
-        }}
+        }
         
-        main {{
+        main {
             padding: 30px;
-        }}
+        }
         
-        section {{
+        section {
             margin-bottom: 40px;
-        }}
+        }
         
-        h2 {{
+        h2 {
             color: var(--primary);
             font-size: 1.5rem;
             margin-bottom: 20px;
             padding-bottom: 10px;
             border-bottom: 2px solid var(--light);
-        }}
+        }
         
-        h3 {{
+        h3 {
             color: var(--dark);
             font-size: 1.2rem;
             margin: 20px 0 15px;
-        }}
+        }
         
         /* KPI Cards */
-        .kpi-grid {{
+        .kpi-grid {
             display: grid;
             grid-template-columns: repeat(auto-fit, minmax(200px, 1fr));
             gap: 20px;
             margin-bottom: 30px;
-        }}
+        }
         
-        .kpi-card {{
+        .kpi-card {
             background: var(--light);
             border-radius: 10px;
             padding: 20px;
             text-align: center;
             border-left: 4px solid var(--primary);
-        }}
+        }
         
-        .kpi-card.success {{ border-left-color: var(--success); }}
-        .kpi-card.danger {{ border-left-color: var(--danger); }}
-        .kpi-card.warning {{ border-left-color: var(--warning); }}
+        .kpi-card.success { border-left-color: var(--success); }
+        .kpi-card.danger { border-left-color: var(--danger); }
+        .kpi-card.warning { border-left-color: var(--warning); }
         
-        .kpi-value {{
+        .kpi-value {
             font-size: 1.8rem;
             font-weight: bold;
             color: var(--dark);
-        }}
+        }
         
-        .kpi-label {{
+        .kpi-label {
             font-size: 0.9rem;
             color: #666;
             margin-top: 5px;
-        }}
+        }
         
-        .kpi-change {{
+        .kpi-change {
             font-size: 0.85rem;
             margin-top: 5px;
-        }}
+        }
+        
+        .sparkline {
+            display: block;
+            margin: 8px auto 0;
+        }
         
-        .kpi-change.positive {{ color: var(--success); }}
-        .kpi-change.negative {{ color: var(--danger); }}
+        .kpi-change.positive { color: var(--success); }
+        .kpi-change.negative { color: var(--danger); }
         
         /* Alerts */
-        .alerts {{
+        .alerts {
             display: flex;
             flex-direction: column;
             gap: 15px;
-        }}
+        }
         
-        .alert {{
+        .alert {
             padding: 15px 20px;
             border-radius: 8px;
             display: flex;
             align-items: flex-start;
             gap: 15px;
-        }}
+        }
         
-        .alert.success {{ background: #d4edda; border-left: 4px solid var(--success); }}
-        .alert.warning {{ background: #fff3cd; border-left: 4px solid var(--warning); }}
-        .alert.danger {{ background: #f8d7da; border-left: 4px solid var(--danger); }}
-        .alert.info {{ background: #d1ecf1; border-left: 4px solid var(--info); }}
+        .alert.success { background: #d4edda; border-left: 4px solid var(--success); }
+        .alert.warning { background: #fff3cd; border-left: 4px solid var(--warning); }
+        .alert.danger { background: #f8d7da; border-left: 4px solid var(--danger); }
+        .alert.info { background: #d1ecf1; border-left: 4px solid var(--info); }
         
-        .alert-title {{
+        .alert-title {
             font-weight: bold;
             margin-bottom: 5px;
-        }}
+        }
         
-        .alert-value {{
+        .alert-value {
             font-size: 1.2rem;
             font-weight: bold;
             margin-left: auto;
             white-space: nowrap;
-        }}
+        }
         
         /* Charts */
-        .chart-container {{
+        .chart-container {
             background: white;
             border-radius: 10px;
             padding: 20px;
             margin-bottom: 25px;
             box-shadow: 0 2px 4px rgba(0,0,0,0.05);
-        }}
+        }
         
-        .chart-container img {{
+        .chart-container img,
+        .chart-container svg {
             width: 100%;
             height: auto;
-        }}
+        }
         
         /* Tables */
-        table {{
+        table {
             width: 100%;
             border-collapse: collapse;
             margin: 15px 0;
             font-size: 0.9rem;
-        }}
+        }
         
-        th, td {{
+        th, td {
             padding: 12px;
             text-align: right;
             border-bottom: 1px solid #eee;
-        }}
+        }
         
-        th {{
+        th {
             background: var(--light);
             font-weight: 600;
             color: var(--dark);
-        }}
+        }
         
-        td:first-child, th:first-child {{
+        td:first-child, th:first-child {
             text-align: left;
-        }}
+        }
         
-        tr:hover {{
+        tr:hover {
             background: #fafafa;
-        }}
+        }
         
-        .positive {{ color: var(--success); }}
-        .negative {{ color: var(--danger); }}
+        .positive { color: var(--success); }
+        .negative { color: var(--danger); }
         
         /* Context sections */
-        #context {{
+        #context {
             background: linear-gradient(135deg, #f8f9fa 0%, #e9ecef 100%);
             padding: 25px;
             border-radius: 12px;
             margin-bottom: 30px;
-        }}
+        }
         
-        .context-item {{
+        .context-item {
             background: white;
             padding: 20px;
             border-radius: 8px;
             margin-bottom: 15px;
             box-shadow: 0 2px 4px rgba(0,0,0,0.05);
-        }}
+        }
         
-        .context-item h3 {{
+        .context-item h3 {
             margin: 0 0 10px 0;
             color: var(--primary);
             font-size: 1.1rem;
-        }}
+        }
         
-        .context-item p {{
+        .context-item p {
             margin: 0;
             line-height: 1.6;
-        }}
+        }
         
-        .context-item.risks {{
+        .context-item.risks {
             border-left: 4px solid var(--warning);
-        }}
+        }
         
-        .shareholders-table {{
+        .shareholders-table {
             width: 100%;
             border-collapse: collapse;
             margin-top: 10px;
-        }}
+        }
         
         .shareholders-table th,
-        .shareholders-table td {{
+        .shareholders-table td {
             padding: 10px;
             text-align: left;
             border-bottom: 1px solid #dee2e6;
-        }}
+        }
         
-        .shareholders-table th {{
+        .shareholders-table th {
             background: var(--light);
             font-weight: 600;
-        }}
+        }
         
-        .shareholders-table tr:hover {{
+        .shareholders-table tr:hover {
             background: #f8f9fa;
-        }}
+        }
         
         /* Attachments */
-        .attachments-list {{
+        .attachments-list {
             display: flex;
             flex-wrap: wrap;
             gap: 15px;
-        }}
+        }
         
-        .attachment {{
+        .attachment {
             display: flex;
             align-items: center;
             gap: 10px;
@@ -1275,38 +1762,108 @@ def generate_html_report(data: FinancialData, metrics: Dict[str, Any],
             text-decoration: none;
             color: var(--dark);
             transition: all 0.2s;
-        }}
+        }
         
-        .attachment:hover {{
+        .attachment:hover {
             background: var(--primary);
             color: white;
             transform: translateY(-2px);
-        }}
+        }
         
-        .attachment-icon {{
+        .attachment-icon {
             font-size: 1.5rem;
-        }}
+        }
         
-        footer {{
+        footer {
             background: var(--dark);
             color: white;
             padding: 20px 30px;
             text-align: center;
             font-size: 0.85rem;
-        }}
-        
-        @media (max-width: 768px) {{
-            header h1 {{ font-size: 1.8rem; }}
-            .kpi-grid {{ grid-template-columns: repeat(2, 1fr); }}
-            .meta {{ flex-direction: column; gap: 5px; }}
-        }}
-    </style>
+        }
+        
+        @media (max-width: 768px) {
+            header h1 { font-size: 1.8rem; }
+            .kpi-grid { grid-template-columns: repeat(2, 1fr); }
+            .meta { flex-direction: column; gap: 5px; }
+        }
+    </style>"""
+
+
+def value_class(value: float) -> str:
+    """Klasa komórki tabeli wg znaku wartości"""
+    return 'positive' if value > 0 else ('negative' if value < 0 else '')
+
+
+def kpi_class(value: float, good: Optional[float] = None, bad: Optional[float] = None) -> str:
+    """Klasa karty KPI: 'danger' poniżej bad, 'success' powyżej good, inaczej ''"""
+    if bad is not None and value < bad:
+        return 'danger'
+    if good is not None and value > good:
+        return 'success'
+    return ''
+
+
+def _kpi_card(value: float, label: str, card_class: str = '',
+              sparkline: str = '', yoy: Optional[float] = None,
+              fmt: str = ',.0f', suffix: str = '') -> str:
+    """Fragment HTML karty KPI (wartość, etykieta, opcjonalnie sparkline i zmiana r/r)"""
+    extra = ''
+    if sparkline:
+        extra += f'\n                        {sparkline}'
+    if yoy is not None:
+        yoy_class = 'positive' if yoy > 0 else 'negative'
+        yoy_sign = '+' if yoy > 0 else ''
+        extra += f'\n                        <div class="kpi-change {yoy_class}">{yoy_sign}{yoy:.1f}% r/r</div>'
+    
+    # Bez klasy - samo "kpi-card", bez spacji na końcu atrybutu
+    css_class = ' '.join(filter(None, ('kpi-card', card_class)))
+    return f'''
+                    <div class="{css_class}">
+                        <div class="kpi-value">{value:{fmt}}{suffix}</div>
+                        <div class="kpi-label">{label}</div>{extra}
+                    </div>
+'''
+
+
+def generate_html_report(data: FinancialData, metrics: Dict[str, Any], 
+                         alerts: List[Alert], attachments: List[Attachment],
+                         charts: Dict[str, str], context: Optional[ContextData] = None) -> str:
+    """Generuje kompletny raport HTML"""
+    return ''.join(iter_html_report(data, metrics, alerts, attachments, charts, context))
+
+
+def iter_html_report(data: FinancialData, metrics: Dict[str, Any],
+                     alerts: List[Alert], attachments: List[Attachment],
+                     charts: Dict[str, str], context: Optional[ContextData] = None):
+    """
+    Generuje raport HTML fragmentami (nagłówek, kolejne sekcje, stopka).
+    
+    Pozwala zapisywać raport strumieniowo, bez budowania całego dokumentu
+    (z osadzonymi wykresami) w pamięci.
+    """
+    
+    # Timestamp
+    generated = datetime.now().strftime('%Y-%m-%d %H:%M')
+    latest_q = data.quarters[-1].translate(_ESCAPE) if data.quarters else 'N/A'
+    ticker = data.ticker.translate(_ESCAPE)
+    
+    # === HTML START ===
+    yield f'''<!DOCTYPE html>
+<html lang="pl">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>{ticker} - Raport Analityczny</title>
+    '''
+    yield _CSS_BLOCK
+    yield f'''
 </head>
 <body>
     <div class="container">
         <header>
-            <h1>📊 {data.ticker}</h1>
-            <div class="subtitle">{data.company_name or 'Raport Analityczny'}</div>
+            <h1>📊 {ticker}</h1>
+            <div class="subtitle">{(data.company_name or 'Raport Analityczny').translate(_ESCAPE)}</div>
             <div class="meta">
                 <span>📅 Ostatni kwartał: {latest_q}</span>
                 <span>🕐 Wygenerowano: {generated}</span>
@@ -1318,7 +1875,7 @@ def generate_html_report(data: FinancialData, metrics: Dict[str, Any],
 '''
     
     # === KPI CARDS ===
-    html += '''
+    yield '''
             <section id="kpi">
                 <h2>📈 Kluczowe Wskaźniki</h2>
                 <div class="kpi-grid">
@@ -1326,161 +1883,129 @@ def generate_html_report(data: FinancialData, metrics: Dict[str, Any],
     
     # Revenue
     if 'revenue_latest' in metrics:
-        yoy_class = 'positive' if metrics.get('revenue_yoy', 0) > 0 else 'negative'
-        yoy_sign = '+' if metrics.get('revenue_yoy', 0) > 0 else ''
-        card_class = 'success' if metrics.get('revenue_yoy', 0) > 20 else ''
-        html += f'''
-                    <div class="kpi-card {card_class}">
-                        <div class="kpi-value">{metrics['revenue_latest']:,.0f}</div>
-                        <div class="kpi-label">Przychody Q (tys. PLN)</div>
-                        {'<div class="kpi-change ' + yoy_class + '">' + yoy_sign + f"{metrics['revenue_yoy']:.1f}% r/r</div>" if 'revenue_yoy' in metrics else ''}
-                    </div>
-'''
+        yield _kpi_card(metrics['revenue_latest'], 'Przychody Q (tys. PLN)',
+                        card_class='success' if metrics.get('revenue_yoy', 0) > 20 else '',
+                        sparkline=render_sparkline_svg(data.revenue.iloc[-8:], COLORS['revenue']),
+                        yoy=metrics.get('revenue_yoy'))
     
     # Net Profit
     if 'net_profit_latest' in metrics:
-        card_class = 'success' if metrics['net_profit_latest'] > 0 else 'danger'
-        html += f'''
-                    <div class="kpi-card {card_class}">
-                        <div class="kpi-value">{metrics['net_profit_latest']:,.0f}</div>
-                        <div class="kpi-label">Zysk netto Q (tys. PLN)</div>
-                    </div>
-'''
+        yield _kpi_card(metrics['net_profit_latest'], 'Zysk netto Q (tys. PLN)',
+                        card_class='success' if metrics['net_profit_latest'] > 0 else 'danger',
+                        sparkline=render_sparkline_svg(data.net_profit.iloc[-8:], COLORS['profit']))
     
     # Cash
     if 'cash_latest' in metrics:
-        yoy_class = 'positive' if metrics.get('cash_yoy', 0) > 0 else 'negative'
-        yoy_sign = '+' if metrics.get('cash_yoy', 0) > 0 else ''
-        html += f'''
-                    <div class="kpi-card">
-                        <div class="kpi-value">{metrics['cash_latest']:,.0f}</div>
-                        <div class="kpi-label">Gotówka (tys. PLN)</div>
-                        {'<div class="kpi-change ' + yoy_class + '">' + yoy_sign + f"{metrics['cash_yoy']:.1f}% r/r</div>" if 'cash_yoy' in metrics else ''}
-                    </div>
-'''
+        yield _kpi_card(metrics['cash_latest'], 'Gotówka (tys. PLN)',
+                        sparkline=render_sparkline_svg(data.cash.iloc[-8:], COLORS['cash']),
+                        yoy=metrics.get('cash_yoy'))
     
     # Net Margin
     if 'net_margin' in metrics:
-        card_class = 'success' if metrics['net_margin'] > 10 else ('danger' if metrics['net_margin'] < 0 else '')
-        html += f'''
-                    <div class="kpi-card {card_class}">
-                        <div class="kpi-value">{metrics['net_margin']:.1f}%</div>
-                        <div class="kpi-label">Marża netto</div>
-                    </div>
-'''
+        yield _kpi_card(metrics['net_margin'], 'Marża netto', fmt='.1f', suffix='%',
+                        card_class=kpi_class(metrics['net_margin'], good=10, bad=0))
     
     # ROE
     if 'roe' in metrics:
-        card_class = 'success' if metrics['roe'] > 15 else ''
-        html += f'''
-                    <div class="kpi-card {card_class}">
-                        <div class="kpi-value">{metrics['roe']:.1f}%</div>
-                        <div class="kpi-label">ROE (TTM)</div>
-                    </div>
-'''
+        yield _kpi_card(metrics['roe'], 'ROE (TTM)', fmt='.1f', suffix='%',
+                        card_class=kpi_class(metrics['roe'], good=15))
     
     # Current Ratio
     if 'current_ratio' in metrics:
-        card_class = 'danger' if metrics['current_ratio'] < 1 else ('success' if metrics['current_ratio'] > 2 else '')
-        html += f'''
-                    <div class="kpi-card {card_class}">
-                        <div class="kpi-value">{metrics['current_ratio']:.2f}</div>
-                        <div class="kpi-label">Current Ratio</div>
-                    </div>
-'''
+        yield _kpi_card(metrics['current_ratio'], 'Current Ratio', fmt='.2f',
+                        card_class=kpi_class(metrics['current_ratio'], good=2, bad=1))
     
-    html += '''
+    yield '''
                 </div>
             </section>
 '''
     
     # === ALERTS ===
     if alerts:
-        html += '''
+        yield '''
             <section id="alerts">
                 <h2>🚨 Alerty i Obserwacje</h2>
                 <div class="alerts">
 '''
         for alert in alerts:
-            html += f'''
+            yield f'''
                     <div class="alert {alert.type}">
                         <div>
-                            <div class="alert-title">{alert.title}</div>
-                            <div>{alert.message}</div>
+                            <div class="alert-title">{alert.title.translate(_ESCAPE)}</div>
+                            <div>{alert.message.translate(_ESCAPE)}</div>
                         </div>
-                        {f'<div class="alert-value">{alert.value}</div>' if alert.value else ''}
+                        {f'<div class="alert-value">{alert.value.translate(_ESCAPE)}</div>' if alert.value else ''}
                     </div>
 '''
-        html += '''
+        yield '''
                 </div>
             </section>
 '''
     
     # === CHARTS ===
-    html += '''
+    yield '''
             <section id="charts">
                 <h2>📊 Wykresy</h2>
 '''
     
     if charts.get('revenue'):
-        html += f'''
+        yield f'''
                 <div class="chart-container">
-                    <img src="data:image/png;base64,{charts['revenue']}" alt="Przychody i Zysk">
+                    {embed_chart(charts['revenue'], 'Przychody i Zysk')}
                 </div>
 '''
     
     if charts.get('margins'):
-        html += f'''
+        yield f'''
                 <div class="chart-container">
-                    <img src="data:image/png;base64,{charts['margins']}" alt="Marże">
+                    {embed_chart(charts['margins'], 'Marże')}
                 </div>
 '''
     
     if charts.get('cash'):
-        html += f'''
+        yield f'''
                 <div class="chart-container">
-                    <img src="data:image/png;base64,{charts['cash']}" alt="Gotówka">
+                    {embed_chart(charts['cash'], 'Gotówka')}
                 </div>
 '''
     
     if charts.get('cashflow'):
-        html += f'''
+        yield f'''
                 <div class="chart-container">
-                    <img src="data:image/png;base64,{charts['cashflow']}" alt="Cash Flow">
+                    {embed_chart(charts['cashflow'], 'Cash Flow')}
                 </div>
 '''
     
     if charts.get('seasonality'):
-        html += f'''
+        yield f'''
                 <div class="chart-container">
-                    <img src="data:image/png;base64,{charts['seasonality']}" alt="Sezonowość">
+                    {embed_chart(charts['seasonality'], 'Sezonowość')}
                 </div>
 '''
     
-    html += '''
+    yield '''
             </section>
 '''
     
     # === DANE HISTORYCZNE ===
-    html += '''
+    yield '''
             <section id="historical">
                 <h2>📋 Dane Historyczne</h2>
 '''
     
     # Tabela przychodów i zysków
-    if data.revenue:
-        quarters = list(data.revenue.keys())[-8:]
-        html += '''
+    if not data.revenue.empty:
+        quarters, labels = tail_quarters(data.revenue, 8)
+        yield '''
                 <h3>Rachunek Zysków i Strat (tys. PLN)</h3>
                 <table>
                     <thead>
                         <tr>
                             <th>Pozycja</th>
 '''
-        for q in quarters:
-            html += f'<th>{q.split("(")[0].strip()}</th>'
+        yield ''.join(f'<th>{label}</th>' for label in labels)
         
-        html += '''
+        yield '''
                         </tr>
                     </thead>
                     <tbody>
@@ -1492,33 +2017,30 @@ def generate_html_report(data: FinancialData, metrics: Dict[str, Any],
             ('Zysk netto', data.net_profit),
         ]
         
+        # Cały wiersz jednym join (zamiast fragmentu per komórka)
         for row_name, row_data in rows:
-            html += f'<tr><td>{row_name}</td>'
-            for q in quarters:
-                val = row_data.get(q, 0)
-                cls = 'positive' if val > 0 else ('negative' if val < 0 else '')
-                html += f'<td class="{cls}">{val:,.0f}</td>'
-            html += '</tr>'
-        
-        html += '''
+            values = row_data.reindex(quarters, fill_value=0)
+            row_cells = ''.join(f'<td class="{value_class(val)}">{val:,.0f}</td>' for val in values)
+            yield f'<tr><td>{row_name}</td>{row_cells}</tr>'
+        
+        yield '''
                     </tbody>
                 </table>
 '''
     
     # Tabela bilansu
-    if data.cash:
-        quarters = list(data.cash.keys())[-8:]
-        html += '''
+    if not data.cash.empty:
+        quarters, labels = tail_quarters(data.cash, 8)
+        yield '''
                 <h3>Bilans - Wybrane Pozycje (tys. PLN)</h3>
                 <table>
                     <thead>
                         <tr>
                             <th>Pozycja</th>
 '''
-        for q in quarters:
-            html += f'<th>{q.split("(")[0].strip()}</th>'
+        yield ''.join(f'<th>{label}</th>' for label in labels)
         
-        html += '''
+        yield '''
                         </tr>
                     </thead>
                     <tbody>
@@ -1533,18 +2055,16 @@ def generate_html_report(data: FinancialData, metrics: Dict[str, Any],
         ]
         
         for row_name, row_data in rows:
-            html += f'<tr><td>{row_name}</td>'
-            for q in quarters:
-                val = row_data.get(q, 0)
-                html += f'<td>{val:,.0f}</td>'
-            html += '</tr>'
+            values = row_data.reindex(quarters, fill_value=0)
+            row_cells = ''.join(f'<td>{val:,.0f}</td>' for val in values)
+            yield f'<tr><td>{row_name}</td>{row_cells}</tr>'
         
-        html += '''
+        yield '''
                     </tbody>
                 </table>
 '''
     
-    html += '''
+    yield '''
             </section>
 '''
     
@@ -1559,14 +2079,14 @@ def generate_html_report(data: FinancialData, metrics: Dict[str, Any],
         )
         
         if has_context_content:
-            html += '''
+            yield '''
             <section id="context">
                 <h2>📋 Kontekst z Raportu Kwartalnego</h2>
 '''
             
             # Zatrudnienie
             if context.employees:
-                html += f'''
+                yield f'''
                 <div class="context-item">
                     <h3>👥 Zatrudnienie</h3>
                     <p><strong>{context.employees:.1f} FTE</strong></p>
@@ -1575,10 +2095,10 @@ def generate_html_report(data: FinancialData, metrics: Dict[str, Any],
             
             # Komentarz zarządu
             if context.management_comment:
-                comment_html = context.management_comment.replace('\n', '<br>')
+                comment_html = context.management_comment.translate(_ESCAPE).replace('\n', '<br>')
                 # Zamień punktory na listy
-                comment_html = re.sub(r'^- ', '• ', comment_html, flags=re.MULTILINE)
-                html += f'''
+                comment_html = BULLET_RE.sub('• ', comment_html)
+                yield f'''
                 <div class="context-item">
                     <h3>💬 Komentarz Zarządu</h3>
                     <p>{comment_html}</p>
@@ -1587,7 +2107,7 @@ def generate_html_report(data: FinancialData, metrics: Dict[str, Any],
             
             # Akcjonariat
             if context.shareholders:
-                html += '''
+                yield '''
                 <div class="context-item">
                     <h3>📊 Struktura Akcjonariatu</h3>
                     <table class="shareholders-table">
@@ -1602,14 +2122,14 @@ def generate_html_report(data: FinancialData, metrics: Dict[str, Any],
 '''
                 for sh in context.shareholders:
                     votes = f"{sh['votes']:.2f}%" if sh.get('votes') else '-'
-                    html += f'''
+                    yield f'''
                             <tr>
-                                <td>{sh['name']}</td>
+                                <td>{sh['name'].translate(_ESCAPE)}</td>
                                 <td>{sh['capital']:.2f}%</td>
                                 <td>{votes}</td>
                             </tr>
 '''
-                html += '''
+                yield '''
                         </tbody>
                     </table>
                 </div>
@@ -1617,9 +2137,9 @@ def generate_html_report(data: FinancialData, metrics: Dict[str, Any],
             
             # Innowacje / R&D
             if context.innovations:
-                innovations_html = context.innovations.replace('\n', '<br>')
-                innovations_html = re.sub(r'^- ', '• ', innovations_html, flags=re.MULTILINE)
-                html += f'''
+                innovations_html = context.innovations.translate(_ESCAPE).replace('\n', '<br>')
+                innovations_html = BULLET_RE.sub('• ', innovations_html)
+                yield f'''
                 <div class="context-item">
                     <h3>🔬 Innowacje / R&D</h3>
                     <p>{innovations_html}</p>
@@ -1628,42 +2148,43 @@ def generate_html_report(data: FinancialData, metrics: Dict[str, Any],
             
             # Ryzyka
             if context.risks:
-                risks_html = context.risks.replace('\n', '<br>')
-                risks_html = re.sub(r'^- ', '⚠️ ', risks_html, flags=re.MULTILINE)
-                html += f'''
+                risks_html = context.risks.translate(_ESCAPE).replace('\n', '<br>')
+                risks_html = BULLET_RE.sub('⚠️ ', risks_html)
+                yield f'''
                 <div class="context-item risks">
                     <h3>⚠️ Ryzyka i Uwagi</h3>
                     <p>{risks_html}</p>
                 </div>
 '''
             
-            html += '''
+            yield '''
             </section>
 '''
     
     # === ZAŁĄCZNIKI ===
     if attachments:
-        html += '''
+        yield '''
             <section id="attachments">
                 <h2>📎 Załączniki</h2>
                 <div class="attachments-list">
 '''
         for att in attachments:
             icon = '📄' if att.filetype == 'pdf' else '📝'
+            filename = att.filename.translate(_ESCAPE)
             # Link relatywny
-            html += f'''
-                    <a href="{att.filename}" class="attachment" target="_blank">
+            yield f'''
+                    <a href="{filename}" class="attachment" target="_blank">
                         <span class="attachment-icon">{icon}</span>
-                        <span>{att.description or att.filename}</span>
+                        <span>{att.description.translate(_ESCAPE) if att.description else filename}</span>
                     </a>
 '''
-        html += '''
+        yield '''
                 </div>
             </section>
 '''
     
     # === FOOTER ===
-    html += f'''
+    yield f'''
         </main>
         
         <footer>
@@ -1674,150 +2195,209 @@ def generate_html_report(data: FinancialData, metrics: Dict[str, Any],
 </body>
 </html>
 '''
-    
-    return html
+
 
 
 # =============================================================================
 # MAIN
 # =============================================================================
 
-def analyze_company(ticker: str) -> bool:
-    """Główna funkcja analizy spółki"""
+def render_charts(data: FinancialData, max_workers: Optional[int] = None, log=print) -> Dict[str, str]:
+    """
+    Renderuje wykresy równolegle w puli CHART_POOL (wątki lub procesy).
+    
+    Zapis PNG/zlib i część obliczeń numpy zwalniają GIL, więc wątki też
+    nakładają pracę; data jest w tym czasie tylko czytana. max_workers=1
+    renderuje w bieżącym wątku. Statusy drukowane są w stałej kolejności
+    CHART_JOBS, niezależnie od kolejności ukończenia, przez log (domyślnie print).
+    """
+    if max_workers is None:
+        max_workers = len(CHART_JOBS) if CHART_POOL == 'thread' else min(len(CHART_JOBS), os.cpu_count() or 1)
+    
+    charts, errors = {}, {}
+    if max_workers > 1:
+        pool_cls = ThreadPoolExecutor if CHART_POOL == 'thread' else ProcessPoolExecutor
+        with pool_cls(max_workers=max_workers) as executor:
+            futures = {executor.submit(func, data): key for key, func, _, _ in CHART_JOBS}
+            for future in as_completed(futures):
+                key = futures[future]
+                try:
+                    charts[key] = future.result()
+                except Exception as e:
+                    errors[key] = e
+    else:
+        for key, func, _, _ in CHART_JOBS:
+            try:
+                charts[key] = func(data)
+            except Exception as e:
+                errors[key] = e
+    
+    for key, _, label, error_label in CHART_JOBS:
+        if key in errors:
+            log(f"   ⚠️ Błąd wykresu {error_label}: {errors[key]}")
+        else:
+            log(f"   ✅ {label}")
+    
+    return {key: charts[key] for key, _, _, _ in CHART_JOBS if key in charts}
+
+
+def analyze_company(ticker: str, chart_workers: Optional[int] = None, verbose: bool = True) -> bool:
+    """Główna funkcja analizy spółki (verbose=False - bez komunikatów, dla trybu wsadowego)"""
+    _log = print if verbose else (lambda *args, **kwargs: None)
     ticker = ticker.upper()
     folder_path = os.path.join(RAPORTY_DIR, ticker.lower())
     
-    print(f"\n{'='*60}")
-    print(f"📊 ANALIZA: {ticker}")
-    print(f"{'='*60}")
+    _log(f"\n{'='*60}")
+    _log(f"📊 ANALIZA: {ticker}")
+    _log(f"{'='*60}")
     
     # Sprawdź czy folder istnieje
     if not os.path.exists(folder_path):
-        print(f"❌ Nie znaleziono folderu: {folder_path}")
-        print(f"   Utwórz folder raporty/{ticker.lower()}/ i dodaj pliki.")
+        _log(f"❌ Nie znaleziono folderu: {folder_path}")
+        _log(f"   Utwórz folder raporty/{ticker.lower()}/ i dodaj pliki.")
         return False
     
-    print(f"📁 Folder: {folder_path}")
+    _log(f"📁 Folder: {folder_path}")
     
-    # Wczytaj dane finansowe
-    print("\n📥 Wczytuję dane finansowe...")
-    data = load_financial_data(ticker, folder_path)
+    # Szukaj raportu PDF i pliku kontekstu
+    # (jedno przejście os.scandir zamiast dwóch glob; pliki 'ticker*' przed 'TICKER*')
+    prefixes = (ticker.lower(), ticker.upper())
+    with os.scandir(folder_path) as entries:
+        pdf_files = sorted(
+            (entry.path for entry in entries
+             if entry.name.startswith(prefixes) and entry.name.endswith('.pdf') and entry.is_file()),
+            key=lambda path: (not os.path.basename(path).startswith(prefixes[0]), path),
+        )
+    context_file = os.path.join(folder_path, f'{ticker.lower()}_kontekst.txt')
+    has_context = os.path.exists(context_file)
+    
+    # Wczytaj dane finansowe, raport PDF i kontekst - niezależne pliki, czytane
+    # równolegle; komunikaty drukujemy po zebraniu wyników w dotychczasowej kolejności
+    _log("\n📥 Wczytuję dane finansowe...")
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        data_future = executor.submit(load_financial_data, ticker, folder_path)
+        # Kontekst (mały plik tekstowy) najpierw - decyduje, ile czytać z PDF
+        context = parse_context_file(context_file) if has_context else None
+        # Gdy kontekst ma zatrudnienie, z PDF potrzebna jest już tylko data raportu
+        # (komentarz zarządu w raporcie pochodzi z kontekstu)
+        pdf_parser = parse_pdf_report_date if context and context.employees else parse_quarterly_pdf
+        pdf_future = executor.submit(pdf_parser, pdf_files[0]) if pdf_files else None
+        data = data_future.result()
+        pdf_data = pdf_future.result() if pdf_future else None
     
     if not data.quarters:
-        print("❌ Nie znaleziono danych finansowych")
-        print("   Upewnij się, że pliki bilans_*.txt, rzis_*.txt, przeplywy_*.txt są w folderze")
+        _log("❌ Nie znaleziono danych finansowych")
+        _log("   Upewnij się, że pliki bilans_*.txt, rzis_*.txt, przeplywy_*.txt są w folderze")
         return False
     
-    print(f"   ✅ Znaleziono {len(data.quarters)} kwartałów")
-    print(f"   📅 Zakres: {data.quarters[0]} - {data.quarters[-1]}")
-    
-    # Szukaj raportu PDF
-    pdf_files = glob.glob(os.path.join(folder_path, f'{ticker.lower()}*.pdf'))
-    pdf_files += glob.glob(os.path.join(folder_path, f'{ticker.upper()}*.pdf'))
+    _log(f"   ✅ Znaleziono {len(data.quarters)} kwartałów")
+    _log(f"   📅 Zakres: {data.quarters[0]} - {data.quarters[-1]}")
     
-    if pdf_files:
-        print(f"\n📄 Parsowanie raportu: {os.path.basename(pdf_files[0])}")
-        pdf_data = parse_quarterly_pdf(pdf_files[0])
+    # Raport PDF
+    if pdf_data is not None:
+        _log(f"\n📄 Parsowanie raportu: {os.path.basename(pdf_files[0])}")
         data.report_date = pdf_data.get('report_date')
         # Nie nadpisuj employees z PDF - kontekst jest lepszy
         if not data.employees:
             data.employees = pdf_data.get('employees')
         data.management_comment = pdf_data.get('management_comment')
     
-    # Wczytaj kontekst z pliku _kontekst.txt
-    context_file = os.path.join(folder_path, f'{ticker.lower()}_kontekst.txt')
-    context = None
-    
-    if os.path.exists(context_file):
-        print(f"\n📋 Wczytuję kontekst: {os.path.basename(context_file)}")
-        context = parse_context_file(context_file)
+    # Kontekst z pliku _kontekst.txt
+    if has_context:
+        _log(f"\n📋 Wczytuję kontekst: {os.path.basename(context_file)}")
         if context:
             if context.employees:
                 data.employees = context.employees
-                print(f"   ✅ Zatrudnienie: {context.employees} FTE")
+                _log(f"   ✅ Zatrudnienie: {context.employees} FTE")
             if context.shareholders:
-                print(f"   ✅ Akcjonariat: {len(context.shareholders)} akcjonariuszy")
+                _log(f"   ✅ Akcjonariat: {len(context.shareholders)} akcjonariuszy")
             if context.management_comment:
-                print(f"   ✅ Komentarz zarządu: {len(context.management_comment)} znaków")
+                _log(f"   ✅ Komentarz zarządu: {len(context.management_comment)} znaków")
             if context.innovations:
-                print(f"   ✅ Innowacje/R&D")
+                _log(f"   ✅ Innowacje/R&D")
             if context.risks:
-                print(f"   ✅ Ryzyka/Uwagi")
+                _log(f"   ✅ Ryzyka/Uwagi")
     else:
-        print(f"\n📋 Brak pliku kontekstu ({ticker.lower()}_kontekst.txt)")
-        print(f"   💡 Możesz go utworzyć ręcznie z informacjami z raportu kwartalnego")
+        _log(f"\n📋 Brak pliku kontekstu ({ticker.lower()}_kontekst.txt)")
+        _log(f"   💡 Możesz go utworzyć ręcznie z informacjami z raportu kwartalnego")
     
     # Oblicz metryki
-    print("\n📊 Obliczam metryki...")
+    _log("\n📊 Obliczam metryki...")
     metrics = calculate_metrics(data)
     
     for key, val in metrics.items():
         if isinstance(val, float):
-            print(f"   {key}: {val:,.2f}")
+            _log(f"   {key}: {val:,.2f}")
     
     # Generuj alerty
-    print("\n🚨 Generuję alerty...")
+    _log("\n🚨 Generuję alerty...")
     alerts = generate_alerts(data, metrics)
     for alert in alerts:
         icon = {'success': '✅', 'warning': '⚠️', 'danger': '❌', 'info': 'ℹ️'}.get(alert.type, '•')
-        print(f"   {icon} {alert.title}")
+        _log(f"   {icon} {alert.title}")
     
     # Znajdź załączniki
-    print("\n📎 Szukam załączników...")
+    _log("\n📎 Szukam załączników...")
     attachments = find_attachments(folder_path, ticker)
     for att in attachments:
-        print(f"   📄 {att.filename}")
+        _log(f"   📄 {att.filename}")
     
     # Generuj wykresy
-    print("\n📈 Generuję wykresy...")
-    charts = {}
-    
-    try:
-        charts['revenue'] = create_revenue_chart(data)
-        print("   ✅ Przychody i zysk")
-    except Exception as e:
-        print(f"   ⚠️ Błąd wykresu przychodów: {e}")
-    
-    try:
-        charts['margins'] = create_margins_chart(data)
-        print("   ✅ Marże")
-    except Exception as e:
-        print(f"   ⚠️ Błąd wykresu marż: {e}")
+    _log("\n📈 Generuję wykresy...")
+    charts = render_charts(data, chart_workers, log=_log)
     
-    try:
-        charts['cash'] = create_cash_chart(data)
-        print("   ✅ Gotówka")
-    except Exception as e:
-        print(f"   ⚠️ Błąd wykresu gotówki: {e}")
+    # Generuj HTML i zapisz strumieniowo - sekcja po sekcji, bufor 1 MiB
+    _log("\n📝 Generuję raport HTML...")
+    output_path = os.path.join(folder_path, f'{ticker.lower()}_raport_analityczny.html')
+    with open(output_path, 'w', encoding='utf-8', buffering=1 << 20) as f:
+        f.writelines(iter_html_report(data, metrics, alerts, attachments, charts, context))
     
-    try:
-        charts['cashflow'] = create_cashflow_chart(data)
-        print("   ✅ Cash Flow")
-    except Exception as e:
-        print(f"   ⚠️ Błąd wykresu cash flow: {e}")
+    _log(f"\n{'='*60}")
+    _log(f"✅ RAPORT ZAPISANY")
+    _log(f"{'='*60}")
+    _log(f"📄 {output_path}")
+    _log(f"\nOtwórz w przeglądarce, aby zobaczyć raport.")
     
+    return True
+
+
+def analyze_ticker(ticker: str) -> Optional[str]:
+    """Analiza jednej spółki (worker dla puli procesów) - zwraca ścieżkę raportu lub None"""
+    # Równoległość jest już na poziomie spółek - wykresy renderuj w procesie;
+    # bez komunikatów (procesy nie przeplatają wyjścia), jedna linia podsumowania.
+    # Wyjątek jednej spółki nie przerywa partii (executor.map zgłosiłby go dalej)
     try:
-        charts['seasonality'] = create_seasonality_chart(data)
-        print("   ✅ Sezonowość")
+        ok = analyze_company(ticker, chart_workers=1, verbose=False)
     except Exception as e:
-        print(f"   ⚠️ Błąd wykresu sezonowości: {e}")
-    
-    # Generuj HTML
-    print("\n📝 Generuję raport HTML...")
-    html = generate_html_report(data, metrics, alerts, attachments, charts, context)
-    
-    # Zapisz
-    output_path = os.path.join(folder_path, f'{ticker.lower()}_raport_analityczny.html')
-    with open(output_path, 'w', encoding='utf-8') as f:
-        f.write(html)
-    
-    print(f"\n{'='*60}")
-    print(f"✅ RAPORT ZAPISANY")
-    print(f"{'='*60}")
-    print(f"📄 {output_path}")
-    print(f"\nOtwórz w przeglądarce, aby zobaczyć raport.")
+        print(f"❌ {ticker}: {e}", flush=True)
+        return None
+    if not ok:
+        print(f"❌ {ticker}: analiza nie powiodła się", flush=True)
+        return None
+    output_path = os.path.join(RAPORTY_DIR, ticker.lower(), f'{ticker.lower()}_raport_analityczny.html')
+    print(f"✅ {ticker}: {output_path}", flush=True)
+    return output_path
+
+
+def analyze_many(tickers: List[str], max_workers: Optional[int] = None) -> Dict[str, Optional[str]]:
+    """
+    Analizuje wiele spółek równolegle (ProcessPoolExecutor).
     
-    return True
+    Każda spółka to niezależny folder, a backend Agg jest bezpieczny
+    dla procesów. Zwraca {ticker: ścieżka raportu lub None}.
+    """
+    tickers = [t.upper() for t in tickers]
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        # chunksize=1 - czas analizy spółek jest bardzo różny, bez paczkowania
+        paths = list(executor.map(analyze_ticker, tickers, chunksize=1))
+    return dict(zip(tickers, paths))
+
+
+def analyze_all(tickers: Optional[List[str]] = None) -> Dict[str, Optional[str]]:
+    """Analizuje wszystkie spółki z raporty/ (lub podane) - proces na rdzeń"""
+    if tickers is None:
+        tickers = list_available_companies()
+    return analyze_many(tickers, max_workers=os.cpu_count())
 
 
 def list_available_companies() -> List[str]:
@@ -1825,13 +2405,9 @@ def list_available_companies() -> List[str]:
     if not os.path.exists(RAPORTY_DIR):
         return []
     
-    companies = []
-    for item in os.listdir(RAPORTY_DIR):
-        folder = os.path.join(RAPORTY_DIR, item)
-        if os.path.isdir(folder):
-            companies.append(item.upper())
-    
-    return sorted(companies)
+    # DirEntry.is_dir() korzysta z danych readdir - bez stat per wpis
+    with os.scandir(RAPORTY_DIR) as entries:
+        return sorted(entry.name.upper() for entry in entries if entry.is_dir())
 
 
 def main():
@@ -1841,6 +2417,16 @@ def main():
 ╚══════════════════════════════════════════════════════════════╝
 """)
     
+    # Kilka tickerów lub --all - analiza równoległa
+    if len(sys.argv) > 2 or sys.argv[1:] == ['--all']:
+        results = analyze_all(None if sys.argv[1:] == ['--all'] else sys.argv[1:])
+        failed = [t for t, path in results.items() if path is None]
+        print(f"\n✅ Raporty: {len(results) - len(failed)}/{len(results)}")
+        if failed:
+            print(f"❌ Nie powiodło się: {', '.join(failed)}")
+            sys.exit(1)
+        return
+    
     # Sprawdź argumenty
     if len(sys.argv) > 1:
         ticker = sys.argv[1].upper()
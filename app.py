@@ -22,15 +22,20 @@ UŻYCIE:
 
 import os
 import sys
+import re
 import argparse
 import logging
 from datetime import datetime
 from typing import Dict, List, Optional, Tuple, Set
-from collections import defaultdict
+from types import SimpleNamespace
+from collections import Counter
 
+import numpy as np
 import pandas as pd
-from openpyxl import Workbook
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+from openpyxl import Workbook, load_workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, PatternFill, Alignment, Border, Side, NamedStyle
+from openpyxl.utils import get_column_letter
 from openpyxl.utils.dataframe import dataframe_to_rows
 
 # Ścieżki
@@ -67,6 +72,9 @@ FLAG_CATEGORIES = {
     'warning': ['!', '?']       # Ostrzeżenia
 }
 
+# Flagi w formacie [Q][G][V]
+FLAG_RE = re.compile(r'\[([A-Z!?]+)\]')
+
 # Odwrotne mapowanie: flaga -> kategoria
 FLAG_TO_CATEGORY = {}
 for cat, flags in FLAG_CATEGORIES.items():
@@ -85,6 +93,17 @@ CATEGORY_WEIGHTS = {
     'warning': -2.0  # Kara za ostrzeżenia
 }
 
+# Kategorie jako stały wektor (kolejność CATEGORY_WEIGHTS, 'warning' ostatnia):
+# flaga -> indeks kategorii, siła = liczności kategorii * wagi
+CATEGORIES = [cat for cat in CATEGORY_WEIGHTS if cat != 'warning'] + ['warning']
+CATEGORY_INDEX = {cat: i for i, cat in enumerate(CATEGORIES)}
+FLAG_TO_CAT_IDX = {f: CATEGORY_INDEX[cat] for f, cat in FLAG_TO_CATEGORY.items()}
+CATEGORY_WEIGHT_VEC = np.array([CATEGORY_WEIGHTS[cat] for cat in CATEGORIES])
+
+# Kolumny heatmapy - wszystkie możliwe flagi
+HEATMAP_FLAGS = ['Q', 'G', 'V', 'M', 'A', 'R', 'S', 'B', 'L', 'C', 'D', 'T', '!', '?']
+HEATMAP_FLAG_INDEX = {flag: i for i, flag in enumerate(HEATMAP_FLAGS)}
+
 # Mapowanie modeli na główne "tematy"
 MODEL_THEMES = {
     'Quality Growth': ['quality', 'growth'],
@@ -104,10 +123,21 @@ MODEL_THEMES = {
 class CompanySignals:
     """Agreguje sygnały dla pojedynczej spółki"""
     
+    # Stałe atrybuty (bez __dict__ per instancja); _stats_cache, _all_flags_cache
+    # i _unique_flags_cache - wartości liczone raz, czyszczone w add_appearance
+    __slots__ = ('ticker', 'rynek', 'appearances',
+                 '_stats_cache', '_all_flags_cache', '_unique_flags_cache')
+    
     def __init__(self, ticker: str):
         self.ticker = ticker
         self.rynek = None
         self.appearances: Dict[str, dict] = {}  # model_name -> {rank, score, flags}
+        self._clear_cache()
+    
+    def _clear_cache(self):
+        self._stats_cache = None
+        self._all_flags_cache = None
+        self._unique_flags_cache = None
         
     def add_appearance(self, model_name: str, rank: int, score: float, flags: str, rynek: str = None):
         """Dodaje wystąpienie w modelu"""
@@ -119,13 +149,14 @@ class CompanySignals:
         }
         if rynek and not self.rynek:
             self.rynek = rynek
+        self._clear_cache()
     
     def _parse_flags(self, flags_str: str) -> List[str]:
         """Parsuje flagi ze stringa [Q][G][V] -> ['Q', 'G', 'V']"""
-        if not flags_str or pd.isna(flags_str):
+        # NaN to jedyny float w kolumnie flag - bez pd.isna dla skalara
+        if not flags_str or isinstance(flags_str, float):
             return []
-        import re
-        return re.findall(r'\[([A-Z!?]+)\]', str(flags_str))
+        return FLAG_RE.findall(flags_str)
     
     @property
     def coverage(self) -> int:
@@ -133,101 +164,144 @@ class CompanySignals:
         return len(self.appearances)
     
     @property
-    def elite_score(self) -> int:
-        """Suma punktów za rankingi (TOP5=5, TOP10=3, TOP20=1)"""
-        total = 0
+    def _stats(self) -> SimpleNamespace:
+        """Składowe sygnału (liczone raz - patrz _compute_stats)"""
+        if self._stats_cache is None:
+            self._stats_cache = self._compute_stats()
+        return self._stats_cache
+    
+    def _compute_stats(self) -> SimpleNamespace:
+        """
+        Wszystkie składowe sygnału liczone w jednym przejściu po wystąpieniach.
+        
+        Koszyki rankingów, liczności flag, wektor siły kategorii, dominująca
+        kategoria i Signal Strength - czytane przez właściwości i metody poniżej.
+        """
+        top5 = top10 = top20 = 0
+        flag_counter = Counter()
         for app in self.appearances.values():
             rank = app['rank']
             if rank <= 5:
-                total += RANK_POINTS['top5']
+                top5 += 1
             elif rank <= 10:
-                total += RANK_POINTS['top10']
+                top10 += 1
             elif rank <= 20:
-                total += RANK_POINTS['top20']
-        return total
+                top20 += 1
+            flag_counter.update(app['flags_list'])
+        
+        # Siła kategorii: liczności w kolejności CATEGORIES * wagi
+        cat_counts = np.zeros(len(CATEGORIES))
+        for flag, count in flag_counter.items():
+            idx = FLAG_TO_CAT_IDX.get(flag)
+            if idx is not None:
+                cat_counts[idx] += count
+        strength = cat_counts * CATEGORY_WEIGHT_VEC
+        
+        # Dominująca kategoria - [:-1] bez 'warning' (ostatnia); remis - kolejność CATEGORIES
+        if cat_counts[:-1].any():
+            idx = int(strength[:-1].argmax())
+            dominant = (CATEGORIES[idx], float(strength[idx]))
+        else:
+            dominant = ('unknown', 0)
+        
+        coverage = len(self.appearances)
+        warning_count = flag_counter['!'] + flag_counter['?']
+        positive_flag_count = sum(flag_counter.values()) - warning_count
+        elite_score = (top5 * RANK_POINTS['top5'] + top10 * RANK_POINTS['top10']
+                       + top20 * RANK_POINTS['top20'])
+        
+        # Signal Strength: elite_score + flag_density + coverage_bonus - warnings
+        # Bonus za gęstość flag
+        flag_density = positive_flag_count / coverage if coverage else 0
+        flag_bonus = flag_density * 3
+        # Bonus za coverage (ale nie liniowy - diminishing returns)
+        coverage_bonus = min(coverage, 4) * 1.5
+        # Kara za ostrzeżenia
+        warning_penalty = warning_count * 2
+        # Bonus za spójność (wiele flag z tej samej kategorii)
+        consistency_bonus = min(dominant[1], 5) * 0.5
+        signal_strength = elite_score + flag_bonus + coverage_bonus - warning_penalty + consistency_bonus
+        
+        return SimpleNamespace(
+            elite_score=elite_score, top5_count=top5, top10_count=top5 + top10,
+            flag_counter=flag_counter, warning_count=warning_count,
+            positive_flag_count=positive_flag_count, flag_density=flag_density,
+            cat_counts=cat_counts, strength=strength, dominant=dominant,
+            signal_strength=signal_strength,
+        )
+    
+    @property
+    def elite_score(self) -> int:
+        """Suma punktów za rankingi (TOP5=5, TOP10=3, TOP20=1)"""
+        return self._stats.elite_score
     
     @property
     def top5_count(self) -> int:
         """Ile razy w TOP5"""
-        return sum(1 for app in self.appearances.values() if app['rank'] <= 5)
+        return self._stats.top5_count
     
     @property
     def top10_count(self) -> int:
         """Ile razy w TOP10"""
-        return sum(1 for app in self.appearances.values() if app['rank'] <= 10)
+        return self._stats.top10_count
     
     @property
     def all_flags(self) -> List[str]:
         """Wszystkie flagi ze wszystkich modeli"""
-        flags = []
-        for app in self.appearances.values():
-            flags.extend(app['flags_list'])
-        return flags
+        if self._all_flags_cache is None:
+            flags = []
+            for app in self.appearances.values():
+                flags.extend(app['flags_list'])
+            self._all_flags_cache = flags
+        return self._all_flags_cache
     
     @property
     def unique_flags(self) -> Set[str]:
         """Unikalne flagi"""
-        return set(self.all_flags)
+        if self._unique_flags_cache is None:
+            self._unique_flags_cache = set(self._stats.flag_counter)
+        return self._unique_flags_cache
+    
+    @property
+    def flag_counter(self) -> Counter:
+        """Liczność każdej flagi ze wszystkich modeli"""
+        return self._stats.flag_counter
     
     @property
     def warning_count(self) -> int:
         """Ile flag ostrzegawczych"""
-        return sum(1 for f in self.all_flags if f in ['!', '?'])
+        return self._stats.warning_count
     
     @property
     def positive_flag_count(self) -> int:
         """Ile pozytywnych flag (bez ostrzeżeń)"""
-        return sum(1 for f in self.all_flags if f not in ['!', '?'])
+        return self._stats.positive_flag_count
     
     def get_flag_density(self) -> float:
         """Średnia liczba pozytywnych flag na model"""
-        if self.coverage == 0:
-            return 0
-        return self.positive_flag_count / self.coverage
+        return self._stats.flag_density
+    
+    @property
+    def category_strength_vector(self) -> np.ndarray:
+        """Siła kategorii jako wektor w kolejności CATEGORIES"""
+        return self._stats.strength
     
     def get_category_strength(self) -> Dict[str, float]:
         """Siła w każdej kategorii (ile flag z tej kategorii)"""
-        strength = defaultdict(float)
-        for flag in self.all_flags:
-            if flag in FLAG_TO_CATEGORY:
-                cat = FLAG_TO_CATEGORY[flag]
-                strength[cat] += CATEGORY_WEIGHTS.get(cat, 1.0)
-        return dict(strength)
+        # Nowy słownik przy każdym wywołaniu - wywołujący modyfikują wynik (pop 'warning')
+        stats = self._stats
+        return {CATEGORIES[i]: float(stats.strength[i]) for i in np.flatnonzero(stats.cat_counts)}
     
     def get_dominant_category(self) -> Tuple[str, float]:
-        """Dominująca kategoria (najsilniejsza)"""
-        strength = self.get_category_strength()
-        if not strength:
-            return ('unknown', 0)
-        # Usuń warning z rozważań
-        strength.pop('warning', None)
-        if not strength:
-            return ('unknown', 0)
-        dominant = max(strength.items(), key=lambda x: x[1])
-        return dominant
+        """Dominująca kategoria (najsilniejsza, bez warning)"""
+        return self._stats.dominant
     
     def calculate_signal_strength(self) -> float:
         """
         Główna metryka - Signal Strength
         Kombinacja: elite_score + flag_density + coverage_bonus - warnings
         """
-        # Bazowy score z rankingów
-        base = self.elite_score
-        
-        # Bonus za gęstość flag
-        flag_bonus = self.get_flag_density() * 3
-        
-        # Bonus za coverage (ale nie liniowy - diminishing returns)
-        coverage_bonus = min(self.coverage, 4) * 1.5
-        
-        # Kara za ostrzeżenia
-        warning_penalty = self.warning_count * 2
-        
-        # Bonus za spójność (wiele flag z tej samej kategorii)
-        dominant_cat, dominant_strength = self.get_dominant_category()
-        consistency_bonus = min(dominant_strength, 5) * 0.5
-        
-        return base + flag_bonus + coverage_bonus - warning_penalty + consistency_bonus
+        return self._stats.signal_strength
     
     def generate_thesis(self) -> str:
         """Generuje investment thesis dla spółki"""
@@ -322,16 +396,26 @@ def load_results() -> Dict[str, pd.DataFrame]:
         return {}
     
     logger.info(f"📂 Wczytuję: {LATEST_FILE}")
-    xl = pd.ExcelFile(LATEST_FILE)
+    # Tryb read_only - wiersze strumieniowo, bez budowania drzewa komórek
+    wb = load_workbook(LATEST_FILE, read_only=True, data_only=True)
     
     results = {}
-    for sheet in xl.sheet_names:
-        if sheet == "PODSUMOWANIE":
-            continue
-        df = pd.read_excel(xl, sheet_name=sheet)
-        if 'Ticker' in df.columns and 'Rank' in df.columns:
+    try:
+        for ws in wb.worksheets:
+            sheet = ws.title
+            if sheet == "PODSUMOWANIE":
+                continue
+            rows = ws.iter_rows(values_only=True)
+            header = next(rows, None)
+            if not header or 'Ticker' not in header or 'Rank' not in header:
+                continue
+            # Puste wiersze (np. zawyżony wymiar arkusza) pomijamy
+            df = pd.DataFrame([row for row in rows if any(v is not None for v in row)],
+                              columns=header)
             results[sheet] = df
             logger.info(f"   ✅ {sheet}: {len(df)} spółek")
+    finally:
+        wb.close()
     
     return results
 
@@ -339,82 +423,120 @@ def load_results() -> Dict[str, pd.DataFrame]:
 def aggregate_signals(results: Dict[str, pd.DataFrame]) -> Dict[str, CompanySignals]:
     """Agreguje sygnały ze wszystkich modeli"""
     companies: Dict[str, CompanySignals] = {}
+    if not results:
+        return companies
     
+    # Jeden DataFrame ze wszystkich arkuszy (kolumnowo, zamiast iterrows per arkusz)
+    frames = []
     for model_name, df in results.items():
-        for _, row in df.iterrows():
-            ticker = row.get('Ticker')
-            if not ticker or pd.isna(ticker):
-                continue
-            
-            if ticker not in companies:
-                companies[ticker] = CompanySignals(ticker)
-            
-            companies[ticker].add_appearance(
-                model_name=model_name,
-                rank=int(row.get('Rank', 999)),
-                score=float(row.get('Total', 0)),
-                flags=str(row.get('Flags', '')),
-                rynek=row.get('Rynek')
-            )
+        frames.append(pd.DataFrame({
+            'Model': model_name,
+            'Ticker': df['Ticker'],
+            'Rank': df['Rank'] if 'Rank' in df.columns else 999,
+            'Total': df['Total'] if 'Total' in df.columns else 0,
+            'Flags': [str(f) for f in df['Flags'].tolist()] if 'Flags' in df.columns else '',
+            'Rynek': df['Rynek'] if 'Rynek' in df.columns else None,
+        }))
+    all_df = pd.concat(frames, ignore_index=True)
+    all_df = all_df[all_df['Ticker'].notna() & (all_df['Ticker'] != '')]
+    
+    ranks = all_df['Rank'].astype(int).tolist()
+    scores = all_df['Total'].astype(float).tolist()
+    rows = zip(all_df['Model'].tolist(), all_df['Ticker'].tolist(), ranks, scores,
+               all_df['Flags'].tolist(), all_df['Rynek'].tolist())
+    
+    for model_name, ticker, rank, score, flags, rynek in rows:
+        if ticker not in companies:
+            companies[ticker] = CompanySignals(ticker)
+        
+        companies[ticker].add_appearance(
+            model_name=model_name,
+            rank=rank,
+            score=score,
+            flags=flags,
+            rynek=rynek
+        )
     
     return companies
 
 
-def create_consensus_df(companies: Dict[str, CompanySignals]) -> pd.DataFrame:
+def signal_strengths(companies: Dict[str, CompanySignals]) -> Dict[str, float]:
+    """Signal Strength każdej spółki - liczony raz, współdzielony przez rankingi"""
+    return {ticker: signals.calculate_signal_strength() for ticker, signals in companies.items()}
+
+
+def rank_by_strength(strengths: Dict[str, float]) -> List[str]:
+    """Tickery malejąco po Signal Strength (stabilnie - remisy w kolejności spółek)"""
+    tickers = list(strengths.keys())
+    values = np.fromiter(strengths.values(), dtype=np.float64, count=len(tickers))
+    return [tickers[i] for i in np.argsort(-values, kind='stable')]
+
+
+def create_consensus_df(companies: Dict[str, CompanySignals],
+                        strengths: Optional[Dict[str, float]] = None) -> pd.DataFrame:
     """Tworzy DataFrame z consensus rankingiem"""
-    rows = []
+    if strengths is None:
+        strengths = signal_strengths(companies)
+    # Stałe kolumny - listy wypełniane w jednym przejściu, bez słownika per wiersz
+    columns = {name: [] for name in (
+        'Ticker', 'Rynek', 'Signal_Strength', 'Coverage', 'Elite_Score', 'TOP5_Count',
+        'TOP10_Count', 'Positive_Flags', 'Warnings', 'Unique_Flags', 'Investment_Thesis', 'Models')}
     
     for ticker, signals in companies.items():
-        rows.append({
-            'Ticker': ticker,
-            'Rynek': signals.rynek or '',
-            'Signal_Strength': round(signals.calculate_signal_strength(), 1),
-            'Coverage': f"{signals.coverage}/{len(MODEL_THEMES)}",
-            'Elite_Score': signals.elite_score,
-            'TOP5_Count': signals.top5_count,
-            'TOP10_Count': signals.top10_count,
-            'Positive_Flags': signals.positive_flag_count,
-            'Warnings': signals.warning_count,
-            'Unique_Flags': ''.join(f'[{f}]' for f in sorted(signals.unique_flags)),
-            'Investment_Thesis': signals.generate_thesis(),
-            'Models': signals.get_models_summary()
-        })
-    
-    df = pd.DataFrame(rows)
-    df = df.sort_values('Signal_Strength', ascending=False).reset_index(drop=True)
+        columns['Ticker'].append(ticker)
+        columns['Rynek'].append(signals.rynek or '')
+        columns['Signal_Strength'].append(round(strengths[ticker], 1))
+        columns['Coverage'].append(f"{signals.coverage}/{len(MODEL_THEMES)}")
+        columns['Elite_Score'].append(signals.elite_score)
+        columns['TOP5_Count'].append(signals.top5_count)
+        columns['TOP10_Count'].append(signals.top10_count)
+        columns['Positive_Flags'].append(signals.positive_flag_count)
+        columns['Warnings'].append(signals.warning_count)
+        columns['Unique_Flags'].append(''.join(f'[{f}]' for f in sorted(signals.unique_flags)))
+        columns['Investment_Thesis'].append(signals.generate_thesis())
+        columns['Models'].append(signals.get_models_summary())
+    
+    # Malejąco po Signal_Strength - argsort odwróconej tablicy, jak sort_values(ascending=False)
+    # (ta sama kolejność remisów co dotąd)
+    strength_arr = np.asarray(columns['Signal_Strength'], dtype=float)
+    order = (len(strength_arr) - 1 - strength_arr[::-1].argsort())[::-1]
+    df = pd.DataFrame(columns).take(order).reset_index(drop=True)
     df.insert(0, 'Rank', range(1, len(df) + 1))
     
     return df
 
 
-def create_flag_heatmap(companies: Dict[str, CompanySignals], top_n: int = 30) -> pd.DataFrame:
+def create_flag_heatmap(companies: Dict[str, CompanySignals], top_n: int = 30,
+                        strengths: Optional[Dict[str, float]] = None,
+                        ranking: Optional[List[str]] = None) -> pd.DataFrame:
     """Tworzy heatmapę flag dla TOP N spółek"""
-    # Sortuj po signal strength
-    sorted_companies = sorted(
-        companies.values(),
-        key=lambda x: x.calculate_signal_strength(),
-        reverse=True
-    )[:top_n]
-    
-    # Wszystkie możliwe flagi
-    all_flags = ['Q', 'G', 'V', 'M', 'A', 'R', 'S', 'B', 'L', 'C', 'D', 'T', '!', '?']
-    
-    rows = []
-    for signals in sorted_companies:
-        row = {'Ticker': signals.ticker}
-        flag_counts = defaultdict(int)
-        for f in signals.all_flags:
-            flag_counts[f] += 1
-        for flag in all_flags:
-            row[f'[{flag}]'] = flag_counts.get(flag, 0)
-        row['Total_Flags'] = signals.positive_flag_count
-        rows.append(row)
-    
-    return pd.DataFrame(rows)
+    # Kolejność po signal strength (ranking z main lub liczony tutaj)
+    if ranking is None:
+        ranking = rank_by_strength(strengths if strengths is not None else signal_strengths(companies))
+    sorted_companies = [companies[ticker] for ticker in ranking[:top_n]]
+    
+    if not sorted_companies:
+        return pd.DataFrame()
+    
+    # Macierz (spółki x flagi) wypełniana z liczników flag
+    counts = np.zeros((len(sorted_companies), len(HEATMAP_FLAGS)), dtype=np.int64)
+    for row, signals in enumerate(sorted_companies):
+        for flag, count in signals.flag_counter.items():
+            col = HEATMAP_FLAG_INDEX.get(flag)
+            if col is not None:
+                counts[row, col] = count
+    
+    df = pd.DataFrame(counts, columns=[f'[{flag}]' for flag in HEATMAP_FLAGS])
+    df.insert(0, 'Ticker', [signals.ticker for signals in sorted_companies])
+    df['Total_Flags'] = [signals.positive_flag_count for signals in sorted_companies]
+    return df
 
 
-def create_best_of(companies: Dict[str, CompanySignals]) -> pd.DataFrame:
+def create_best_of(companies: Dict[str, CompanySignals],
+                   strengths: Optional[Dict[str, float]] = None) -> pd.DataFrame:
     """Tworzy ranking best-of w kategoriach"""
+    if strengths is None:
+        strengths = signal_strengths(companies)
     categories = {
         'QUALITY': ['quality'],
         'GROWTH': ['growth'],
@@ -426,56 +548,63 @@ def create_best_of(companies: Dict[str, CompanySignals]) -> pd.DataFrame:
     }
     
     rows = []
+    if not companies:
+        return pd.DataFrame(rows)
+    
+    # Macierz siły (spółki x CATEGORIES) - jeden odczyt na spółkę
+    tickers = list(companies.keys())
+    strength_matrix = np.vstack([signals.category_strength_vector for signals in companies.values()])
+    
     for cat_name, cat_flags in categories.items():
         # Znajdź spółki z najsilniejszymi flagami w tej kategorii
-        cat_scores = []
-        for ticker, signals in companies.items():
-            strength = signals.get_category_strength()
-            cat_score = sum(strength.get(cf, 0) for cf in cat_flags)
-            if cat_score > 0:
-                cat_scores.append((ticker, cat_score, signals))
+        cat_scores = strength_matrix[:, [CATEGORY_INDEX[cf] for cf in cat_flags]].sum(axis=1)
         
-        # TOP 3 w kategorii
-        cat_scores.sort(key=lambda x: -x[1])
-        for i, (ticker, score, signals) in enumerate(cat_scores[:3], 1):
+        # TOP 3 w kategorii (sortowanie stabilne - remisy w kolejności spółek)
+        top = np.argsort(-cat_scores, kind='stable')[:3]
+        top = top[cat_scores[top] > 0]
+        for i, idx in enumerate(top, 1):
+            ticker = tickers[idx]
+            score = float(cat_scores[idx])
+            signals = companies[ticker]
             rows.append({
                 'Category': cat_name,
                 'Rank': i,
                 'Ticker': ticker,
                 'Category_Score': round(score, 1),
-                'Signal_Strength': round(signals.calculate_signal_strength(), 1),
+                'Signal_Strength': round(strengths[ticker], 1),
                 'Flags': ''.join(f'[{f}]' for f in sorted(signals.unique_flags))
             })
     
     return pd.DataFrame(rows)
 
 
-def create_profiles(companies: Dict[str, CompanySignals], results: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+def create_profiles(companies: Dict[str, CompanySignals], results: Dict[str, pd.DataFrame],
+                    strengths: Optional[Dict[str, float]] = None,
+                    ranking: Optional[List[str]] = None) -> pd.DataFrame:
     """Tworzy szczegółowe profile spółek"""
-    rows = []
+    if strengths is None:
+        strengths = signal_strengths(companies)
+    columns = {name: [] for name in (
+        'Ticker', 'Model', 'Rank_in_Model', 'Score_in_Model', 'Flags_in_Model', 'Signal_Strength')}
     
-    # Sortuj po signal strength
-    sorted_tickers = sorted(
-        companies.keys(),
-        key=lambda t: companies[t].calculate_signal_strength(),
-        reverse=True
-    )
+    # Kolejność po signal strength (ranking z main lub liczony tutaj)
+    if ranking is None:
+        ranking = rank_by_strength(strengths)
     
-    for ticker in sorted_tickers:
+    for ticker in ranking:
         signals = companies[ticker]
+        strength = round(strengths[ticker], 1)
         
         # Szczegóły z każdego modelu
         for model_name, app_data in signals.appearances.items():
-            rows.append({
-                'Ticker': ticker,
-                'Model': model_name,
-                'Rank_in_Model': app_data['rank'],
-                'Score_in_Model': round(app_data['score'], 1),
-                'Flags_in_Model': app_data['flags'],
-                'Signal_Strength': round(signals.calculate_signal_strength(), 1)
-            })
+            columns['Ticker'].append(ticker)
+            columns['Model'].append(model_name)
+            columns['Rank_in_Model'].append(app_data['rank'])
+            columns['Score_in_Model'].append(round(app_data['score'], 1))
+            columns['Flags_in_Model'].append(app_data['flags'])
+            columns['Signal_Strength'].append(strength)
     
-    return pd.DataFrame(rows)
+    return pd.DataFrame(columns)
 
 
 def save_excel(consensus_df: pd.DataFrame, heatmap_df: pd.DataFrame,
@@ -484,7 +613,9 @@ def save_excel(consensus_df: pd.DataFrame, heatmap_df: pd.DataFrame,
     """Zapisuje wyniki do Excel"""
     logger.info(f"\n📊 Zapisuję: {output_path}")
     
-    wb = Workbook()
+    # Tryb write_only - wiersze zapisywane strumieniowo, style nadawane przy zapisie
+    # (szerokości kolumn ustawiamy przed pierwszym wierszem arkusza)
+    wb = Workbook(write_only=True)
     
     # Style
     header_fill = PatternFill(start_color="1F4E79", end_color="1F4E79", fill_type="solid")
@@ -496,76 +627,103 @@ def save_excel(consensus_df: pd.DataFrame, heatmap_df: pd.DataFrame,
         left=Side(style='thin'), right=Side(style='thin'),
         top=Side(style='thin'), bottom=Side(style='thin')
     )
-    
-    def style_sheet(ws, df, highlight_top=True):
-        """Stylizuje arkusz"""
-        # Nagłówki
-        for col_idx, col_name in enumerate(df.columns, 1):
-            cell = ws.cell(row=1, column=col_idx, value=col_name)
+    center_alignment = Alignment(horizontal='center')
+    # Heatmapa flag - wspólne obiekty stylów dla wszystkich komórek
+    heat_high_fill = PatternFill(start_color="00B050", end_color="00B050", fill_type="solid")
+    heat_mid_fill = PatternFill(start_color="92D050", end_color="92D050", fill_type="solid")
+    heat_low_fill = PatternFill(start_color="C6EFCE", end_color="C6EFCE", fill_type="solid")
+    white_bold_font = Font(color="FFFFFF", bold=True)
+    
+    def header_row(ws, columns):
+        """Wiersz nagłówków"""
+        cells = []
+        for col_name in columns:
+            cell = WriteOnlyCell(ws, value=col_name)
             cell.fill = header_fill
             cell.font = header_font
-            cell.alignment = Alignment(horizontal='center')
+            cell.alignment = center_alignment
             cell.border = thin_border
+            cells.append(cell)
+        return cells
+    
+    def data_rows(ws, df, highlight_top=True, style_cell=None):
+        """Wiersze danych z kolorowaniem TOP i ostrzeżeń (krotki z itertuples)"""
+        columns = list(df.columns)
+        rank_pos = columns.index('Rank') if highlight_top and 'Rank' in columns else None
+        for row_values in df.itertuples(index=False, name=None):
+            yield data_row(ws, row_values, columns, rank_pos, style_cell)
+    
+    def data_row(ws, row_values, columns, rank_pos=None, style_cell=None):
+        """Wiersz danych z kolorowaniem TOP i ostrzeżeń"""
+        rank_fill = None
+        if rank_pos is not None:
+            rank = row_values[rank_pos]
+            if rank <= 3:
+                rank_fill = top3_fill
+            elif rank <= 10:
+                rank_fill = top10_fill
         
-        # Dane
-        for row_idx, row_data in df.iterrows():
-            excel_row = row_idx + 2
-            for col_idx, col_name in enumerate(df.columns, 1):
-                value = row_data[col_name]
-                cell = ws.cell(row=excel_row, column=col_idx, value=value)
-                cell.border = thin_border
-                
-                # Kolorowanie
-                if highlight_top and 'Rank' in df.columns:
-                    rank = row_data.get('Rank', 999)
-                    if rank <= 3:
-                        cell.fill = top3_fill
-                    elif rank <= 10:
-                        cell.fill = top10_fill
-                
-                # Warning highlighting
-                if col_name == 'Warnings' and value > 0:
-                    cell.fill = warning_fill
-        
-        # Auto-width
-        for col_idx, col_name in enumerate(df.columns, 1):
-            max_len = max(len(str(col_name)), df[col_name].astype(str).str.len().max())
-            ws.column_dimensions[ws.cell(row=1, column=col_idx).column_letter].width = min(max_len + 2, 50)
-    
-    # === ARKUSZ 1: CONSENSUS ===
-    ws_consensus = wb.active
-    ws_consensus.title = "CONSENSUS"
-    
-    # Tytuł
-    ws_consensus['A1'] = "GPW SCREENER - Consensus Ranking"
-    ws_consensus['A1'].font = Font(bold=True, size=16)
-    ws_consensus.merge_cells('A1:F1')
-    ws_consensus['A2'] = f"Wygenerowano: {datetime.now().strftime('%Y-%m-%d %H:%M')}"
-    ws_consensus['A2'].font = Font(italic=True, color="666666")
-    
-    # Dane od wiersza 4
-    for col_idx, col_name in enumerate(consensus_df.columns, 1):
-        cell = ws_consensus.cell(row=4, column=col_idx, value=col_name)
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = Alignment(horizontal='center')
-        cell.border = thin_border
-    
-    for row_idx, row_data in consensus_df.iterrows():
-        excel_row = row_idx + 5
-        for col_idx, col_name in enumerate(consensus_df.columns, 1):
-            value = row_data[col_name]
-            cell = ws_consensus.cell(row=excel_row, column=col_idx, value=value)
+        cells = []
+        for col_idx, (col_name, value) in enumerate(zip(columns, row_values), 1):
+            cell = WriteOnlyCell(ws, value=value)
             cell.border = thin_border
             
-            rank = row_data.get('Rank', 999)
-            if rank <= 3:
-                cell.fill = top3_fill
-            elif rank <= 10:
-                cell.fill = top10_fill
+            # Kolorowanie
+            if rank_fill is not None:
+                cell.fill = rank_fill
             
+            # Warning highlighting
             if col_name == 'Warnings' and value > 0:
                 cell.fill = warning_fill
+            
+            if style_cell is not None:
+                style_cell(cell, col_idx, row_values)
+            cells.append(cell)
+        return cells
+    
+    def auto_width(ws, df):
+        """Auto-width - szerokości wszystkich kolumn liczone raz, przed zapisem wierszy"""
+        for col_idx, col_name in enumerate(df.columns, 1):
+            # Najdłuższa wartość - generator po tablicy, bez pośredniej Series stringów
+            max_len = max((len(str(x)) for x in df[col_name].to_numpy()), default=0)
+            max_len = max(len(str(col_name)), max_len)
+            ws.column_dimensions[get_column_letter(col_idx)].width = min(max_len + 2, 50)
+    
+    def style_sheet(ws, df, highlight_top=True, style_cell=None):
+        """Stylizuje arkusz (style_cell - dodatkowe formatowanie komórki danych)"""
+        auto_width(ws, df)
+        
+        # Nagłówki
+        ws.append(header_row(ws, df.columns))
+        
+        # Dane
+        for cells in data_rows(ws, df, highlight_top, style_cell):
+            ws.append(cells)
+    
+    def write_large_sheet(ws, df):
+        """
+        Duży arkusz bez kolorowania (PROFILES: spółki x modele) - wiersze
+        strumieniowo, każda komórka tylko z obramowaniem.
+        
+        Obramowanie jako styl nazwany, rejestrowany w skoroszycie raz - komórki
+        danych dostają go po nazwie, bez wyszukiwania obramowania przy każdym przypisaniu.
+        """
+        auto_width(ws, df)
+        ws.append(header_row(ws, df.columns))
+        
+        if 'profiles_cell' not in wb.named_styles:
+            wb.add_named_style(NamedStyle(name='profiles_cell', border=thin_border))
+        
+        def bordered(value):
+            cell = WriteOnlyCell(ws, value=value)
+            cell.style = 'profiles_cell'
+            return cell
+        
+        for row_values in df.itertuples(index=False, name=None):
+            ws.append([bordered(value) for value in row_values])
+    
+    # === ARKUSZ 1: CONSENSUS ===
+    ws_consensus = wb.create_sheet("CONSENSUS")
     
     # Szerokości kolumn
     col_widths = {'Rank': 6, 'Ticker': 10, 'Rynek': 8, 'Signal_Strength': 14, 
@@ -573,29 +731,43 @@ def save_excel(consensus_df: pd.DataFrame, heatmap_df: pd.DataFrame,
                   'Positive_Flags': 13, 'Warnings': 10, 'Unique_Flags': 20,
                   'Investment_Thesis': 50, 'Models': 60}
     for col_idx, col_name in enumerate(consensus_df.columns, 1):
-        ws_consensus.column_dimensions[ws_consensus.cell(row=4, column=col_idx).column_letter].width = col_widths.get(col_name, 12)
+        ws_consensus.column_dimensions[get_column_letter(col_idx)].width = col_widths.get(col_name, 12)
+    
+    # Tytuł
+    title_cell = WriteOnlyCell(ws_consensus, value="GPW SCREENER - Consensus Ranking")
+    title_cell.font = Font(bold=True, size=16)
+    ws_consensus.append([title_cell])
+    ws_consensus.merged_cells.add('A1:F1')
+    date_cell = WriteOnlyCell(ws_consensus, value=f"Wygenerowano: {datetime.now().strftime('%Y-%m-%d %H:%M')}")
+    date_cell.font = Font(italic=True, color="666666")
+    ws_consensus.append([date_cell])
+    ws_consensus.append([])
+    
+    # Dane od wiersza 4
+    ws_consensus.append(header_row(ws_consensus, consensus_df.columns))
+    for cells in data_rows(ws_consensus, consensus_df):
+        ws_consensus.append(cells)
     
     # === ARKUSZ 2: FLAG HEATMAP ===
     ws_heatmap = wb.create_sheet("FLAG_HEATMAP")
-    style_sheet(ws_heatmap, heatmap_df, highlight_top=False)
-    
-    # Koloruj komórki z flagami
-    for row_idx in range(len(heatmap_df)):
-        excel_row = row_idx + 2
-        for col_idx in range(2, len(heatmap_df.columns)):  # Pomiń Ticker
-            cell = ws_heatmap.cell(row=excel_row, column=col_idx)
-            if cell.value and cell.value > 0:
-                if cell.value >= 3:
-                    cell.fill = PatternFill(start_color="00B050", end_color="00B050", fill_type="solid")
-                    cell.font = Font(color="FFFFFF", bold=True)
-                elif cell.value >= 2:
-                    cell.fill = PatternFill(start_color="92D050", end_color="92D050", fill_type="solid")
-                else:
-                    cell.fill = PatternFill(start_color="C6EFCE", end_color="C6EFCE", fill_type="solid")
+    
+    # Koloruj komórki z flagami (pomiń Ticker i Total_Flags)
+    last_flag_col = len(heatmap_df.columns) - 1
+    
+    def style_heat_cell(cell, col_idx, row_values):
+        if 2 <= col_idx <= last_flag_col and cell.value and cell.value > 0:
+            if cell.value >= 3:
+                cell.fill = heat_high_fill
+                cell.font = white_bold_font
+            elif cell.value >= 2:
+                cell.fill = heat_mid_fill
+            else:
+                cell.fill = heat_low_fill
+    
+    style_sheet(ws_heatmap, heatmap_df, highlight_top=False, style_cell=style_heat_cell)
     
     # === ARKUSZ 3: BEST OF ===
     ws_bestof = wb.create_sheet("BEST_OF")
-    style_sheet(ws_bestof, best_of_df, highlight_top=False)
     
     # Koloruj kategorie
     category_colors = {
@@ -607,17 +779,22 @@ def save_excel(consensus_df: pd.DataFrame, heatmap_df: pd.DataFrame,
         'CASH': "FFC000",
         'TURNAROUND': "FF0000"
     }
-    for row_idx, row_data in best_of_df.iterrows():
-        excel_row = row_idx + 2
-        cat = row_data.get('Category')
-        if cat in category_colors:
-            cell = ws_bestof.cell(row=excel_row, column=1)
-            cell.fill = PatternFill(start_color=category_colors[cat], end_color=category_colors[cat], fill_type="solid")
-            cell.font = Font(color="FFFFFF", bold=True)
+    category_fills = {cat: PatternFill(start_color=color, end_color=color, fill_type="solid")
+                      for cat, color in category_colors.items()}
+    
+    category_pos = list(best_of_df.columns).index('Category') if 'Category' in best_of_df.columns else None
+    
+    def style_category_cell(cell, col_idx, row_values):
+        cat = row_values[category_pos] if category_pos is not None else None
+        if col_idx == 1 and cat in category_fills:
+            cell.fill = category_fills[cat]
+            cell.font = white_bold_font
+    
+    style_sheet(ws_bestof, best_of_df, highlight_top=False, style_cell=style_category_cell)
     
     # === ARKUSZ 4: PROFILES ===
     ws_profiles = wb.create_sheet("PROFILES")
-    style_sheet(ws_profiles, profiles_df, highlight_top=False)
+    write_large_sheet(ws_profiles, profiles_df)
     
     # Zapisz
     wb.save(output_path)
@@ -632,10 +809,10 @@ def print_top_consensus(consensus_df: pd.DataFrame, n: int = 10):
     print(f"{'Rank':<5} {'Ticker':<8} {'Signal':<8} {'Cover':<8} {'Elite':<7} {'Thesis'}")
     print("-" * 80)
     
-    for _, row in consensus_df.head(n).iterrows():
-        thesis = row['Investment_Thesis'][:40] + "..." if len(row['Investment_Thesis']) > 40 else row['Investment_Thesis']
-        print(f"{row['Rank']:<5} {row['Ticker']:<8} {row['Signal_Strength']:<8} {row['Coverage']:<8} "
-              f"{row['Elite_Score']:<7} {thesis}")
+    for row in consensus_df.head(n).itertuples(index=False):
+        thesis = row.Investment_Thesis[:40] + "..." if len(row.Investment_Thesis) > 40 else row.Investment_Thesis
+        print(f"{row.Rank:<5} {row.Ticker:<8} {row.Signal_Strength:<8} {row.Coverage:<8} "
+              f"{row.Elite_Score:<7} {thesis}")
 
 
 def print_ticker_details(companies: Dict[str, CompanySignals], ticker: str):
@@ -722,10 +899,12 @@ def main():
     
     # Twórz DataFrames
     logger.info("\n📊 Tworzę rankingi...")
-    consensus_df = create_consensus_df(companies)
-    heatmap_df = create_flag_heatmap(companies, top_n=30)
-    best_of_df = create_best_of(companies)
-    profiles_df = create_profiles(companies, results)
+    strengths = signal_strengths(companies)
+    ranking = rank_by_strength(strengths)
+    consensus_df = create_consensus_df(companies, strengths)
+    heatmap_df = create_flag_heatmap(companies, top_n=30, strengths=strengths, ranking=ranking)
+    best_of_df = create_best_of(companies, strengths)
+    profiles_df = create_profiles(companies, results, strengths, ranking)
     
     # Zapisz Excel
     if not args.no_save:
@@ -741,8 +920,10 @@ def main():
     print(f"{'='*80}")
     print(f"📊 Modeli: {len(results)}")
     print(f"📈 Spółek (unikalne): {len(companies)}")
-    print(f"🏆 Spółki w TOP5 wielu modeli: {sum(1 for c in companies.values() if c.top5_count >= 2)}")
-    print(f"🚩 Spółki z warning: {sum(1 for c in companies.values() if c.warning_count > 0)}")
+    top5_counts = np.fromiter((c.top5_count for c in companies.values()), dtype=np.int32, count=len(companies))
+    warning_counts = np.fromiter((c.warning_count for c in companies.values()), dtype=np.int32, count=len(companies))
+    print(f"🏆 Spółki w TOP5 wielu modeli: {int((top5_counts >= 2).sum())}")
+    print(f"🚩 Spółki z warning: {int((warning_counts > 0).sum())}")
     
     if not args.no_save:
         print(f"\n✅ Wyniki zapisane: {OUTPUT_FILE}")
@@ -20,12 +20,14 @@ import shutil
 import logging
 import argparse
 import importlib.util
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime
 from typing import Dict, List, Optional, Any
 
-import yaml
 from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+from openpyxl.utils import get_column_letter
 
 # Ścieżki
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -37,6 +39,8 @@ LOGS_DIR = os.path.join(BASE_DIR, "logs")
 
 sys.path.insert(0, SKANERY_DIR)
 
+from base import load_config
+
 
 def setup_logging(log_to_file: bool = True) -> logging.Logger:
     """Konfiguruje logging"""
@@ -70,8 +74,7 @@ def load_global_config() -> dict:
     """Wczytuje globalną konfigurację"""
     config_path = os.path.join(BASE_DIR, "config.yaml")
     if os.path.exists(config_path):
-        with open(config_path, 'r', encoding='utf-8') as f:
-            return yaml.safe_load(f) or {}
+        return load_config(config_path)
     return {}
 
 
@@ -79,19 +82,21 @@ def discover_scanners() -> List[Dict[str, Any]]:
     """Automatycznie odkrywa wszystkie skanery"""
     scanners = []
     
-    for item in sorted(os.listdir(SKANERY_DIR)):
-        scanner_dir = os.path.join(SKANERY_DIR, item)
+    # Podfoldery skanerów (DirEntry.is_dir() - bez osobnego stat per wpis)
+    with os.scandir(SKANERY_DIR) as entries:
+        scanner_dirs = sorted((entry.name, entry.path) for entry in entries if entry.is_dir())
+    
+    for item, scanner_dir in scanner_dirs:
         model_file = os.path.join(scanner_dir, "model.py")
         config_file = os.path.join(scanner_dir, "config.yaml")
         
-        if not os.path.isdir(scanner_dir) or not os.path.exists(model_file):
+        if not os.path.exists(model_file):
             continue
         
         # Wczytaj config skanera
         scanner_config = {}
         if os.path.exists(config_file):
-            with open(config_file, 'r', encoding='utf-8') as f:
-                scanner_config = yaml.safe_load(f) or {}
+            scanner_config = load_config(config_file)
         
         # Sprawdź czy aktywny
         if not scanner_config.get('aktywny', True):
@@ -114,24 +119,96 @@ def discover_scanners() -> List[Dict[str, Any]]:
     return scanners
 
 
+# Załadowane klasy skanerów: (model_path, mtime_ns) -> klasa
+_SCANNER_CLASS_CACHE: Dict[tuple, Any] = {}
+
+
 def load_scanner_class(model_path: str):
-    """Dynamicznie ładuje klasę skanera"""
-    spec = importlib.util.spec_from_file_location("model", model_path)
+    """
+    Dynamicznie ładuje klasę skanera.
+    
+    Moduł wykonywany jest raz na wersję pliku (klucz: ścieżka + mtime)
+    i rejestrowany w sys.modules jako skanery_<folder>_model.
+    Klasę wskazuje __scanner_class__ w model.py; bez niego - pierwsza
+    klasa *Scanner inna niż BaseScanner.
+    """
+    key = (model_path, os.stat(model_path).st_mtime_ns)
+    if key in _SCANNER_CLASS_CACHE:
+        return _SCANNER_CLASS_CACHE[key]
+    
+    # Unikalna nazwa modułu, zarejestrowana w sys.modules przed wykonaniem - numba
+    # zapisuje kernele cache=True pod nazwą modułu i importuje ją przy odczycie cache
+    scanner_id = os.path.basename(os.path.dirname(os.path.abspath(model_path)))
+    module_name = f"skanery_{scanner_id}_model"
+    spec = importlib.util.spec_from_file_location(module_name, model_path)
     module = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(module)
-    
-    for name in dir(module):
-        obj = getattr(module, name)
-        if isinstance(obj, type) and name.endswith('Scanner') and name != 'BaseScanner':
-            return obj
-    
-    return None
+    sys.modules[module_name] = module
+    try:
+        spec.loader.exec_module(module)
+    except BaseException:
+        sys.modules.pop(module_name, None)
+        raise
+    
+    scanner_class = getattr(module, '__scanner_class__', None)
+    if scanner_class is None:
+        for name in dir(module):
+            obj = getattr(module, name)
+            if isinstance(obj, type) and name.endswith('Scanner') and name != 'BaseScanner':
+                scanner_class = obj
+                break
+    
+    if scanner_class is not None:
+        _SCANNER_CLASS_CACHE[key] = scanner_class
+    return scanner_class
+
 
+class ScannerClassNotFound(Exception):
+    """model.py nie definiuje klasy skanera"""
 
-def run_scanners(scanner_filter: Optional[List[str]] = None) -> Dict[str, Any]:
-    """Uruchamia skanery i zwraca wyniki"""
+
+def _run_one_scanner(scanner_info: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Wczytuje dane i uruchamia jeden skaner (w procesie roboczym lub bieżącym).
+    
+    Zwraca tylko dane wynikowe - obiekt skanera (klasa z modułu ładowanego
+    z pliku) nie przechodzi przez pickle między procesami.
+    """
     from base import load_data
     
+    # Załaduj dane
+    df = load_data(scanner_info['data_path'])
+    if df is None:
+        return None
+    
+    # Załaduj i uruchom skaner
+    ScannerClass = load_scanner_class(scanner_info['model_path'])
+    if ScannerClass is None:
+        raise ScannerClassNotFound("Nie znaleziono klasy skanera")
+    
+    scanner = ScannerClass(scanner_info['config_path'])
+    scanner.run(df)
+    if scanner.results is None:
+        raise ValueError("Skaner nie zwrócił wyników")
+    
+    return {
+        'name': scanner.name,
+        'data': scanner.results,
+        'columns': scanner.get_output_columns(),
+    }
+
+
+def run_scanners(scanner_filter: Optional[List[str]] = None,
+                 max_workers: Optional[int] = None,
+                 threads: bool = False) -> Dict[str, Any]:
+    """
+    Uruchamia skanery i zwraca wyniki.
+    
+    Skanery są niezależne (osobne pliki danych), więc przy kilku aktywnych
+    liczone są równolegle w ProcessPoolExecutor (domyślnie proces na rdzeń).
+    threads=True: pula wątków zamiast procesów - bez startu procesów i pickle
+    wyników (scoring to NumPy, które zwalnia GIL; parsowanie plików już nie).
+    Wyniki zbierane są w kolejności discover_scanners.
+    """
     logger = logging.getLogger("gpw_screener")
     results = {}
     scanners_info = discover_scanners()
@@ -141,48 +218,55 @@ def run_scanners(scanner_filter: Optional[List[str]] = None) -> Dict[str, Any]:
     logger.info("=" * 60)
     logger.info(f"Znaleziono {len(scanners_info)} aktywnych skanerów\n")
     
-    for scanner_info in scanners_info:
-        scanner_id = scanner_info['id']
-        
-        # Filtrowanie
-        if scanner_filter and scanner_id not in scanner_filter:
-            continue
-        
-        logger.info(f"📊 {scanner_info['name']}...")
+    # Filtrowanie
+    selected = [info for info in scanners_info
+                if not scanner_filter or info['id'] in scanner_filter]
+    
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    max_workers = min(max_workers, len(selected))
+    pool_class = ThreadPoolExecutor if threads else ProcessPoolExecutor
+    executor = pool_class(max_workers=max_workers) if max_workers > 1 else None
+    
+    try:
+        # Zleć skanery z dostępnymi danymi (bez puli - liczone przy odbiorze)
+        futures = {}
+        if executor is not None:
+            for scanner_info in selected:
+                if os.path.exists(scanner_info['data_path']):
+                    futures[scanner_info['id']] = executor.submit(_run_one_scanner, scanner_info)
         
-        # Sprawdź dane
-        if not os.path.exists(scanner_info['data_path']):
-            logger.warning(f"   ⚠️  Brak pliku danych: {scanner_info['data_path']}")
-            continue
-        
-        try:
-            # Załaduj dane
-            df = load_data(scanner_info['data_path'])
-            if df is None:
-                continue
+        for scanner_info in selected:
+            scanner_id = scanner_info['id']
+            logger.info(f"📊 {scanner_info['name']}...")
             
-            # Załaduj i uruchom skaner
-            ScannerClass = load_scanner_class(scanner_info['model_path'])
-            if ScannerClass is None:
-                logger.error(f"   ❌ Nie znaleziono klasy skanera")
+            # Sprawdź dane
+            if not os.path.exists(scanner_info['data_path']):
+                logger.warning(f"   ⚠️  Brak pliku danych: {scanner_info['data_path']}")
                 continue
             
-            scanner = ScannerClass(scanner_info['config_path'])
-            scanner.run(df)
-            
-            results[scanner_id] = {
-                'scanner': scanner,
-                'data': scanner.results,
-                'columns': scanner.get_output_columns(),
-                'info': scanner_info
-            }
-            
-            logger.info(f"   ✅ Przetworzono {len(scanner.results)} spółek")
-            
-        except Exception as e:
-            logger.error(f"   ❌ Błąd: {e}")
-            import traceback
-            logger.debug(traceback.format_exc())
+            try:
+                if scanner_id in futures:
+                    result = futures[scanner_id].result()
+                else:
+                    result = _run_one_scanner(scanner_info)
+                if result is None:
+                    continue
+                
+                result['info'] = scanner_info
+                results[scanner_id] = result
+                
+                logger.info(f"   ✅ Przetworzono {len(result['data'])} spółek")
+                
+            except ScannerClassNotFound as e:
+                logger.error(f"   ❌ {e}")
+            except Exception as e:
+                logger.error(f"   ❌ Błąd: {e}")
+                import traceback
+                logger.debug(traceback.format_exc())
+    finally:
+        if executor is not None:
+            executor.shutdown()
     
     return results
 
@@ -191,7 +275,9 @@ def create_excel(results: Dict[str, Any], output_path: str):
     """Tworzy plik Excel z wynikami"""
     logger = logging.getLogger("gpw_screener")
     
-    wb = Workbook()
+    # Tryb write_only - wiersze zapisywane strumieniowo, style nadawane przy zapisie
+    # (szerokości kolumn ustawiamy przed pierwszym wierszem arkusza)
+    wb = Workbook(write_only=True)
     
     # Style
     header_fill = PatternFill(start_color="2E75B6", end_color="2E75B6", fill_type="solid")
@@ -203,49 +289,54 @@ def create_excel(results: Dict[str, Any], output_path: str):
         top=Side(style='thin'), bottom=Side(style='thin')
     )
     
+    def bordered(ws, value):
+        cell = WriteOnlyCell(ws, value=value)
+        cell.border = thin_border
+        return cell
+    
     # === ARKUSZ PODSUMOWANIA ===
-    ws_summary = wb.active
-    ws_summary.title = "PODSUMOWANIE"
+    ws_summary = wb.create_sheet("PODSUMOWANIE")
     
-    ws_summary['A1'] = "GPW SCREENER - Wyniki"
-    ws_summary['A1'].font = Font(bold=True, size=16)
-    ws_summary['A2'] = f"Wygenerowano: {datetime.now().strftime('%Y-%m-%d %H:%M')}"
-    ws_summary['A2'].font = Font(italic=True, color="666666")
+    # Szerokości kolumn
+    ws_summary.column_dimensions['A'].width = 30
+    ws_summary.column_dimensions['B'].width = 10
+    for col in ['C', 'D', 'E', 'F', 'G']:
+        ws_summary.column_dimensions[col].width = 15
+    
+    title_cell = WriteOnlyCell(ws_summary, value="GPW SCREENER - Wyniki")
+    title_cell.font = Font(bold=True, size=16)
+    ws_summary.append([title_cell])
+    date_cell = WriteOnlyCell(ws_summary, value=f"Wygenerowano: {datetime.now().strftime('%Y-%m-%d %H:%M')}")
+    date_cell.font = Font(italic=True, color="666666")
+    ws_summary.append([date_cell])
+    ws_summary.append([])
     
     # Tabela podsumowania
     summary_headers = ['Model', 'Spółek', 'TOP 1', 'TOP 2', 'TOP 3', 'TOP 4', 'TOP 5']
-    for col, h in enumerate(summary_headers, 1):
-        cell = ws_summary.cell(row=4, column=col, value=h)
+    header_cells = []
+    for h in summary_headers:
+        cell = bordered(ws_summary, h)
         cell.fill = header_fill
         cell.font = header_font
-        cell.border = thin_border
+        header_cells.append(cell)
+    ws_summary.append(header_cells)
     
-    row = 5
     for scanner_id, result in results.items():
-        scanner = result['scanner']
         df = result['data']
         
-        ws_summary.cell(row=row, column=1, value=scanner.name).border = thin_border
-        ws_summary.cell(row=row, column=2, value=len(df)).border = thin_border
+        row_cells = [bordered(ws_summary, result['name']), bordered(ws_summary, len(df))]
         
         top5 = df.head(5)
         for i, (_, r) in enumerate(top5.iterrows()):
-            cell = ws_summary.cell(row=row, column=3+i, value=f"{r['Ticker']} ({r['Total']:.0f})")
-            cell.border = thin_border
+            cell = bordered(ws_summary, f"{r['Ticker']} ({r['Total']:.0f})")
             if i == 0:
                 cell.font = Font(bold=True)
+            row_cells.append(cell)
         
-        row += 1
-    
-    # Szerokości kolumn
-    ws_summary.column_dimensions['A'].width = 30
-    ws_summary.column_dimensions['B'].width = 10
-    for col in ['C', 'D', 'E', 'F', 'G']:
-        ws_summary.column_dimensions[col].width = 15
+        ws_summary.append(row_cells)
     
     # === ARKUSZE MODELI ===
     for scanner_id, result in results.items():
-        scanner = result['scanner']
         df = result['data']
         columns = result['columns']
         
@@ -253,22 +344,36 @@ def create_excel(results: Dict[str, Any], output_path: str):
         available_cols = [c for c in columns if c in df.columns]
         
         # Nazwa arkusza (max 31 znaków)
-        sheet_name = scanner.name[:31].replace('/', '-')
+        sheet_name = result['name'][:31].replace('/', '-')
         ws = wb.create_sheet(sheet_name)
         
-        # Nagłówki
+        # Szerokości
         for col_idx, col_name in enumerate(available_cols, 1):
-            cell = ws.cell(row=1, column=col_idx, value=col_name)
+            width = max(10, len(str(col_name)) + 2)
+            ws.column_dimensions[get_column_letter(col_idx)].width = width
+        
+        # Nagłówki
+        header_cells = []
+        for col_name in available_cols:
+            cell = bordered(ws, col_name)
             cell.fill = header_fill
             cell.font = header_font
             cell.alignment = Alignment(horizontal='center')
-            cell.border = thin_border
+            header_cells.append(cell)
+        ws.append(header_cells)
         
         # Dane
         for row_idx, row_data in df.iterrows():
-            excel_row = row_idx + 2
+            # Kolorowanie
+            if row_idx < 5:
+                row_fill = top5_fill
+            elif row_idx < 10:
+                row_fill = top10_fill
+            else:
+                row_fill = None
             
-            for col_idx, col_name in enumerate(available_cols, 1):
+            row_cells = []
+            for col_name in available_cols:
                 value = row_data.get(col_name, '')
                 
                 # Formatowanie
@@ -278,38 +383,57 @@ def create_excel(results: Dict[str, Any], output_path: str):
                     else:
                         value = round(value, 1)
                 
-                cell = ws.cell(row=excel_row, column=col_idx, value=value)
-                cell.border = thin_border
-                
-                # Kolorowanie
-                if row_idx < 5:
-                    cell.fill = top5_fill
-                elif row_idx < 10:
-                    cell.fill = top10_fill
-        
-        # Szerokości
-        for col_idx, col_name in enumerate(available_cols, 1):
-            width = max(10, len(str(col_name)) + 2)
-            ws.column_dimensions[ws.cell(row=1, column=col_idx).column_letter].width = width
+                cell = bordered(ws, value)
+                if row_fill is not None:
+                    cell.fill = row_fill
+                row_cells.append(cell)
+            ws.append(row_cells)
     
     wb.save(output_path)
     logger.info(f"✅ Zapisano: {output_path}")
 
 
+def link_or_copy(src: str, dst: str):
+    """
+    Podmienia dst na twarde dowiązanie do src (bez kopiowania danych).
+    
+    Dowiązanie tworzone jest obok i podmieniane przez os.replace, więc dst
+    nigdy nie jest częściowy; gdy system plików nie obsługuje dowiązań - kopia.
+    """
+    # dst już wskazuje na ten sam plik (np. drugie uruchomienie w tej samej minucie:
+    # ta sama nazwa ze znacznikiem czasu) - os.replace dwóch nazw jednego i-węzła nic nie robi
+    if os.path.exists(dst) and os.path.samefile(src, dst):
+        return
+    
+    tmp_path = dst + ".tmp"
+    try:
+        if os.path.lexists(tmp_path):
+            os.remove(tmp_path)
+        os.link(src, tmp_path)
+        os.replace(tmp_path, dst)
+    except OSError:
+        shutil.copy(src, dst)
+    finally:
+        if os.path.lexists(tmp_path):
+            os.remove(tmp_path)
+
+
 def archive_old_results():
     """Archiwizuje poprzednie wyniki"""
     logger = logging.getLogger("gpw_screener")
     os.makedirs(ARCHIVE_DIR, exist_ok=True)
     
-    for filename in os.listdir(MAIN_DIR):
-        if filename.startswith("wyniki_") and filename.endswith(".xlsx"):
-            if filename == "wyniki_latest.xlsx":
-                continue
-            src = os.path.join(MAIN_DIR, filename)
-            dst = os.path.join(ARCHIVE_DIR, filename)
-            if not os.path.exists(dst):
-                shutil.move(src, dst)
-                logger.debug(f"Zarchiwizowano: {filename}")
+    # DirEntry.is_file() korzysta z danych readdir - bez stat per wpis
+    with os.scandir(MAIN_DIR) as entries:
+        archived = [entry for entry in entries
+                    if entry.name.startswith("wyniki_") and entry.name.endswith(".xlsx")
+                    and entry.name != "wyniki_latest.xlsx" and entry.is_file()]
+    
+    for entry in archived:
+        dst = os.path.join(ARCHIVE_DIR, entry.name)
+        if not os.path.exists(dst):
+            shutil.move(entry.path, dst)
+            logger.debug(f"Zarchiwizowano: {entry.name}")
 
 
 def print_summary(results: Dict[str, Any]):
@@ -321,10 +445,9 @@ def print_summary(results: Dict[str, Any]):
     logger.info("=" * 70)
     
     for scanner_id, result in results.items():
-        scanner = result['scanner']
         df = result['data']
         
-        logger.info(f"\n📈 {scanner.name}")
+        logger.info(f"\n📈 {result['name']}")
         logger.info("-" * 50)
         
         for _, row in df.head(5).iterrows():
@@ -338,6 +461,8 @@ def main():
     parser.add_argument('--only', nargs='+', help='Uruchom tylko wybrane skanery')
     parser.add_argument('--no-archive', action='store_true', help='Nie archiwizuj starych wyników')
     parser.add_argument('--debug', action='store_true', help='Debug mode')
+    parser.add_argument('--workers', type=int, help='Liczba równoległych skanerów (domyślnie rdzenie CPU)')
+    parser.add_argument('--threads', action='store_true', help='Wątki zamiast procesów')
     args = parser.parse_args()
     
     # Setup
@@ -364,7 +489,7 @@ def main():
         archive_old_results()
     
     # Uruchom skanery
-    results = run_scanners(args.only)
+    results = run_scanners(args.only, max_workers=args.workers, threads=args.threads)
     
     if not results:
         logger.error("\n❌ Brak wyników do zapisania")
@@ -377,7 +502,7 @@ def main():
     
     # Utwórz/nadpisz "latest"
     latest_file = os.path.join(MAIN_DIR, "wyniki_latest.xlsx")
-    shutil.copy(output_file, latest_file)
+    link_or_copy(output_file, latest_file)
     logger.info(f"✅ Latest: {latest_file}")
     
     # Podsumowanie
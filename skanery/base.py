@@ -5,16 +5,44 @@ Bazowy moduł dla wszystkich skanerów GPW.
 Zawiera wspólne funkcje parsowania, walidacji i eksportu.
 """
 
+import numpy as np
 import pandas as pd
+from pandas.api.types import is_numeric_dtype
+import copy
+import csv
+import functools
+import io
 import os
 import re
 import logging
+import threading
 import yaml
+try:
+    from yaml import CSafeLoader as SafeLoader  # libyaml (C)
+except ImportError:
+    from yaml import SafeLoader
 from abc import ABC, abstractmethod
-from typing import List, Dict, Optional, Set
+from typing import List, Dict, Optional, Set, Tuple
+
+try:
+    from numba import njit  # JIT dla kerneli scoringu
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+    
+    def njit(*args, **kwargs):
+        """Zastępczy dekorator - bez numba skanery liczą score przez np.select"""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
 
 logger = logging.getLogger(__name__)
 
+# Wzorce używane w pętlach parsowania (kompilowane raz)
+_TICKER_RE = re.compile(r'^([A-Z0-9]+)')
+_DATA_LINE_RE = re.compile(r'^[A-Z0-9]+[\s\(]')
+_FLAG_TOKEN_RE = re.compile(r'\[([A-Z!?]+)\]')
+
 
 def parse_percent(val) -> float:
     """Konwertuje wartość z % na float"""
@@ -22,141 +50,223 @@ def parse_percent(val) -> float:
         return 0.0
     if isinstance(val, (int, float)):
         return float(val)
-    cleaned = str(val).replace('%', '').replace(',', '.').replace(' ', '').replace('\xa0', '')
+    return _parse_percent_str(str(val))
+
+
+@functools.lru_cache(maxsize=8192)
+def _parse_percent_str(val: str) -> float:
+    """Parsowanie tekstu z parse_percent - powtarzalne wartości ('0%', '-') z cache"""
+    cleaned = val.replace('%', '').replace(',', '.').replace(' ', '').replace('\xa0', '')
     cleaned = cleaned.lstrip('+')
     try:
         return float(cleaned)
-    except:
+    except ValueError:
         return 0.0
 
 
+def _vec_parse_percent(s: pd.Series) -> pd.Series:
+    """parse_percent dla całej kolumny - operacje .str i jeden to_numeric"""
+    if is_numeric_dtype(s):
+        # Kolumna już liczbowa (np. dane z cache) - bez parsowania, a gotowy float64 bez kopii
+        if s.dtype == np.float64 and not s.hasnans:
+            return s
+        return s.fillna(0.0).astype(float)
+    cleaned = (s.astype(str)
+                .str.replace('%', '', regex=False)
+                .str.replace(',', '.', regex=False)
+                .str.replace(' ', '', regex=False)
+                .str.replace('\xa0', '', regex=False)
+                .str.lstrip('+'))
+    # Braki, '', '-' i nieparsowalne -> 0.0 (jak parse_percent)
+    return pd.to_numeric(cleaned, errors='coerce').fillna(0.0).where(s.notna(), 0.0)
+
+
+# Scoring celowo w float64: w float32 prawie każdy Total/S_* różni się od dotychczasowych
+# wyników (~1e-6), a wielkości pochodne (PEG, CV, średnie wzrostu) blisko progów mogą wpaść
+# do innego przedziału niż w wersji skalarnej. Przy kilkuset spółkach przepustowość pamięci
+# i tak nie jest wąskim gardłem.
+SCORE_DTYPE = np.float64
+
+
+def column_values(df: pd.DataFrame, col: str, default: float = 0.0) -> np.ndarray:
+    """Kolumna jako ciągła tablica SCORE_DTYPE (brak kolumny -> stała default, jak row.get)"""
+    if col in df.columns:
+        return np.ascontiguousarray(df[col].to_numpy(dtype=SCORE_DTYPE))
+    return np.full(len(df), default, dtype=SCORE_DTYPE)
+
+
+def column_arrays(df: pd.DataFrame, columns: List[str], default: float = 0.0) -> Dict[str, np.ndarray]:
+    """Wszystkie potrzebne kolumny wyciągnięte raz (kolumna -> tablica float64, braki -> default)"""
+    return {col: column_values(df, col, default) for col in columns}
+
+
+def map_rows(func, df: pd.DataFrame, columns: List[str], default: float = 0.0) -> np.ndarray:
+    """
+    func(*wartości kolumn) dla każdego wiersza, bez budowania Series per wiersz (jak df.apply).
+    Kolumny jako floaty Pythona; brak kolumny -> default (jak row.get).
+    """
+    values = [column_values(df, col, default).tolist() for col in columns]
+    return np.fromiter((func(*row) for row in zip(*values)), dtype=np.float64, count=len(df))
+
+
+# Najmniejsza dodatnia liczba: próg "x <= 0" zapisany jako "x < POSITIVE_MIN" dla piecewise_linear
+POSITIVE_MIN = np.nextafter(0.0, 1.0)
+
+
+def piecewise_linear(x: np.ndarray, breakpoints: np.ndarray, slopes: np.ndarray,
+                     intercepts: np.ndarray) -> np.ndarray:
+    """
+    Funkcja przedziałami liniowa: segment k to breakpoints[k-1] <= x < breakpoints[k]
+    (segment 0 poniżej pierwszego progu, ostatni od ostatniego progu w górę),
+    wartość intercepts[k] + slopes[k] * x. Jeden searchsorted zamiast K masek np.select.
+    NaN trafia do ostatniego segmentu (jak else w drabince if/elif): stały segment daje
+    swoją wartość, liniowy - NaN.
+    """
+    idx = np.searchsorted(breakpoints, x, side='right')
+    out = intercepts[idx] + slopes[idx] * x
+    if slopes[-1] == 0:
+        nan = np.isnan(x)
+        if nan.any():
+            out[nan] = intercepts[-1]
+    return out
+
+
+def step_lookup(x: np.ndarray, breakpoints: np.ndarray, scores: np.ndarray) -> np.ndarray:
+    """
+    Funkcja schodkowa: scores[k] dla breakpoints[k-1] <= x < breakpoints[k]
+    (jak piecewise_linear z zerowymi nachyleniami, ale zachowuje typ scores).
+    NaN trafia do ostatniego przedziału - jak else w drabince if/elif.
+    """
+    idx = np.searchsorted(breakpoints, x, side='right')
+    return scores[idx]
+
+
+@njit(cache=True)
+def _sweet_spot_kernel(values, sweet_min, sweet_max, suspicious, floor):
+    low = sweet_min * 0.3
+    out = np.empty_like(values)
+    for i in range(values.size):
+        v = values[i]
+        if v < 0:
+            out[i] = floor
+        elif v < low:
+            out[i] = floor + (v / low) * 20
+        elif v < sweet_min:
+            out[i] = 30 + (v - low) / (sweet_min - low) * 50
+        elif v <= sweet_max:
+            out[i] = 100.0
+        elif v <= suspicious:
+            out[i] = 100 - (v - sweet_max) / (suspicious - sweet_max) * 40
+        elif v <= suspicious * 2:
+            out[i] = 60 - (v - suspicious) / suspicious * 20
+        else:
+            # Jak max(floor, ...) w Pythonie - NaN też tutaj i dostaje floor
+            tail = 40 - (v - suspicious * 2) / 100
+            out[i] = tail if tail > floor else floor
+    return out
+
+
 def parse_ticker(val) -> Optional[str]:
     """Wyciąga ticker z formatu 'GEN (GENOMED)' -> 'GEN'"""
     if pd.isna(val):
         return None
     val = str(val).strip()
-    match = re.match(r'^([A-Z0-9]+)', val)
+    match = _TICKER_RE.match(val)
     if match:
         return match.group(1)
     return val
 
 
-def map_header(h: str) -> str:
-    """Mapuje nagłówki z BiznesRadar na standardowe nazwy kolumn"""
-    h_lower = h.lower()
-    
-    mappings = [
-        ('profil', 'Ticker'),
-        ('raport', 'Raport'),
-    ]
-    
-    # Exact matches first
-    if h_lower == 'roe':
-        return 'ROE'
-    if h_lower == 'roa':
-        return 'ROA'
-    if h_lower == 'rynek':
-        return 'Rynek'
-    
-    # Pattern matches
-    if 'roe' in h_lower and 'k/k' in h_lower:
-        return 'ROE_QQ'
-    if 'roe' in h_lower and 'r/r' in h_lower:
-        return 'ROE_YY'
-    if 'roa' in h_lower and 'k/k' in h_lower:
-        return 'ROA_QQ'
-    if 'roa' in h_lower and 'r/r' in h_lower:
-        return 'ROA_YY'
+def _vec_parse_ticker(s: pd.Series) -> pd.Series:
+    """parse_ticker dla całej kolumny - jeden przebieg regexa w str.extract (szybszy niż str.replace)"""
+    stripped = s.str.strip()
+    return stripped.str.extract(_TICKER_RE, expand=False).fillna(stripped)
+
+
+# Dokładne dopasowania nagłówków (sprawdzane przed wzorcami)
+_HEADER_EXACT = {
+    'roe': 'ROE',
+    'roa': 'ROA',
+    'rynek': 'Rynek',
+}
+
+# Wzorce nagłówków: (predykat na h.lower(), kolumna) - kolejność ma znaczenie, pierwszy trafiony wygrywa
+_HEADER_RULES = (
+    (lambda hl: 'roe' in hl and 'k/k' in hl, 'ROE_QQ'),
+    (lambda hl: 'roe' in hl and 'r/r' in hl, 'ROE_YY'),
+    (lambda hl: 'roa' in hl and 'k/k' in hl, 'ROA_QQ'),
+    (lambda hl: 'roa' in hl and 'r/r' in hl, 'ROA_YY'),
     
     # === MAPOWANIA DLA QUALITY MOMENTUM ===
     
-    # Marża zysku operacyjnego k/k -> Margin_Op_QQ
-    if 'mar' in h_lower and 'operacyj' in h_lower and 'k/k' in h_lower:
-        return 'Margin_Op_QQ'
-    # Marża zysku operacyjnego r/r -> Margin_Op_YY
-    if 'mar' in h_lower and 'operacyj' in h_lower and 'r/r' in h_lower:
-        return 'Margin_Op_YY'
-    # Marża zysku netto k/k -> Margin_Net_QQ
-    if 'mar' in h_lower and 'netto' in h_lower and 'k/k' in h_lower:
-        return 'Margin_Net_QQ'
-    # Marża zysku netto r/r -> Margin_Net_YY
-    if 'mar' in h_lower and 'netto' in h_lower and 'r/r' in h_lower:
-        return 'Margin_Net_YY'
-    
-    # Przychody kwart k/k -> Rev_QQ
-    if 'przychody' in h_lower and 'kwart' in h_lower and 'k/k' in h_lower:
-        return 'Rev_QQ'
-    # Przychody kwart r/r -> Rev_YY
-    if 'przychody' in h_lower and 'kwart' in h_lower and 'r/r' in h_lower:
-        return 'Rev_YY'
+    # Marża zysku operacyjnego k/k / r/r -> Margin_Op_QQ / Margin_Op_YY
+    (lambda hl: 'mar' in hl and 'operacyj' in hl and 'k/k' in hl, 'Margin_Op_QQ'),
+    (lambda hl: 'mar' in hl and 'operacyj' in hl and 'r/r' in hl, 'Margin_Op_YY'),
+    # Marża zysku netto k/k / r/r -> Margin_Net_QQ / Margin_Net_YY
+    (lambda hl: 'mar' in hl and 'netto' in hl and 'k/k' in hl, 'Margin_Net_QQ'),
+    (lambda hl: 'mar' in hl and 'netto' in hl and 'r/r' in hl, 'Margin_Net_YY'),
+    
+    # Przychody kwart k/k / r/r -> Rev_QQ / Rev_YY
+    (lambda hl: 'przychody' in hl and 'kwart' in hl and 'k/k' in hl, 'Rev_QQ'),
+    (lambda hl: 'przychody' in hl and 'kwart' in hl and 'r/r' in hl, 'Rev_YY'),
     
     # === MAPOWANIA DLA VALUATION COMPRESSION ===
     
-    # Cena / Wartość księgowa k/k -> P_BV_QQ (PRZED ogólnym P_BV!)
-    if 'cena' in h_lower and 'ksi' in h_lower and 'k/k' in h_lower:
-        return 'P_BV_QQ'
-    # Cena / Wartość księgowa r/r -> P_BV_YY
-    if 'cena' in h_lower and 'ksi' in h_lower and 'r/r' in h_lower:
-        return 'P_BV_YY'
+    # Cena / Wartość księgowa k/k / r/r -> P_BV_QQ / P_BV_YY (PRZED ogólnym P_BV!)
+    (lambda hl: 'cena' in hl and 'ksi' in hl and 'k/k' in hl, 'P_BV_QQ'),
+    (lambda hl: 'cena' in hl and 'ksi' in hl and 'r/r' in hl, 'P_BV_YY'),
     
-    # Cena / Zysk k/k -> P_E_QQ (PRZED ogólnym P_E!)
-    if 'cena' in h_lower and 'zysk' in h_lower and 'k/k' in h_lower and 'operacyj' not in h_lower:
-        return 'P_E_QQ'
-    # Cena / Zysk r/r -> P_E_YY
-    if 'cena' in h_lower and 'zysk' in h_lower and 'r/r' in h_lower and 'operacyj' not in h_lower:
-        return 'P_E_YY'
+    # Cena / Zysk k/k / r/r -> P_E_QQ / P_E_YY (PRZED ogólnym P_E!)
+    (lambda hl: 'cena' in hl and 'zysk' in hl and 'k/k' in hl and 'operacyj' not in hl, 'P_E_QQ'),
+    (lambda hl: 'cena' in hl and 'zysk' in hl and 'r/r' in hl and 'operacyj' not in hl, 'P_E_YY'),
     
     # EV / EBITDA -> EV_EBITDA
-    if 'ev' in h_lower and 'ebitda' in h_lower:
-        return 'EV_EBITDA'
+    (lambda hl: 'ev' in hl and 'ebitda' in hl, 'EV_EBITDA'),
     
     # === STARE MAPOWANIA (dla innych modeli) ===
     
     # Starsze mapowanie marży (bez netto/operacyjna distinction)
-    if 'mar' in h_lower and 'operacyj' in h_lower and 'k/k' not in h_lower and 'r/r' not in h_lower:
-        return 'OpMargin'
+    (lambda hl: 'mar' in hl and 'operacyj' in hl and 'k/k' not in hl and 'r/r' not in hl, 'OpMargin'),
     # Compatibility: stare Margin_QQ/YY dla innych modeli
-    if 'mar' in h_lower and 'k/k' in h_lower and 'operacyj' not in h_lower and 'netto' not in h_lower:
-        return 'Margin_QQ'
-    if 'mar' in h_lower and 'r/r' in h_lower and 'operacyj' not in h_lower and 'netto' not in h_lower:
-        return 'Margin_YY'
-    
-    if 'cena' in h_lower and 'operacyj' in h_lower:
-        return 'P_EBIT'
-    if 'cena' in h_lower and 'zysk' in h_lower and 'operacyj' not in h_lower and 'ksi' not in h_lower:
-        return 'P_E'
-    if 'cena' in h_lower and 'ksi' in h_lower:
-        return 'P_BV'
-    if 'zysk operacyjny' in h_lower and '3 lat' in h_lower:
-        return 'EBIT_3Y'
-    if 'przychody' in h_lower and 'dynamika' in h_lower and '3 lat' in h_lower:
-        return 'Rev_3Y'
-    if 'przychody' in h_lower and 'o4k' in h_lower:
-        return 'Rev_O4K'
-    if 'zad' in h_lower and 'og' in h_lower:
-        return 'Debt_Ratio'
-    if 'pokrycie' in h_lower and 'aktyw' in h_lower:
-        return 'Asset_Coverage'
-    if 'profil' in h_lower:
-        return 'Ticker'
+    (lambda hl: 'mar' in hl and 'k/k' in hl and 'operacyj' not in hl and 'netto' not in hl, 'Margin_QQ'),
+    (lambda hl: 'mar' in hl and 'r/r' in hl and 'operacyj' not in hl and 'netto' not in hl, 'Margin_YY'),
+    
+    (lambda hl: 'cena' in hl and 'operacyj' in hl, 'P_EBIT'),
+    (lambda hl: 'cena' in hl and 'zysk' in hl and 'operacyj' not in hl and 'ksi' not in hl, 'P_E'),
+    (lambda hl: 'cena' in hl and 'ksi' in hl, 'P_BV'),
+    (lambda hl: 'zysk operacyjny' in hl and '3 lat' in hl, 'EBIT_3Y'),
+    (lambda hl: 'przychody' in hl and 'dynamika' in hl and '3 lat' in hl, 'Rev_3Y'),
+    (lambda hl: 'przychody' in hl and 'o4k' in hl, 'Rev_O4K'),
+    (lambda hl: 'zad' in hl and 'og' in hl, 'Debt_Ratio'),
+    (lambda hl: 'pokrycie' in hl and 'aktyw' in hl, 'Asset_Coverage'),
+    (lambda hl: 'profil' in hl, 'Ticker'),
     
     # === MAPOWANIA DLA CASH QUALITY ===
     
     # Udział zysku netto w przepływach operacyjnych r/r -> Cash_Conv
-    if 'udzia' in h_lower and 'zysk' in h_lower and 'przep' in h_lower:
-        return 'Cash_Conv'
+    (lambda hl: 'udzia' in hl and 'zysk' in hl and 'przep' in hl, 'Cash_Conv'),
     
     # I stopień pokrycia -> Coverage_I
-    if 'stopie' in h_lower and 'pokrycia' in h_lower:
-        return 'Coverage_I'
-    if h_lower == 'i stopień pokrycia':
-        return 'Coverage_I'
+    (lambda hl: 'stopie' in hl and 'pokrycia' in hl, 'Coverage_I'),
+    (lambda hl: hl == 'i stopień pokrycia', 'Coverage_I'),
     
     # Płynność bieżąca -> Current_Ratio
-    if 'p' in h_lower and 'ynno' in h_lower and 'bie' in h_lower:
-        return 'Current_Ratio'
-    if 'płynność bieżąca' in h_lower:
-        return 'Current_Ratio'
+    (lambda hl: 'p' in hl and 'ynno' in hl and 'bie' in hl, 'Current_Ratio'),
+    (lambda hl: 'płynność bieżąca' in hl, 'Current_Ratio'),
+)
+
+
+def map_header(h: str) -> str:
+    """Mapuje nagłówki z BiznesRadar na standardowe nazwy kolumn"""
+    h_lower = h.lower()
+    
+    exact = _HEADER_EXACT.get(h_lower)
+    if exact is not None:
+        return exact
+    
+    for matches, mapped in _HEADER_RULES:
+        if matches(h_lower):
+            return mapped
     
     return h
 
@@ -169,30 +279,37 @@ def load_data(filepath: str) -> Optional[pd.DataFrame]:
     
     logger.info(f"Wczytuję dane z '{filepath}'")
     
-    with open(filepath, 'r', encoding='utf-8') as f:
-        lines = f.readlines()
-    
-    data_lines = []
     header_line = None
-    
-    for line in lines:
-        line = line.strip()
-        if not line:
-            continue
-        
-        if 'Profil' in line and ('ROE' in line or 'Cena' in line or 'ROA' in line or 'EV' in line):
-            if header_line is None:
-                header_line = line
-            continue
-        
-        if 'w radarze' in line.lower() or 'ulubione' in line.lower() or 'znajdź' in line.lower():
-            continue
-        
-        if re.match(r'^[A-Z0-9]+[\s\(]', line):
-            first_word = line.split('\t')[0].split()[0].upper()
-            if first_word in ['PROFIL', 'ROE', 'ROA', 'RAPORT', 'CENA', 'RYNEK']:
+    # Zaakceptowane linie danych (już oczyszczone) trafiają do bufora dla parsera C
+    buffer = io.StringIO()
+    n_parts = []
+    
+    # Plik czytany strumieniowo, linia po linii (bez readlines)
+    with open(filepath, 'r', encoding='utf-8', buffering=1 << 20) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            
+            if 'Profil' in line and ('ROE' in line or 'Cena' in line or 'ROA' in line or 'EV' in line):
+                if header_line is None:
+                    header_line = line
                 continue
-            data_lines.append(line)
+            
+            line_lower = line.lower()
+            if 'w radarze' in line_lower or 'ulubione' in line_lower or 'znajdź' in line_lower:
+                continue
+            
+            if _DATA_LINE_RE.match(line):
+                first_word = line.split('\t', 1)[0].split()[0].upper()
+                if first_word in ['PROFIL', 'ROE', 'ROA', 'RAPORT', 'CENA', 'RYNEK']:
+                    continue
+                tabs = line.count('\t')
+                if tabs < 4:
+                    continue
+                buffer.write(line)
+                buffer.write('\n')
+                n_parts.append(tabs + 1)
     
     if not header_line:
         logger.error(f"Nie znaleziono nagłówka w pliku '{filepath}'")
@@ -201,25 +318,42 @@ def load_data(filepath: str) -> Optional[pd.DataFrame]:
     headers = header_line.split('\t')
     header_map = {h.strip(): map_header(h.strip()) for h in headers}
     
-    rows = []
-    for line in data_lines:
-        parts = line.split('\t')
-        if len(parts) < 5:
-            continue
-        
-        row = {}
-        for i, h in enumerate(headers):
-            if i < len(parts):
-                mapped = header_map.get(h.strip(), h.strip())
-                row[mapped] = parts[i]
-        
-        row['Ticker'] = parse_ticker(row.get('Ticker', ''))
-        if not row['Ticker']:
-            continue
-        
-        rows.append(row)
+    # Kolumna -> indeks pola (przy zdublowanym nagłówku wygrywa ostatni, jak w dict wiersza)
+    col_index = {}
+    for i, h in enumerate(headers):
+        col_index[header_map.get(h.strip(), h.strip())] = i
     
-    df = pd.DataFrame(rows)
+    if not n_parts or 'Ticker' not in col_index:
+        logger.error(f"Brak danych w pliku '{filepath}'")
+        return None
+    
+    # Tokenizacja parserem C; pola nadmiarowe ignorowane, wartości bez konwersji (str)
+    buffer.seek(0)
+    raw = pd.read_csv(buffer, sep='\t', header=None, names=range(len(headers)),
+                      usecols=range(len(headers)), index_col=False, dtype=str,
+                      na_filter=False, quoting=csv.QUOTE_NONE, engine='c')
+    
+    # Pola spoza krótszych linii to braki (NaN), a nie puste stringi
+    n_parts = np.asarray(n_parts)
+    data = {}
+    for name, i in col_index.items():
+        values = raw[i]
+        if (n_parts <= i).any():
+            values = values.where(n_parts > i)
+            # Kolumny bez żadnej wartości nie powstawały też z listy słowników
+            if values.isna().all():
+                continue
+        data[name] = values
+    if 'Ticker' not in data:
+        logger.error(f"Brak danych w pliku '{filepath}'")
+        return None
+    df = pd.DataFrame(data)
+    
+    # Wiersze bez tickera odrzucone
+    tickers = _vec_parse_ticker(df['Ticker'])
+    keep = (tickers.notna() & (tickers != '')).to_numpy(dtype=bool)
+    df['Ticker'] = tickers
+    df = df[keep].reset_index(drop=True)
     
     if len(df) == 0:
         logger.error(f"Brak danych w pliku '{filepath}'")
@@ -237,7 +371,7 @@ def load_data(filepath: str) -> Optional[pd.DataFrame]:
                     'P_BV_QQ', 'P_BV_YY', 'P_E_QQ', 'P_E_YY']
     for col in percent_cols:
         if col in df.columns:
-            df[col] = df[col].apply(parse_percent)
+            df[col] = _vec_parse_percent(df[col])
     
     # Konwersja kolumn numerycznych
     numeric_cols = ['P_EBIT', 'P_E', 'P_BV', 'Debt_Ratio', 'Asset_Coverage',
@@ -246,20 +380,47 @@ def load_data(filepath: str) -> Optional[pd.DataFrame]:
                     'EV_EBITDA']
     for col in numeric_cols:
         if col in df.columns:
-            df[col] = df[col].apply(lambda x: parse_percent(x) if pd.notna(x) else 0)
+            df[col] = _vec_parse_percent(df[col])
+    
+    # Rynek ma kilka wartości (GPW/NC) - kategoria zamiast stringa w każdym wierszu
+    if 'Rynek' in df.columns:
+        df['Rynek'] = df['Rynek'].astype('category')
     
     logger.info(f"Wczytano {len(df)} spółek z '{os.path.basename(filepath)}'")
     return df
 
 
+# Ścieżka bezwzględna -> (sygnatura pliku, sparsowany config)
+_CONFIG_CACHE: Dict[str, tuple] = {}
+_CONFIG_LOCK = threading.Lock()
+
+
 def load_config(config_path: str) -> dict:
-    """Wczytuje konfigurację YAML"""
+    """
+    Wczytuje konfigurację YAML (brak pliku -> {}).
+    
+    Plik parsowany jest raz na wersję: wpis cache kluczowany ścieżką bezwzględną,
+    ważny dopóki zgadza się sygnatura (mtime_ns, rozmiar, inode) - zmiana lub podmiana
+    pliku nadpisuje wpis. Dostęp do cache pod blokadą (run.py --threads).
+    Zwraca głęboką kopię, bo skanery mogą modyfikować config.
+    load_config.cache_clear() wymusza ponowne parsowanie (jak w functools.lru_cache).
+    """
     if not os.path.exists(config_path):
         logger.warning(f"Brak pliku konfiguracji: {config_path}")
         return {}
     
-    with open(config_path, 'r', encoding='utf-8') as f:
-        return yaml.safe_load(f) or {}
+    path = os.path.abspath(config_path)
+    st = os.stat(path)
+    signature = (st.st_mtime_ns, st.st_size, st.st_ino)
+    with _CONFIG_LOCK:
+        cached = _CONFIG_CACHE.get(path)
+        if cached is None or cached[0] != signature:
+            with open(path, 'r', encoding='utf-8') as f:
+                cached = _CONFIG_CACHE[path] = (signature, yaml.load(f, Loader=SafeLoader) or {})
+    return copy.deepcopy(cached[1])
+
+
+load_config.cache_clear = _CONFIG_CACHE.clear
 
 
 class BaseScanner(ABC):
@@ -268,27 +429,88 @@ class BaseScanner(ABC):
     # Każdy skaner musi zdefiniować wymagane kolumny
     REQUIRED_COLUMNS: Set[str] = {'Ticker', 'ROE', 'ROA'}
     
+    # Czy results są posortowane po Total (run(sort=False) zostawia kolejność wejścia)
+    _results_sorted: bool = True
+    # Kolejność najlepszych wierszy z ostatniego get_top na nieposortowanych wynikach (kasowana w run)
+    _top_order: Optional[np.ndarray] = None
+    
     def __init__(self, name: str, description: str):
         self.name = name
         self.description = description
         self.weights: Dict[str, float] = {}
         self.results: Optional[pd.DataFrame] = None
+        self.flag_bits: Dict[str, int] = {}
         self.logger = logging.getLogger(f"scanner.{self.__class__.__name__}")
     
+    def __init_subclass__(cls, **kwargs):
+        """Skaner musi zdefiniować flagi: get_flags (per wiersz) lub flag_masks (wektorowo)"""
+        super().__init_subclass__(**kwargs)
+        # Pośrednie klasy abstrakcyjne (bez score) sprawdzane są dopiero w konkretnych podklasach
+        if getattr(cls.score, '__isabstractmethod__', False):
+            return
+        if cls.get_flags is BaseScanner.get_flags and cls.flag_masks is BaseScanner.flag_masks:
+            raise TypeError(f"{cls.__name__} musi zdefiniować get_flags lub flag_masks")
+    
     @abstractmethod
     def score(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Oblicza score dla każdej spółki. Musi zwrócić df z kolumną 'Total'"""
+        """
+        Oblicza score dla każdej spółki. Musi zwrócić df z kolumną 'Total'.
+        Nie modyfikuje wejściowego df - zwraca nową ramkę z kolumnami S_* i Total
+        (df.assign, bez osobnego df.copy()).
+        """
         pass
     
-    @abstractmethod
+    def flag_masks(self, df: pd.DataFrame) -> Optional[List[Tuple[str, np.ndarray]]]:
+        """
+        Flagi wektorowo: lista (token, maska bool po wierszach df) w kolejności
+        wyświetlania. None (domyślnie) - flagi liczone per wiersz przez get_flags.
+        """
+        return None
+    
     def get_flags(self, row) -> str:
-        """Zwraca flagi jako string do wyświetlania"""
-        pass
+        """Zwraca flagi jako string do wyświetlania (domyślnie z flag_masks)"""
+        masks = self.flag_masks(row.to_frame().T)
+        return ''.join(f'[{token}]' for token, mask in masks if mask[0])
     
     def get_flags_list(self, row) -> List[str]:
         """Zwraca flagi jako listę (do programowego filtrowania)"""
-        flags_str = self.get_flags(row)
-        return re.findall(r'\[([A-Z!?]+)\]', flags_str)
+        masks = self.flag_masks(row.to_frame().T)
+        if masks is not None:
+            return [token for token, mask in masks if mask[0]]
+        return _FLAG_TOKEN_RE.findall(self.get_flags(row))
+    
+    def _build_flags(self, df: pd.DataFrame) -> Tuple[List[str], List[List[str]], Optional[np.ndarray]]:
+        """
+        Kolumny Flags, Flags_List i Flags_Bits w jednym przejściu.
+        Flags_Bits: bit na token (self.flag_bits), None gdy tokenów jest więcej niż 63.
+        """
+        masks = self.flag_masks(df)
+        if masks is None:
+            flags = df.apply(self.get_flags, axis=1).tolist()
+            flags_list = [_FLAG_TOKEN_RE.findall(f) for f in flags]
+            # Słownik tokenów w kolejności pojawiania się
+            tokens = list(dict.fromkeys(token for row in flags_list for token in row))
+            self.flag_bits = {token: 1 << i for i, token in enumerate(tokens)}
+            if len(tokens) > 63:
+                return flags, flags_list, None
+            bits = np.fromiter((sum(self.flag_bits[token] for token in set(row)) for row in flags_list),
+                               dtype=np.int64, count=len(flags_list))
+            return flags, flags_list, bits
+        
+        tokens = [token for token, _ in masks]
+        self.flag_bits = {token: 1 << i for i, token in enumerate(tokens)}
+        if not masks:
+            return [''] * len(df), [[] for _ in range(len(df))], np.zeros(len(df), dtype=np.int64)
+        matrix = np.stack([np.asarray(mask, dtype=bool) for _, mask in masks], axis=1)
+        flags_list = [[token for token, on in zip(tokens, row) if on] for row in matrix.tolist()]
+        flags = [''.join(f'[{token}]' for token in row) for row in flags_list]
+        if len(tokens) > 63:
+            return flags, flags_list, None
+        # Zdublowany token w masks: bit ustawiony, gdy którakolwiek maska jest prawdziwa
+        bits = np.zeros(len(df), dtype=np.int64)
+        for (token, _), column in zip(masks, matrix.T):
+            bits[column] |= self.flag_bits[token]
+        return flags, flags_list, bits
     
     def validate_data(self, df: pd.DataFrame) -> bool:
         """Sprawdza czy dane zawierają wymagane kolumny"""
@@ -298,22 +520,79 @@ class BaseScanner(ABC):
             return False
         return True
     
+    def _score_in_sweet_spot_vec(self, values: np.ndarray, sweet_min: float, sweet_max: float,
+                                 suspicious: float, floor: float = 10) -> np.ndarray:
+        """
+        Uniwersalna funkcja scoringu dla sweet spot, na całej kolumnie.
+        Najwyższy score w przedziale [sweet_min, sweet_max].
+        Kara za zbyt niskie i zbyt wysokie (podejrzane) wartości.
+        Każdy przedział liczy tylko swoją formułę (przypisanie przez maskę).
+        """
+        values = np.asarray(values, dtype=np.float64)
+        if HAS_NUMBA:
+            return _sweet_spot_kernel(values, float(sweet_min), float(sweet_max),
+                                      float(suspicious), float(floor))
+        
+        low = sweet_min * 0.3
+        low_span = sweet_min - low
+        high_span = suspicious - sweet_max
+        extreme = suspicious * 2
+        
+        out = np.full_like(values, floor)          # Ujemne
+        
+        # Bardzo niski
+        m = (values >= 0) & (values < low)
+        out[m] = floor + (values[m] / low) * 20
+        # Poniżej sweet spot - rośnie do 80
+        m = (values >= low) & (values < sweet_min)
+        out[m] = 30 + (values[m] - low) / low_span * 50
+        # Sweet spot - 100
+        out[(values >= sweet_min) & (values <= sweet_max)] = 100
+        # Powyżej sweet spot - spada do 60
+        m = (values > sweet_max) & (values <= suspicious)
+        out[m] = 100 - (values[m] - sweet_max) / high_span * 40
+        # Wysoki - spada do 40
+        m = (values > suspicious) & (values <= extreme)
+        out[m] = 60 - (values[m] - suspicious) / suspicious * 20
+        # Ekstremalny - podejrzany (także NaN; fmax jak max() Pythona, więc NaN -> floor)
+        m = ~(values <= extreme)
+        out[m] = np.fmax(floor, 40 - (values[m] - extreme) / 100)
+        
+        return out
+    
+    def weighted_total(self, components: List[Tuple[np.ndarray, str]]) -> np.ndarray:
+        """
+        Suma ważona komponentów: [(score, klucz wagi), ...] -> (N, K) @ wagi.
+        Jedno mnożenie macierzy zamiast K mnożeń i K-1 dodawań na tablicach tymczasowych.
+        """
+        scores = np.column_stack([score for score, _ in components]).astype(np.float64, copy=False)
+        weights = np.array([self.weights[key] for _, key in components], dtype=np.float64)
+        return scores @ weights
+    
     def normalize_scores(self, df: pd.DataFrame) -> pd.DataFrame:
         """Normalizuje score do zakresu 0-100"""
         if 'Total' not in df.columns:
             return df
         
-        min_score = df['Total'].min()
-        max_score = df['Total'].max()
+        total = df['Total'].to_numpy(dtype=np.float64)
+        if len(total) == 0 or np.isnan(total).all():
+            return df
+        
+        # min/max na tablicy NumPy (NaN pomijane jak w pandas), skala liczona raz
+        min_score = np.nanmin(total)
+        max_score = np.nanmax(total)
         
         if max_score > min_score:
             df['Total_Raw'] = df['Total']
-            df['Total'] = ((df['Total'] - min_score) / (max_score - min_score)) * 100
+            df['Total'] = (total - min_score) * (100.0 / (max_score - min_score))
         
         return df
     
-    def run(self, df: pd.DataFrame, normalize: bool = True) -> Optional[pd.DataFrame]:
-        """Uruchamia skaner i zwraca posortowane wyniki"""
+    def run(self, df: pd.DataFrame, normalize: bool = True, sort: bool = True) -> Optional[pd.DataFrame]:
+        """
+        Uruchamia skaner i zwraca posortowane wyniki.
+        sort=False: bez pełnego sortowania i kolumny Rank (np. gdy potrzebny tylko get_top).
+        """
         self.logger.info(f"Uruchamiam skaner: {self.name}")
         
         if not self.validate_data(df):
@@ -324,10 +603,17 @@ class BaseScanner(ABC):
         if normalize:
             self.results = self.normalize_scores(self.results)
         
-        self.results['Flags'] = self.results.apply(self.get_flags, axis=1)
-        self.results['Flags_List'] = self.results.apply(self.get_flags_list, axis=1)
-        self.results = self.results.sort_values('Total', ascending=False).reset_index(drop=True)
-        self.results['Rank'] = range(1, len(self.results) + 1)
+        flags, flags_list, flags_bits = self._build_flags(self.results)
+        self.results['Flags'] = flags
+        self.results['Flags_List'] = flags_list
+        if flags_bits is not None:
+            self.results['Flags_Bits'] = flags_bits
+        self._results_sorted = sort
+        self._top_order = None
+        if sort:
+            # ignore_index: jedna kopia przy sortowaniu zamiast drugiej w reset_index
+            self.results = self.results.sort_values('Total', ascending=False, ignore_index=True)
+            self.results['Rank'] = np.arange(1, len(self.results) + 1, dtype=np.int32)
         
         self.logger.info(f"Przetworzono {len(self.results)} spółek")
         return self.results
@@ -336,7 +622,22 @@ class BaseScanner(ABC):
         """Zwraca top N wyników"""
         if self.results is None:
             return None
-        return self.results.head(n)
+        if self._results_sorted:
+            return self.results.head(n)
+        
+        # Wyniki nieposortowane - argpartition wybiera N najlepszych w O(len), sortowane jest tylko N.
+        # Kolejność zapamiętana: kolejne get_top z mniejszym (lub równym) N to tylko wycinek
+        order = self._top_order
+        if order is None or (len(order) < n and len(order) < len(self.results)):
+            total = self.results['Total'].to_numpy(dtype=np.float64)
+            if n < len(total):
+                idx = np.argpartition(-total, n)[:n]
+            else:
+                idx = np.arange(len(total))
+            order = self._top_order = idx[np.argsort(-total[idx], kind='stable')]
+        top = self.results.iloc[order[:n]].reset_index(drop=True)
+        top['Rank'] = np.arange(1, len(top) + 1, dtype=np.int32)
+        return top
     
     def get_output_columns(self) -> List[str]:
         """Zwraca listę kolumn do eksportu. Override w klasach dziedziczących."""
@@ -351,6 +652,21 @@ class BaseScanner(ABC):
         if self.results is None:
             return pd.DataFrame()
         
+        if 'Flags_Bits' in self.results.columns:
+            # Bity tokenów; flaga spoza słownika skanera nie występuje u żadnej spółki
+            known = [f for f in flags if f in self.flag_bits]
+            required = 0
+            for f in known:
+                required |= self.flag_bits[f]
+            bits = self.results['Flags_Bits'].to_numpy()
+            if mode == 'any':
+                mask = (bits & required) != 0
+            elif len(known) < len(set(flags)):
+                mask = np.zeros(len(bits), dtype=bool)
+            else:  # all
+                mask = (bits & required) == required
+            return self.results[mask]
+        
         if mode == 'any':
             mask = self.results['Flags_List'].apply(lambda x: bool(set(x) & set(flags)))
         else:  # all
@@ -15,9 +15,183 @@ SKANERY_DIR = os.path.dirname(SCANNER_DIR)
 BASE_DIR = os.path.dirname(SKANERY_DIR)
 sys.path.insert(0, SKANERY_DIR)
 
+import numpy as np
 import pandas as pd
-from typing import Set, List
-from base import BaseScanner, load_data, load_config
+from typing import Set, List, Tuple
+from base import BaseScanner, load_data, load_config, column_values, piecewise_linear, POSITIVE_MIN, njit, HAS_NUMBA
+
+
+# =============================================================================
+# PROGI BILANSU - (breakpoints, slopes, intercepts) dla piecewise_linear
+# =============================================================================
+
+# Zadłużenie: <=0: 50, <0.15: 100, <0.30: 90, <0.45: 70, <0.60: 50, dalej 50 - (d - 0.6) * 100
+_DEBT_SEGMENTS = (
+    np.array([POSITIVE_MIN, 0.15, 0.30, 0.45, 0.60]),
+    np.array([0.0, 0.0, 0.0, 0.0, 0.0, -100.0]),
+    np.array([50.0, 100.0, 90.0, 70.0, 50.0, 110.0]),
+)
+
+# Płynność bieżąca: <=0: 30, <1.0: 20, <1.5: 50, <3.0: 80, <6.0: 100, dalej 90
+_LIQUIDITY_SEGMENTS = (
+    np.array([POSITIVE_MIN, 1.0, 1.5, 3.0, 6.0]),
+    np.zeros(6),
+    np.array([30.0, 20.0, 50.0, 80.0, 100.0, 90.0]),
+)
+
+# I stopień pokrycia: <=0: 30, <1.0: 30, <1.5: 60, <3.0: 90, dalej 100
+_COVERAGE_SEGMENTS = (
+    np.array([POSITIVE_MIN, 1.0, 1.5, 3.0]),
+    np.zeros(5),
+    np.array([30.0, 30.0, 60.0, 90.0, 100.0]),
+)
+
+
+# =============================================================================
+# KERNELE NUMBA - te same progi co np.select, jedna pętla z drabinką if/elif
+# (używane tylko gdy numba jest dostępna)
+# =============================================================================
+
+@njit(cache=True)
+def _cash_quality_kernel(cash_conv):
+    out = np.empty_like(cash_conv)
+    for i in range(cash_conv.size):
+        x = cash_conv[i]
+        if x < 0:
+            out[i] = 10.0
+        elif x < 20:
+            out[i] = 30.0
+        elif x < 50:
+            out[i] = 50.0 + x * 0.6
+        elif x < 100:
+            out[i] = 80.0 + (x - 50.0) * 0.4
+        elif x < 150:
+            out[i] = 100.0
+        elif x < 200:
+            out[i] = 90.0
+        else:
+            out[i] = 70.0
+    return out
+
+
+@njit(cache=True)
+def _balance_sheet_kernel(debt, liquidity, coverage):
+    out = np.empty_like(debt)
+    for i in range(debt.size):
+        d = debt[i]
+        if d <= 0:
+            debt_score = 50.0
+        elif d < 0.15:
+            debt_score = 100.0
+        elif d < 0.30:
+            debt_score = 90.0
+        elif d < 0.45:
+            debt_score = 70.0
+        elif d < 0.60:
+            debt_score = 50.0
+        else:
+            debt_score = max(20.0, 50.0 - (d - 0.6) * 100)
+        
+        lq = liquidity[i]
+        if lq <= 0:
+            liq_score = 30.0
+        elif lq < 1.0:
+            liq_score = 20.0
+        elif lq < 1.5:
+            liq_score = 50.0
+        elif lq < 3.0:
+            liq_score = 80.0
+        elif lq < 6.0:
+            liq_score = 100.0
+        else:
+            liq_score = 90.0
+        
+        c = coverage[i]
+        if c <= 0:
+            cov_score = 30.0
+        elif c < 1.0:
+            cov_score = 30.0
+        elif c < 1.5:
+            cov_score = 60.0
+        elif c < 3.0:
+            cov_score = 90.0
+        else:
+            cov_score = 100.0
+        
+        out[i] = debt_score * 0.40 + liq_score * 0.30 + cov_score * 0.30
+    return out
+
+
+@njit(cache=True)
+def _profitability_kernel(roe, roa, margin):
+    out = np.empty_like(roe)
+    for i in range(roe.size):
+        r = roe[i]
+        if r <= 0:
+            roe_score = 0.0
+        elif r < 10:
+            roe_score = r * 5
+        elif r < 20:
+            roe_score = 50 + (r - 10) * 3
+        elif r < 30:
+            roe_score = 80 + (r - 20) * 2
+        elif r < 50:
+            roe_score = 100.0
+        else:
+            roe_score = 95.0
+        
+        a = roa[i]
+        if a <= 0:
+            roa_score = 0.0
+        elif a < 5:
+            roa_score = a * 10
+        elif a < 10:
+            roa_score = 50 + (a - 5) * 6
+        elif a < 20:
+            roa_score = 80 + (a - 10) * 2
+        else:
+            roa_score = 100.0
+        
+        m = margin[i]
+        if m <= 0:
+            margin_score = 0.0
+        elif m < 5:
+            margin_score = m * 8
+        elif m < 10:
+            margin_score = 40 + (m - 5) * 6
+        elif m < 20:
+            margin_score = 70 + (m - 10) * 2
+        elif m < 30:
+            margin_score = 90 + (m - 20)
+        else:
+            margin_score = 100.0
+        
+        out[i] = roe_score * 0.40 + roa_score * 0.30 + margin_score * 0.30
+    return out
+
+
+@njit(cache=True)
+def _value_kernel(pe):
+    out = np.empty_like(pe)
+    for i in range(pe.size):
+        x = pe[i]
+        if x <= 0:
+            out[i] = 20.0
+        elif x < 3:
+            out[i] = 50.0
+        elif x < 6:
+            out[i] = 90.0
+        elif x < 10:
+            out[i] = 100.0
+        elif x < 15:
+            out[i] = 80.0
+        elif x < 20:
+            out[i] = 60.0
+        elif x < 30:
+            out[i] = 40.0
+        else:
+            out[i] = max(10.0, 40 - (x - 30))
+    return out
 
 
 class CashQualityScanner(BaseScanner):
@@ -51,210 +225,174 @@ class CashQualityScanner(BaseScanner):
             'value': wagi.get('value', 0.20)
         }
     
-    def _score_cash_quality(self, row) -> float:
+    # Komponenty liczone wektorowo: progi jako maski np.select na całych kolumnach
+    
+    def _score_cash_quality(self, df: pd.DataFrame) -> np.ndarray:
         """
         Ocenia jakość zysków na podstawie udziału w przepływach operacyjnych.
         Wysoki udział = zyski są realne (gotówka), nie papierowe.
         """
-        cash_conv = row.get('Cash_Conv', 0)
+        cash_conv = column_values(df, 'Cash_Conv')
+        if HAS_NUMBA:
+            return _cash_quality_kernel(cash_conv)
         
-        if cash_conv < 0:
-            return 10  # Negatywny - zyski papierowe
-        elif cash_conv < 20:
-            return 30  # Słaby
-        elif cash_conv < 50:
-            return 50 + cash_conv * 0.6  # 50-80
-        elif cash_conv < 100:
-            return 80 + (cash_conv - 50) * 0.4  # 80-100
-        elif cash_conv < 150:
-            return 100  # Sweet spot
-        elif cash_conv < 200:
-            return 90  # Bardzo wysoki
-        else:
-            return 70  # Ekstremalnie wysoki - weryfikuj
+        return np.select(
+            [cash_conv < 0, cash_conv < 20, cash_conv < 50, cash_conv < 100, cash_conv < 150, cash_conv < 200],
+            [
+                10,                             # Negatywny - zyski papierowe
+                30,                             # Słaby
+                50 + cash_conv * 0.6,           # 50-80
+                80 + (cash_conv - 50) * 0.4,    # 80-100
+                100,                            # Sweet spot
+                90,                             # Bardzo wysoki
+            ],
+            default=70                          # Ekstremalnie wysoki - weryfikuj
+        )
     
-    def _score_balance_sheet(self, row) -> float:
+    def _score_balance_sheet(self, df: pd.DataFrame) -> np.ndarray:
         """
         Ocenia solidność bilansu:
         - Zadłużenie ogólne (40%)
         - Płynność bieżąca (30%)
         - I stopień pokrycia (30%)
         """
-        debt = row.get('Debt_Ratio', 0)
-        liquidity = row.get('Current_Ratio', 0)
-        coverage = row.get('Coverage_I', 0)
+        debt = column_values(df, 'Debt_Ratio')
+        liquidity = column_values(df, 'Current_Ratio')
+        coverage = column_values(df, 'Coverage_I')
+        if HAS_NUMBA:
+            return _balance_sheet_kernel(debt, liquidity, coverage)
         
-        # Zadłużenie (40%) - im niższe tym lepiej
-        if debt <= 0:
-            debt_score = 50  # Brak danych
-        elif debt < 0.15:
-            debt_score = 100
-        elif debt < 0.30:
-            debt_score = 90
-        elif debt < 0.45:
-            debt_score = 70
-        elif debt < 0.60:
-            debt_score = 50
-        else:
-            debt_score = max(20, 50 - (debt - 0.6) * 100)
+        # Zadłużenie (40%) - im niższe tym lepiej (<= 0: brak danych), powyżej 0.6 liniowo w dół do 20
+        debt_score = np.fmax(20, piecewise_linear(debt, *_DEBT_SEGMENTS))
         
-        # Płynność bieżąca (30%)
-        if liquidity <= 0:
-            liq_score = 30  # Brak danych
-        elif liquidity < 1.0:
-            liq_score = 20  # Problemy z płynnością
-        elif liquidity < 1.5:
-            liq_score = 50
-        elif liquidity < 3.0:
-            liq_score = 80
-        elif liquidity < 6.0:
-            liq_score = 100
-        else:
-            liq_score = 90  # Bardzo wysoka (może nieefektywna?)
+        # Płynność bieżąca (30%) - <= 0: brak danych, < 1.0: problemy z płynnością,
+        # >= 6.0: bardzo wysoka (może nieefektywna?)
+        liq_score = piecewise_linear(liquidity, *_LIQUIDITY_SEGMENTS)
         
         # I stopień pokrycia (30%) - złota reguła finansowania
-        if coverage <= 0:
-            cov_score = 30  # Brak danych
-        elif coverage < 1.0:
-            cov_score = 30  # Złota reguła naruszona
-        elif coverage < 1.5:
-            cov_score = 60
-        elif coverage < 3.0:
-            cov_score = 90
-        else:
-            cov_score = 100
+        # (<= 0: brak danych, < 1.0: złota reguła naruszona)
+        cov_score = piecewise_linear(coverage, *_COVERAGE_SEGMENTS)
         
         return debt_score * 0.40 + liq_score * 0.30 + cov_score * 0.30
     
-    def _score_profitability(self, row) -> float:
+    def _score_profitability(self, df: pd.DataFrame) -> np.ndarray:
         """
         Ocenia rentowność biznesu:
         - ROE (40%)
         - ROA (30%)
         - Marża operacyjna (30%)
         """
-        roe = row.get('ROE', 0)
-        roa = row.get('ROA', 0)
-        margin = row.get('OpMargin', 0)
+        roe = column_values(df, 'ROE')
+        roa = column_values(df, 'ROA')
+        margin = column_values(df, 'OpMargin')
+        if HAS_NUMBA:
+            return _profitability_kernel(roe, roa, margin)
         
         # ROE (40%)
-        if roe <= 0:
-            roe_score = 0
-        elif roe < 10:
-            roe_score = roe * 5  # 0-50
-        elif roe < 20:
-            roe_score = 50 + (roe - 10) * 3  # 50-80
-        elif roe < 30:
-            roe_score = 80 + (roe - 20) * 2  # 80-100
-        elif roe < 50:
-            roe_score = 100
-        else:
-            roe_score = 95  # Bardzo wysoki (zweryfikuj dźwignię)
+        roe_score = np.select(
+            [roe <= 0, roe < 10, roe < 20, roe < 30, roe < 50],
+            [
+                0,
+                roe * 5,                # 0-50
+                50 + (roe - 10) * 3,    # 50-80
+                80 + (roe - 20) * 2,    # 80-100
+                100,
+            ],
+            default=95                  # Bardzo wysoki (zweryfikuj dźwignię)
+        )
         
         # ROA (30%)
-        if roa <= 0:
-            roa_score = 0
-        elif roa < 5:
-            roa_score = roa * 10  # 0-50
-        elif roa < 10:
-            roa_score = 50 + (roa - 5) * 6  # 50-80
-        elif roa < 20:
-            roa_score = 80 + (roa - 10) * 2  # 80-100
-        else:
-            roa_score = 100
+        roa_score = np.select(
+            [roa <= 0, roa < 5, roa < 10, roa < 20],
+            [
+                0,
+                roa * 10,               # 0-50
+                50 + (roa - 5) * 6,     # 50-80
+                80 + (roa - 10) * 2,    # 80-100
+            ],
+            default=100
+        )
         
         # Marża operacyjna (30%)
-        if margin <= 0:
-            margin_score = 0
-        elif margin < 5:
-            margin_score = margin * 8  # 0-40
-        elif margin < 10:
-            margin_score = 40 + (margin - 5) * 6  # 40-70
-        elif margin < 20:
-            margin_score = 70 + (margin - 10) * 2  # 70-90
-        elif margin < 30:
-            margin_score = 90 + (margin - 20)  # 90-100
-        else:
-            margin_score = 100
+        margin_score = np.select(
+            [margin <= 0, margin < 5, margin < 10, margin < 20, margin < 30],
+            [
+                0,
+                margin * 8,                 # 0-40
+                40 + (margin - 5) * 6,      # 40-70
+                70 + (margin - 10) * 2,     # 70-90
+                90 + (margin - 20),         # 90-100
+            ],
+            default=100
+        )
         
         return roe_score * 0.40 + roa_score * 0.30 + margin_score * 0.30
     
-    def _score_value(self, row) -> float:
+    def _score_value(self, df: pd.DataFrame) -> np.ndarray:
         """
         Ocenia wycenę - nie przepłacamy za jakość.
         """
-        pe = row.get('P_E', 0)
+        pe = column_values(df, 'P_E')
+        if HAS_NUMBA:
+            return _value_kernel(pe)
         
-        if pe <= 0:
-            return 20  # Ujemny P/E lub brak danych
-        elif pe < 3:
-            return 50  # Bardzo niski - value trap?
-        elif pe < 6:
-            return 90
-        elif pe < 10:
-            return 100  # Sweet spot
-        elif pe < 15:
-            return 80
-        elif pe < 20:
-            return 60
-        elif pe < 30:
-            return 40
-        else:
-            return max(10, 40 - (pe - 30))
+        return np.select(
+            [pe <= 0, pe < 3, pe < 6, pe < 10, pe < 15, pe < 20, pe < 30],
+            [
+                20,     # Ujemny P/E lub brak danych
+                50,     # Bardzo niski - value trap?
+                90,
+                100,    # Sweet spot
+                80,
+                60,
+                40,
+            ],
+            default=np.fmax(10, 40 - (pe - 30))
+        )
     
     def score(self, df: pd.DataFrame) -> pd.DataFrame:
         """Oblicza score dla każdej spółki."""
-        df = df.copy()
-        
-        # Oblicz komponenty
-        df['S_CashQual'] = df.apply(self._score_cash_quality, axis=1)
-        df['S_Balance'] = df.apply(self._score_balance_sheet, axis=1)
-        df['S_Profit'] = df.apply(self._score_profitability, axis=1)
-        df['S_Value'] = df.apply(self._score_value, axis=1)
+        # Komponenty jako tablice NumPy - kolumny S_* powstają dopiero na końcu
+        s_cash = self._score_cash_quality(df)
+        s_balance = self._score_balance_sheet(df)
+        s_profit = self._score_profitability(df)
+        s_value = self._score_value(df)
         
         # Oblicz łączny score
-        df['Total'] = (
-            df['S_CashQual'] * self.weights['cash_quality'] +
-            df['S_Balance'] * self.weights['balance_sheet'] +
-            df['S_Profit'] * self.weights['profitability'] +
-            df['S_Value'] * self.weights['value']
-        )
+        total = self.weighted_total([
+            (s_cash, 'cash_quality'),
+            (s_balance, 'balance_sheet'),
+            (s_profit, 'profitability'),
+            (s_value, 'value'),
+        ])
+        
+        df = df.assign(S_CashQual=s_cash, S_Balance=s_balance, S_Profit=s_profit,
+                       S_Value=s_value, Total=total)
         
         return df
     
-    def get_flags(self, row) -> str:
-        """Generuje flagi dla spółki."""
-        flags = []
-        
-        # [C] Cash King - wysoka konwersja gotówkowa
-        if row.get('Cash_Conv', 0) > 100:
-            flags.append('[C]')
-        
-        # [B] Strong Balance - solidny bilans
-        if row.get('Debt_Ratio', 1) < 0.25 and row.get('Current_Ratio', 0) > 3:
-            flags.append('[B]')
-        
-        # [Q] Quality - wysoka rentowność
-        if row.get('ROE', 0) > 25 and row.get('ROA', 0) > 15:
-            flags.append('[Q]')
-        
-        # [V] Value - dobra wycena
-        if 0 < row.get('P_E', 0) < 10:
-            flags.append('[V]')
+    def flag_masks(self, df: pd.DataFrame) -> List[Tuple[str, np.ndarray]]:
+        """Generuje flagi dla spółek (maski po kolumnach)."""
+        cash_conv = column_values(df, 'Cash_Conv')
+        current_ratio = column_values(df, 'Current_Ratio')
+        pe = column_values(df, 'P_E')
         
-        # [L] Liquid - bardzo wysoka płynność
-        if row.get('Current_Ratio', 0) > 5:
-            flags.append('[L]')
-        
-        # [!] Warning - niska konwersja gotówkowa
-        if row.get('Cash_Conv', 100) < 20:
-            flags.append('[!]')
-        
-        # [?] Verify - ekstremalna konwersja (jednorazowe?)
-        if row.get('Cash_Conv', 0) > 200:
-            flags.append('[?]')
-        
-        return ''.join(flags)
+        return [
+            # [C] Cash King - wysoka konwersja gotówkowa
+            ('C', cash_conv > 100),
+            # [B] Strong Balance - solidny bilans
+            ('B', (column_values(df, 'Debt_Ratio', 1) < 0.25) & (current_ratio > 3)),
+            # [Q] Quality - wysoka rentowność
+            ('Q', (column_values(df, 'ROE') > 25) & (column_values(df, 'ROA') > 15)),
+            # [V] Value - dobra wycena
+            ('V', (pe > 0) & (pe < 10)),
+            # [L] Liquid - bardzo wysoka płynność
+            ('L', current_ratio > 5),
+            # [!] Warning - niska konwersja gotówkowa
+            ('!', column_values(df, 'Cash_Conv', 100) < 20),
+            # [?] Verify - ekstremalna konwersja (jednorazowe?)
+            ('?', cash_conv > 200),
+        ]
     
     def get_output_columns(self) -> List[str]:
         """Zwraca listę kolumn do eksportu."""
@@ -266,6 +404,10 @@ class CashQualityScanner(BaseScanner):
         ]
 
 
+# Klasa skanera dla run.py (bez przeszukiwania modułu)
+__scanner_class__ = CashQualityScanner
+
+
 # Standalone run
 if __name__ == "__main__":
     import logging
@@ -289,7 +431,7 @@ if __name__ == "__main__":
             print(f"{'Rank':<5} {'Ticker':<10} {'Flags':<14} {'Score':<7} {'CashConv':<9} {'Debt':<6} {'ROE%':<7} {'P/E':<7}")
             print("-" * 80)
             
-            for _, row in scanner.get_top(10).iterrows():
+            for row in scanner.get_top(10).to_dict('records'):
                 print(f"{row['Rank']:<5} {row['Ticker']:<10} {row['Flags']:<14} {row['Total']:<7.1f} "
                       f"{row.get('Cash_Conv', 0):<9.1f} {row.get('Debt_Ratio', 0):<6.2f} "
                       f"{row.get('ROE', 0):<7.1f} {row.get('P_E', 0):<7.2f}")
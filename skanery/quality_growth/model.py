@@ -13,9 +13,107 @@ SKANERY_DIR = os.path.dirname(SCANNER_DIR)
 BASE_DIR = os.path.dirname(SKANERY_DIR)
 sys.path.insert(0, SKANERY_DIR)
 
+import numpy as np
 import pandas as pd
-from typing import Set, List
-from base import BaseScanner, load_data, load_config
+from typing import Set, List, Tuple
+from base import BaseScanner, load_data, load_config, column_values, njit, HAS_NUMBA
+
+
+# =============================================================================
+# KERNELE NUMBA - te same progi co np.select, jedna pętla z drabinką if/elif
+# (używane tylko gdy numba jest dostępna)
+# =============================================================================
+
+@njit(cache=True)
+def _growth_kernel(ebit):
+    out = np.empty_like(ebit)
+    for i in range(ebit.size):
+        x = ebit[i]
+        if x <= 0:
+            out[i] = 20.0
+        elif x > 100:
+            out[i] = 60.0
+        elif x > 50:
+            out[i] = 90.0
+        elif x > 30:
+            out[i] = 100.0
+        elif x > 20:
+            out[i] = 85.0
+        elif x > 10:
+            out[i] = 70.0
+        else:
+            out[i] = max(20.0, x * 5)
+    return out
+
+
+@njit(cache=True)
+def _revenue_confirm_kernel(rev):
+    out = np.empty_like(rev)
+    for i in range(rev.size):
+        x = rev[i]
+        if x < 5:
+            out[i] = 30.0
+        elif x > 20:
+            out[i] = 100.0
+        else:
+            out[i] = 50 + x * 2.5
+    return out
+
+
+@njit(cache=True)
+def _value_kernel(pe, p_ebit):
+    out = np.empty_like(pe)
+    for i in range(pe.size):
+        x = pe[i]
+        if x <= 0:
+            pe_score = 0.0
+        elif x < 5:
+            pe_score = 70.0
+        elif x < 8:
+            pe_score = 100.0
+        elif x < 12:
+            pe_score = 90.0
+        elif x < 15:
+            pe_score = 70.0
+        elif x < 20:
+            pe_score = 50.0
+        else:
+            pe_score = max(0.0, 100 - (x - 20) * 3)
+        
+        y = p_ebit[i]
+        if y <= 0:
+            ebit_score = 0.0
+        elif y < 3:
+            ebit_score = 70.0
+        elif y < 6:
+            ebit_score = 100.0
+        elif y < 10:
+            ebit_score = 80.0
+        else:
+            ebit_score = max(0.0, 100 - (y - 10) * 5)
+        
+        out[i] = pe_score * 0.5 + ebit_score * 0.5
+    return out
+
+
+@njit(cache=True)
+def _pbv_sanity_kernel(pbv):
+    out = np.empty_like(pbv)
+    for i in range(pbv.size):
+        x = pbv[i]
+        if x <= 0:
+            out[i] = 0.0
+        elif x < 0.5:
+            out[i] = 40.0
+        elif x < 1.0:
+            out[i] = 70.0
+        elif x < 2.0:
+            out[i] = 100.0
+        elif x < 4.0:
+            out[i] = 80.0
+        else:
+            out[i] = max(30.0, 100 - (x - 4) * 10)
+    return out
 
 
 class QualityGrowthScanner(BaseScanner):
@@ -43,126 +141,111 @@ class QualityGrowthScanner(BaseScanner):
             'pbv_sanity': wagi.get('pbv_sanity', 0.10)
         }
     
-    def _score_quality(self, row) -> float:
-        roe = row.get('ROE', 0)
-        roa = row.get('ROA', 0)
+    # Komponenty liczone wektorowo: progi jako maski np.select na całych kolumnach
+    
+    def _score_quality(self, df: pd.DataFrame) -> np.ndarray:
+        roe = column_values(df, 'ROE')
+        roa = column_values(df, 'ROA')
         
-        roe_score = min(100, max(0, roe / 25 * 100))
-        roa_score = min(100, max(0, roa / 15 * 100))
+        roe_score = np.fmin(100, np.fmax(0, roe / 25 * 100))
+        roa_score = np.fmin(100, np.fmax(0, roa / 15 * 100))
         return roe_score * 0.6 + roa_score * 0.4
     
-    def _score_growth(self, row) -> float:
-        ebit = row.get('EBIT_3Y', 0)
+    def _score_growth(self, df: pd.DataFrame) -> np.ndarray:
+        ebit = column_values(df, 'EBIT_3Y')
+        if HAS_NUMBA:
+            return _growth_kernel(ebit)
         
-        if ebit <= 0:
-            return 20
-        elif ebit > 100:
-            return 60  # Podejrzanie wysoki
-        elif ebit > 50:
-            return 90
-        elif ebit > 30:
-            return 100  # Sweet spot
-        elif ebit > 20:
-            return 85
-        elif ebit > 10:
-            return 70
-        else:
-            return max(20, ebit * 5)
+        return np.select(
+            [ebit <= 0, ebit > 100, ebit > 50, ebit > 30, ebit > 20, ebit > 10],
+            [
+                20,
+                60,     # Podejrzanie wysoki
+                90,
+                100,    # Sweet spot
+                85,
+                70,
+            ],
+            default=np.fmax(20, ebit * 5)
+        )
     
-    def _score_revenue_confirm(self, row) -> float:
-        rev = row.get('Rev_3Y', 0)
+    def _score_revenue_confirm(self, df: pd.DataFrame) -> np.ndarray:
+        rev = column_values(df, 'Rev_3Y')
+        if HAS_NUMBA:
+            return _revenue_confirm_kernel(rev)
         
-        if rev < 5:
-            return 30
-        elif rev > 20:
-            return 100
-        else:
-            return 50 + rev * 2.5
+        return np.select([rev < 5, rev > 20], [30, 100], default=50 + rev * 2.5)
     
-    def _score_value(self, row) -> float:
-        pe = row.get('P_E', 0)
-        p_ebit = row.get('P_EBIT', 0)
+    def _score_value(self, df: pd.DataFrame) -> np.ndarray:
+        pe = column_values(df, 'P_E')
+        p_ebit = column_values(df, 'P_EBIT')
+        if HAS_NUMBA:
+            return _value_kernel(pe, p_ebit)
         
         # P/E scoring
-        if pe <= 0:
-            pe_score = 0
-        elif pe < 5:
-            pe_score = 70
-        elif pe < 8:
-            pe_score = 100
-        elif pe < 12:
-            pe_score = 90
-        elif pe < 15:
-            pe_score = 70
-        elif pe < 20:
-            pe_score = 50
-        else:
-            pe_score = max(0, 100 - (pe - 20) * 3)
+        pe_score = np.select(
+            [pe <= 0, pe < 5, pe < 8, pe < 12, pe < 15, pe < 20],
+            [0, 70, 100, 90, 70, 50],
+            default=np.fmax(0, 100 - (pe - 20) * 3)
+        )
         
         # P/EBIT scoring
-        if p_ebit <= 0:
-            ebit_score = 0
-        elif p_ebit < 3:
-            ebit_score = 70
-        elif p_ebit < 6:
-            ebit_score = 100
-        elif p_ebit < 10:
-            ebit_score = 80
-        else:
-            ebit_score = max(0, 100 - (p_ebit - 10) * 5)
+        ebit_score = np.select(
+            [p_ebit <= 0, p_ebit < 3, p_ebit < 6, p_ebit < 10],
+            [0, 70, 100, 80],
+            default=np.fmax(0, 100 - (p_ebit - 10) * 5)
+        )
         
         return pe_score * 0.5 + ebit_score * 0.5
     
-    def _score_pbv_sanity(self, row) -> float:
-        pbv = row.get('P_BV', 0)
+    def _score_pbv_sanity(self, df: pd.DataFrame) -> np.ndarray:
+        pbv = column_values(df, 'P_BV')
+        if HAS_NUMBA:
+            return _pbv_sanity_kernel(pbv)
         
-        if pbv <= 0:
-            return 0
-        elif pbv < 0.5:
-            return 40  # Value trap risk
-        elif pbv < 1.0:
-            return 70
-        elif pbv < 2.0:
-            return 100
-        elif pbv < 4.0:
-            return 80
-        else:
-            return max(30, 100 - (pbv - 4) * 10)
+        return np.select(
+            [pbv <= 0, pbv < 0.5, pbv < 1.0, pbv < 2.0, pbv < 4.0],
+            [
+                0,
+                40,     # Value trap risk
+                70,
+                100,
+                80,
+            ],
+            default=np.fmax(30, 100 - (pbv - 4) * 10)
+        )
     
     def score(self, df: pd.DataFrame) -> pd.DataFrame:
-        df = df.copy()
+        s_quality = self._score_quality(df)
+        s_growth = self._score_growth(df)
+        s_rev_conf = self._score_revenue_confirm(df)
+        s_value = self._score_value(df)
+        s_pbv = self._score_pbv_sanity(df)
         
-        df['S_Quality'] = df.apply(self._score_quality, axis=1)
-        df['S_Growth'] = df.apply(self._score_growth, axis=1)
-        df['S_RevConf'] = df.apply(self._score_revenue_confirm, axis=1)
-        df['S_Value'] = df.apply(self._score_value, axis=1)
-        df['S_PBV'] = df.apply(self._score_pbv_sanity, axis=1)
+        total = self.weighted_total([
+            (s_quality, 'quality'),
+            (s_growth, 'growth'),
+            (s_rev_conf, 'rev_confirm'),
+            (s_value, 'value'),
+            (s_pbv, 'pbv_sanity'),
+        ])
         
-        df['Total'] = (
-            df['S_Quality'] * self.weights['quality'] +
-            df['S_Growth'] * self.weights['growth'] +
-            df['S_RevConf'] * self.weights['rev_confirm'] +
-            df['S_Value'] * self.weights['value'] +
-            df['S_PBV'] * self.weights['pbv_sanity']
-        )
+        df = df.assign(S_Quality=s_quality, S_Growth=s_growth, S_RevConf=s_rev_conf,
+                       S_Value=s_value, S_PBV=s_pbv, Total=total)
         
         return df
     
-    def get_flags(self, row) -> str:
-        flags = []
-        if row.get('ROE', 0) > 25:
-            flags.append('[Q]')
-        if 30 < row.get('EBIT_3Y', 0) < 80:
-            flags.append('[G]')
-        if 5 < row.get('P_E', 0) < 10:
-            flags.append('[V]')
-        if row.get('Rev_3Y', 0) > 15:
-            flags.append('[R]')
-        if row.get('P_BV', 0) < 0.6:
-            flags.append('[!]')
-        if row.get('EBIT_3Y', 0) > 100:
-            flags.append('[?]')
-        return ''.join(flags)
+    def flag_masks(self, df: pd.DataFrame) -> List[Tuple[str, np.ndarray]]:
+        ebit = column_values(df, 'EBIT_3Y')
+        pe = column_values(df, 'P_E')
+        return [
+            ('Q', column_values(df, 'ROE') > 25),
+            ('G', (ebit > 30) & (ebit < 80)),
+            ('V', (pe > 5) & (pe < 10)),
+            ('R', column_values(df, 'Rev_3Y') > 15),
+            ('!', column_values(df, 'P_BV') < 0.6),
+            ('?', ebit > 100),
+        ]
     
     def get_output_columns(self) -> List[str]:
         return ['Rank', 'Ticker', 'Rynek', 'Flags', 'Total', 
@@ -170,6 +253,10 @@ class QualityGrowthScanner(BaseScanner):
                 'ROE', 'ROA', 'EBIT_3Y', 'Rev_3Y', 'P_E', 'P_BV']
 
 
+# Klasa skanera dla run.py (bez przeszukiwania modułu)
+__scanner_class__ = QualityGrowthScanner
+
+
 # Standalone run
 if __name__ == "__main__":
     import logging
@@ -193,6 +280,6 @@ if __name__ == "__main__":
             print(f"{'Rank':<5} {'Ticker':<8} {'Flags':<12} {'Score':<7} {'ROE%':<7} {'EBIT3Y':<8} {'P/E':<7}")
             print("-" * 70)
             
-            for _, row in scanner.get_top(10).iterrows():
+            for row in scanner.get_top(10).to_dict('records'):
                 print(f"{row['Rank']:<5} {row['Ticker']:<8} {row['Flags']:<12} {row['Total']:<7.1f} "
                       f"{row.get('ROE',0):<7.1f} {row.get('EBIT_3Y',0):<8.0f} {row.get('P_E',0):<7.2f}")
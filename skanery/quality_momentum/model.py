@@ -16,9 +16,71 @@ SKANERY_DIR = os.path.dirname(SCANNER_DIR)
 BASE_DIR = os.path.dirname(SKANERY_DIR)
 sys.path.insert(0, SKANERY_DIR)
 
+import numpy as np
 import pandas as pd
-from typing import Set, List
-from base import BaseScanner, load_data, load_config
+from dataclasses import dataclass
+from typing import Set, List, Tuple
+from base import BaseScanner, load_data, load_config, column_values, njit, HAS_NUMBA
+
+
+# =============================================================================
+# KERNELE NUMBA - jedna pętla zamiast np.where (używane tylko gdy numba jest dostępna)
+# =============================================================================
+
+@njit(cache=True)
+def _trend_metric(yy, qq):
+    if yy > 0:
+        if qq < -20:
+            return 20.0
+        elif qq < 0:
+            return 40.0
+        elif qq < yy:
+            return 70.0
+        return 100.0
+    return 30.0
+
+
+@njit(cache=True)
+def _trend_kernel(roe_yy, roe_qq, roa_yy, roa_qq, margin_op_yy, margin_op_qq):
+    out = np.empty_like(roe_yy)
+    for i in range(roe_yy.size):
+        roe = _trend_metric(roe_yy[i], roe_qq[i])
+        roa = _trend_metric(roa_yy[i], roa_qq[i])
+        margin_op = _trend_metric(margin_op_yy[i], margin_op_qq[i])
+        
+        base_score = (roe + roa + margin_op) / 3
+        acceleration_count = (roe == 100.0) + (roa == 100.0) + (margin_op == 100.0)
+        if acceleration_count >= 2:
+            base_score = min(100.0, base_score + 10)
+        out[i] = base_score
+    return out
+
+
+# =============================================================================
+# KOLUMNY WEJŚCIOWE - struct-of-arrays, wyciągany z df raz na wywołanie score()
+# =============================================================================
+
+@dataclass(slots=True)
+class _QMCols:
+    """Tablice float64 metryk scoringu (brak kolumny -> zera, jak row.get(col, 0))"""
+    roe_yy: np.ndarray
+    roe_qq: np.ndarray
+    roa_yy: np.ndarray
+    roa_qq: np.ndarray
+    margin_op_yy: np.ndarray
+    margin_op_qq: np.ndarray
+    margin_net_yy: np.ndarray
+    rev_yy: np.ndarray
+    rev_qq: np.ndarray
+    pe: np.ndarray
+    
+    # Pole -> kolumna w DataFrame (kolejność jak pola)
+    COLUMNS = ('ROE_YY', 'ROE_QQ', 'ROA_YY', 'ROA_QQ', 'Margin_Op_YY', 'Margin_Op_QQ',
+               'Margin_Net_YY', 'Rev_YY', 'Rev_QQ', 'P_E')
+    
+    @classmethod
+    def extract(cls, df: pd.DataFrame) -> '_QMCols':
+        return cls(*(column_values(df, col) for col in cls.COLUMNS))
 
 
 class QualityMomentumScanner(BaseScanner):
@@ -51,261 +113,178 @@ class QualityMomentumScanner(BaseScanner):
             'revenue_support': wagi.get('revenue_support', 0.15),
             'value': wagi.get('value', 0.10)
         }
+        
+        # Krzywe sweet spot z sekcji scoring configu (domyślnie dotychczasowe progi);
+        # parametry wiązane raz tutaj, a nie przekazywane przy każdym wywołaniu
+        scoring = self.config.get('scoring', {})
+        self._score_roe_yy = self._sweet_spot_scorer(scoring, 'roe_yy', 30, 80, 300)
+        self._score_roa_yy = self._sweet_spot_scorer(scoring, 'roa_yy', 25, 70, 120)
+        self._score_margin_op_yy = self._sweet_spot_scorer(scoring, 'margin_op', 15, 60, 120)
+        self._score_margin_net_yy = self._sweet_spot_scorer(scoring, 'margin_net', 20, 80, 150)
     
-    def _score_in_sweet_spot(self, value: float, sweet_min: float, sweet_max: float, 
-                              suspicious: float, floor: float = 10) -> float:
-        """
-        Uniwersalna funkcja scoringu dla sweet spot.
-        Najwyższy score w przedziale [sweet_min, sweet_max].
-        Kara za zbyt niskie i zbyt wysokie (podejrzane) wartości.
-        """
-        if value < 0:
-            return floor
-        elif value < sweet_min * 0.3:
-            # Bardzo niski
-            return floor + (value / (sweet_min * 0.3)) * 20
-        elif value < sweet_min:
-            # Poniżej sweet spot - rośnie do 80
-            progress = (value - sweet_min * 0.3) / (sweet_min - sweet_min * 0.3)
-            return 30 + progress * 50
-        elif value <= sweet_max:
-            # Sweet spot - 100
-            return 100
-        elif value <= suspicious:
-            # Powyżej sweet spot - spada do 60
-            progress = (value - sweet_max) / (suspicious - sweet_max)
-            return 100 - progress * 40
-        elif value <= suspicious * 2:
-            # Wysoki - spada do 40
-            progress = (value - suspicious) / suspicious
-            return 60 - progress * 20
-        else:
-            # Ekstremalny - podejrzany
-            return max(floor, 40 - (value - suspicious * 2) / 100)
+    def _sweet_spot_scorer(self, scoring: dict, prefix: str, sweet_min: float, sweet_max: float,
+                           suspicious: float):
+        """Zwraca funkcję values -> score z progami {prefix}_sweet_min/_sweet_max/_suspicious"""
+        sweet_min = float(scoring.get(f'{prefix}_sweet_min', sweet_min))
+        sweet_max = float(scoring.get(f'{prefix}_sweet_max', sweet_max))
+        suspicious = float(scoring.get(f'{prefix}_suspicious', suspicious))
+        
+        def scorer(values: np.ndarray) -> np.ndarray:
+            return self._score_in_sweet_spot_vec(values, sweet_min, sweet_max, suspicious)
+        
+        return scorer
     
-    def _score_profitability_momentum(self, row) -> float:
+    def _score_profitability_momentum(self, cols: _QMCols) -> np.ndarray:
         """
         Ocenia momentum rentowności (ROE r/r + ROA r/r).
         Sweet spot: ROE 30-80%, ROA 25-70%
         """
-        roe_yy = row.get('ROE_YY', 0)
-        roa_yy = row.get('ROA_YY', 0)
+        roe_yy = cols.roe_yy
+        roa_yy = cols.roa_yy
         
         # ROE r/r (60%)
-        roe_score = self._score_in_sweet_spot(roe_yy, 30, 80, 300)
+        roe_score = self._score_roe_yy(roe_yy)
         
         # ROA r/r (40%)
-        roa_score = self._score_in_sweet_spot(roa_yy, 25, 70, 120)
+        roa_score = self._score_roa_yy(roa_yy)
         
         return roe_score * 0.60 + roa_score * 0.40
     
-    def _score_margin_momentum(self, row) -> float:
+    def _score_margin_momentum(self, cols: _QMCols) -> np.ndarray:
         """
         Ocenia ekspansję marż (operacyjna r/r + netto r/r).
         Sweet spot: Op 15-60%, Netto 20-80%
         """
-        margin_op_yy = row.get('Margin_Op_YY', 0)
-        margin_net_yy = row.get('Margin_Net_YY', 0)
+        margin_op_yy = cols.margin_op_yy
+        margin_net_yy = cols.margin_net_yy
         
         # Marża operacyjna r/r (50%)
-        op_score = self._score_in_sweet_spot(margin_op_yy, 15, 60, 120)
+        op_score = self._score_margin_op_yy(margin_op_yy)
         
         # Marża netto r/r (50%)
-        net_score = self._score_in_sweet_spot(margin_net_yy, 20, 80, 150)
+        net_score = self._score_margin_net_yy(margin_net_yy)
         
         return op_score * 0.50 + net_score * 0.50
     
-    def _score_trend_confirmation(self, row) -> float:
+    @staticmethod
+    def _score_trend_metric(yy: np.ndarray, qq: np.ndarray) -> np.ndarray:
+        """Score trendu jednej metryki: r/r <= 0 -> 30, potem k/k: < -20 -> 20, < 0 -> 40, < r/r -> 70, inaczej 100"""
+        return np.where(
+            yy > 0,
+            np.where(qq < -20, 20, np.where(qq < 0, 40, np.where(qq < yy, 70, 100))),
+            30
+        )
+    
+    def _score_trend_confirmation(self, cols: _QMCols) -> np.ndarray:
         """
         Sprawdza czy k/k potwierdza r/r (trend jest aktualny).
         Bonus za akcelerację (k/k > r/r).
         Kara za decelerację (r/r > 0 ale k/k < 0).
         """
-        roe_yy = row.get('ROE_YY', 0)
-        roe_qq = row.get('ROE_QQ', 0)
-        roa_yy = row.get('ROA_YY', 0)
-        roa_qq = row.get('ROA_QQ', 0)
-        margin_op_yy = row.get('Margin_Op_YY', 0)
-        margin_op_qq = row.get('Margin_Op_QQ', 0)
-        
-        scores = []
-        acceleration_count = 0
-        
-        # ROE
-        if roe_yy > 0:
-            if roe_qq < -20:
-                scores.append(20)
-            elif roe_qq < 0:
-                scores.append(40)
-            elif roe_qq < roe_yy:
-                scores.append(70)
-            else:
-                scores.append(100)
-                acceleration_count += 1
-        else:
-            scores.append(30)
-        
-        # ROA
-        if roa_yy > 0:
-            if roa_qq < -20:
-                scores.append(20)
-            elif roa_qq < 0:
-                scores.append(40)
-            elif roa_qq < roa_yy:
-                scores.append(70)
-            else:
-                scores.append(100)
-                acceleration_count += 1
-        else:
-            scores.append(30)
+        if HAS_NUMBA:
+            return _trend_kernel(cols.roe_yy, cols.roe_qq, cols.roa_yy, cols.roa_qq,
+                                 cols.margin_op_yy, cols.margin_op_qq)
         
-        # Marża operacyjna
-        if margin_op_yy > 0:
-            if margin_op_qq < -20:
-                scores.append(20)
-            elif margin_op_qq < 0:
-                scores.append(40)
-            elif margin_op_qq < margin_op_yy:
-                scores.append(70)
-            else:
-                scores.append(100)
-                acceleration_count += 1
-        else:
-            scores.append(30)
+        roe = self._score_trend_metric(cols.roe_yy, cols.roe_qq)
+        roa = self._score_trend_metric(cols.roa_yy, cols.roa_qq)
+        margin_op = self._score_trend_metric(cols.margin_op_yy, cols.margin_op_qq)
         
-        base_score = sum(scores) / len(scores) if scores else 50
+        base_score = (roe + roa + margin_op) / 3
         
-        # Bonus za pełną akcelerację
-        if acceleration_count >= 2:
-            base_score = min(100, base_score + 10)
-        
-        return base_score
+        # Bonus za pełną akcelerację (100 = k/k nie gorsze od r/r, min. 2 metryki)
+        acceleration_count = (roe == 100).astype(np.int8) + (roa == 100) + (margin_op == 100)
+        return np.where(acceleration_count >= 2, np.minimum(100, base_score + 10), base_score)
     
-    def _score_revenue_support(self, row) -> float:
+    def _score_revenue_support(self, cols: _QMCols) -> np.ndarray:
         """
         Sprawdza czy poprawa rentowności jest wsparta wzrostem przychodów.
         Sweet spot: 10-40% r/r
         """
-        rev_yy = row.get('Rev_YY', 0)
-        rev_qq = row.get('Rev_QQ', 0)
+        rev_yy = cols.rev_yy
+        rev_qq = cols.rev_qq
         
         # Przychody r/r
-        if rev_yy < -10:
-            base_score = 15
-        elif rev_yy < 0:
-            base_score = 35
-        elif rev_yy < 10:
-            base_score = 55
-        elif rev_yy <= 40:
-            base_score = 100  # Sweet spot
-        elif rev_yy <= 80:
-            base_score = 90
-        elif rev_yy <= 150:
-            base_score = 70
-        else:
-            base_score = 50  # Podejrzanie wysoki
+        base_score = np.select(
+            [rev_yy < -10, rev_yy < 0, rev_yy < 10, rev_yy <= 40, rev_yy <= 80, rev_yy <= 150],
+            [15, 35, 55, 100, 90, 70],      # 100: sweet spot
+            default=50                      # Podejrzanie wysoki
+        )
         
         # Bonus za spójność k/k
-        if rev_qq > 0 and rev_yy > 0:
-            base_score = min(100, base_score + 10)
-        
-        return base_score
+        return np.where((rev_qq > 0) & (rev_yy > 0), np.minimum(100, base_score + 10), base_score)
     
-    def _score_value(self, row) -> float:
+    def _score_value(self, cols: _QMCols) -> np.ndarray:
         """
         Nie przepłacamy za momentum.
         Sweet spot: P/E 4-12
         """
-        pe = row.get('P_E', 0)
-        
-        if pe <= 0:
-            return 20
-        elif pe < 4:
-            return 50  # Value trap?
-        elif pe <= 8:
-            return 100  # Sweet spot
-        elif pe <= 12:
-            return 90
-        elif pe <= 18:
-            return 70
-        elif pe <= 25:
-            return 50
-        elif pe <= 40:
-            return 30
-        else:
-            return 15
+        pe = cols.pe
+        
+        return np.select(
+            [pe <= 0, pe < 4, pe <= 8, pe <= 12, pe <= 18, pe <= 25, pe <= 40],
+            [
+                20,
+                50,     # Value trap?
+                100,    # Sweet spot
+                90,
+                70,
+                50,
+                30,
+            ],
+            default=15
+        )
     
     def score(self, df: pd.DataFrame) -> pd.DataFrame:
         """Oblicza score dla każdej spółki."""
-        df = df.copy()
-        
-        df['S_ProfitMom'] = df.apply(self._score_profitability_momentum, axis=1)
-        df['S_MarginMom'] = df.apply(self._score_margin_momentum, axis=1)
-        df['S_TrendConf'] = df.apply(self._score_trend_confirmation, axis=1)
-        df['S_RevSupport'] = df.apply(self._score_revenue_support, axis=1)
-        df['S_Value'] = df.apply(self._score_value, axis=1)
+        # Jedno wyciągnięcie kolumn; wszystkie komponenty liczone z tych samych tablic
+        cols = _QMCols.extract(df)
+        
+        components = {
+            'S_ProfitMom': self._score_profitability_momentum(cols),
+            'S_MarginMom': self._score_margin_momentum(cols),
+            'S_TrendConf': self._score_trend_confirmation(cols),
+            'S_RevSupport': self._score_revenue_support(cols),
+            'S_Value': self._score_value(cols),
+        }
         
-        df['Total'] = (
-            df['S_ProfitMom'] * self.weights['profitability_momentum'] +
-            df['S_MarginMom'] * self.weights['margin_momentum'] +
-            df['S_TrendConf'] * self.weights['trend_confirmation'] +
-            df['S_RevSupport'] * self.weights['revenue_support'] +
-            df['S_Value'] * self.weights['value']
-        )
+        total = self.weighted_total([
+            (components['S_ProfitMom'], 'profitability_momentum'),
+            (components['S_MarginMom'], 'margin_momentum'),
+            (components['S_TrendConf'], 'trend_confirmation'),
+            (components['S_RevSupport'], 'revenue_support'),
+            (components['S_Value'], 'value'),
+        ])
         
-        return df
+        return df.assign(**components, Total=total)
     
-    def get_flags(self, row) -> str:
-        """Generuje flagi dla spółki."""
-        flags = []
-        
-        roe_yy = row.get('ROE_YY', 0)
-        roa_yy = row.get('ROA_YY', 0)
-        margin_op_yy = row.get('Margin_Op_YY', 0)
-        margin_net_yy = row.get('Margin_Net_YY', 0)
-        rev_yy = row.get('Rev_YY', 0)
-        pe = row.get('P_E', 0)
-        
-        roe_qq = row.get('ROE_QQ', 0)
-        roa_qq = row.get('ROA_QQ', 0)
-        margin_op_qq = row.get('Margin_Op_QQ', 0)
-        
-        # [Q] Quality Momentum - ROE i ROA w sweet spot
-        if 30 <= roe_yy <= 100 and 20 <= roa_yy <= 80:
-            flags.append('[Q]')
-        
-        # [M] Margin Expansion
-        if margin_op_yy > 30 and margin_net_yy > 30:
-            flags.append('[M]')
+    def flag_masks(self, df: pd.DataFrame) -> List[Tuple[str, np.ndarray]]:
+        """Generuje flagi dla spółek (maski po kolumnach)."""
+        cols = _QMCols.extract(df)
+        roe_yy, roa_yy = cols.roe_yy, cols.roa_yy
+        margin_op_yy, margin_net_yy = cols.margin_op_yy, cols.margin_net_yy
+        roe_qq, roa_qq, margin_op_qq = cols.roe_qq, cols.roa_qq, cols.margin_op_qq
+        pe = cols.pe
         
         # [A] Acceleration - k/k > r/r dla min. 2 metryk
-        accel_count = 0
-        if roe_qq > roe_yy > 0:
-            accel_count += 1
-        if roa_qq > roa_yy > 0:
-            accel_count += 1
-        if margin_op_qq > margin_op_yy > 0:
-            accel_count += 1
-        if accel_count >= 2:
-            flags.append('[A]')
-        
-        # [R] Revenue Support
-        if rev_yy > 15:
-            flags.append('[R]')
-        
-        # [V] Value
-        if 4 <= pe <= 12:
-            flags.append('[V]')
-        
-        # [!] Warning - Extreme (którykolwiek > 500%)
-        if any(x > 500 for x in [roe_yy, roa_yy, margin_op_yy, margin_net_yy]):
-            flags.append('[!]')
+        accel_count = (((roe_qq > roe_yy) & (roe_yy > 0)).astype(np.int8)
+                       + ((roa_qq > roa_yy) & (roa_yy > 0))
+                       + ((margin_op_qq > margin_op_yy) & (margin_op_yy > 0)))
         
-        # [?] Verify - Deceleration (r/r > 50% ale k/k < 0)
-        if (roe_yy > 50 and roe_qq < 0) or (roa_yy > 50 and roa_qq < 0):
-            flags.append('[?]')
-        
-        return ''.join(flags)
+        return [
+            # [Q] Quality Momentum - ROE i ROA w sweet spot
+            ('Q', (roe_yy >= 30) & (roe_yy <= 100) & (roa_yy >= 20) & (roa_yy <= 80)),
+            # [M] Margin Expansion
+            ('M', (margin_op_yy > 30) & (margin_net_yy > 30)),
+            ('A', accel_count >= 2),
+            # [R] Revenue Support
+            ('R', cols.rev_yy > 15),
+            # [V] Value
+            ('V', (pe >= 4) & (pe <= 12)),
+            # [!] Warning - Extreme (którykolwiek > 500%)
+            ('!', (np.stack([roe_yy, roa_yy, margin_op_yy, margin_net_yy]) > 500).any(axis=0)),
+            # [?] Verify - Deceleration (r/r > 50% ale k/k < 0)
+            ('?', ((roe_yy > 50) & (roe_qq < 0)) | ((roa_yy > 50) & (roa_qq < 0))),
+        ]
     
     def get_output_columns(self) -> List[str]:
         """Zwraca listę kolumn do eksportu."""
@@ -317,6 +296,10 @@ class QualityMomentumScanner(BaseScanner):
         ]
 
 
+# Klasa skanera dla run.py (bez przeszukiwania modułu)
+__scanner_class__ = QualityMomentumScanner
+
+
 # Standalone run
 if __name__ == "__main__":
     import logging
@@ -339,7 +322,7 @@ if __name__ == "__main__":
             print(f"{'Rank':<5} {'Ticker':<10} {'Flags':<14} {'Score':<7} {'ROE_YY':<9} {'ROA_YY':<9} {'Rev_YY':<8} {'P/E':<7}")
             print("-" * 80)
             
-            for _, row in scanner.get_top(10).iterrows():
+            for row in scanner.get_top(10).to_dict('records'):
                 print(f"{row['Rank']:<5} {row['Ticker']:<10} {row['Flags']:<14} {row['Total']:<7.1f} "
                       f"{row.get('ROE_YY', 0):<9.1f} {row.get('ROA_YY', 0):<9.1f} "
                       f"{row.get('Rev_YY', 0):<8.1f} {row.get('P_E', 0):<7.2f}")
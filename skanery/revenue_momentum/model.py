@@ -12,9 +12,222 @@ SKANERY_DIR = os.path.dirname(SCANNER_DIR)
 BASE_DIR = os.path.dirname(SKANERY_DIR)
 sys.path.insert(0, SKANERY_DIR)
 
+import numpy as np
 import pandas as pd
-from typing import Set, List
-from base import BaseScanner, load_data, load_config
+from typing import Set, List, Tuple
+from base import BaseScanner, load_data, load_config, column_values, column_arrays, njit, HAS_NUMBA
+
+
+# =============================================================================
+# KERNELE NUMBA - te same progi co np.select, jedna pętla z drabinką if/elif
+# (używane tylko gdy numba jest dostępna)
+# =============================================================================
+
+@njit(cache=True)
+def _momentum_kernel(rev_qq, rev_o4k):
+    out = np.empty_like(rev_qq)
+    for i in range(rev_qq.size):
+        q = rev_qq[i]
+        if q < 0:
+            qq_score = max(0.0, 30 + q)
+        elif q < 5:
+            qq_score = 40.0
+        elif q < 15:
+            qq_score = 60 + q
+        elif q < 30:
+            qq_score = 90.0
+        elif q < 50:
+            qq_score = 100.0
+        elif q < 100:
+            qq_score = 85.0
+        else:
+            qq_score = 60.0
+        
+        o = rev_o4k[i]
+        if o < 0:
+            o4k_score = max(0.0, 30 + o)
+        elif o < 5:
+            o4k_score = 50.0
+        elif o < 15:
+            o4k_score = 70.0
+        elif o < 30:
+            o4k_score = 100.0
+        elif o < 50:
+            o4k_score = 90.0
+        else:
+            o4k_score = 70.0
+        
+        out[i] = qq_score * 0.5 + o4k_score * 0.5
+    return out
+
+
+@njit(cache=True)
+def _quality_kernel(roe, roa, op_margin):
+    out = np.empty_like(roe)
+    for i in range(roe.size):
+        r = roe[i]
+        if r < 5:
+            roe_score = max(0.0, r * 10)
+        elif r < 10:
+            roe_score = 50 + (r - 5) * 6
+        elif r < 15:
+            roe_score = 80 + (r - 10) * 2
+        elif r < 25:
+            roe_score = 90 + (r - 15) * 1
+        elif r < 40:
+            roe_score = 100.0
+        else:
+            roe_score = 95.0
+        
+        a = roa[i]
+        if a < 3:
+            roa_score = max(0.0, a * 15)
+        elif a < 8:
+            roa_score = 45 + (a - 3) * 8
+        elif a < 15:
+            roa_score = 85 + (a - 8) * 2
+        else:
+            roa_score = 100.0
+        
+        m = op_margin[i]
+        if m < 3:
+            margin_score = max(0.0, m * 15)
+        elif m < 8:
+            margin_score = 45 + (m - 3) * 7
+        elif m < 15:
+            margin_score = 80 + (m - 8) * 2
+        elif m < 25:
+            margin_score = 94 + (m - 15) * 0.6
+        else:
+            margin_score = 100.0
+        
+        out[i] = roe_score * 0.35 + roa_score * 0.25 + margin_score * 0.40
+    return out
+
+
+@njit(cache=True)
+def _safety_kernel(debt_ratio, asset_cov):
+    out = np.empty_like(debt_ratio)
+    for i in range(debt_ratio.size):
+        d = debt_ratio[i]
+        if d <= 0:
+            debt_score = 50.0
+        elif d < 0.2:
+            debt_score = 100.0
+        elif d < 0.35:
+            debt_score = 90.0
+        elif d < 0.5:
+            debt_score = 75.0
+        elif d < 0.6:
+            debt_score = 55.0
+        elif d < 0.7:
+            debt_score = 35.0
+        else:
+            debt_score = max(0.0, 35 - (d - 0.7) * 100)
+        
+        c = asset_cov[i]
+        if c <= 0:
+            cov_score = 30.0
+        elif c < 1.0:
+            cov_score = max(20.0, c * 50)
+        elif c < 1.3:
+            cov_score = 50 + (c - 1.0) * 100
+        elif c < 2.0:
+            cov_score = 80 + (c - 1.3) * 28
+        elif c < 3.0:
+            cov_score = 100.0
+        else:
+            cov_score = 95.0
+        
+        out[i] = debt_score * 0.60 + cov_score * 0.40
+    return out
+
+
+@njit(cache=True)
+def _value_kernel(pe, rev_3y, rev_o4k):
+    out = np.empty_like(pe)
+    for i in range(pe.size):
+        p = pe[i]
+        if rev_3y[i] > 0 or rev_o4k[i] > 0:
+            growth = max(1.0, (rev_3y[i] + rev_o4k[i]) / 2)
+        else:
+            growth = 10.0
+        
+        if p <= 0:
+            pe_score = 20.0
+        elif p < 5:
+            pe_score = 60.0
+        elif p < 8:
+            pe_score = 90.0
+        elif p < 12:
+            pe_score = 100.0
+        elif p < 16:
+            pe_score = 85.0
+        elif p < 20:
+            pe_score = 65.0
+        elif p < 25:
+            pe_score = 45.0
+        else:
+            pe_score = max(10.0, 45 - (p - 25) * 2)
+        
+        if p <= 0 or growth <= 0:
+            peg_score = 30.0
+        else:
+            peg = p / growth
+            if peg < 0.3:
+                peg_score = 70.0
+            elif peg < 0.5:
+                peg_score = 90.0
+            elif peg < 1.0:
+                peg_score = 100.0
+            elif peg < 1.5:
+                peg_score = 80.0
+            elif peg < 2.0:
+                peg_score = 60.0
+            else:
+                peg_score = max(20.0, 60 - (peg - 2) * 15)
+        
+        out[i] = pe_score * 0.60 + peg_score * 0.40
+    return out
+
+
+@njit(cache=True)
+def _consistency_kernel(rev_qq, rev_o4k, rev_3y):
+    out = np.empty_like(rev_qq)
+    for i in range(rev_qq.size):
+        q = rev_qq[i]
+        o = rev_o4k[i]
+        y = rev_3y[i]
+        if not (q > 0 and o > 0 and y > 0):
+            out[i] = 30.0 + (int(q > 0) + int(o > 0) + int(y > 0)) * 15
+            continue
+        
+        avg = (q + o + y) / 3
+        variance = ((q - avg)**2 + (o - avg)**2 + (y - avg)**2) / 3
+        cv = np.sqrt(variance) / avg
+        
+        if q >= o and o >= y:
+            trend_bonus = 15
+        elif q >= o or o >= y:
+            trend_bonus = 5
+        elif q < y * 0.5:
+            trend_bonus = -15
+        else:
+            trend_bonus = 0
+        
+        if cv < 0.2:
+            base_score = 100
+        elif cv < 0.4:
+            base_score = 85
+        elif cv < 0.6:
+            base_score = 70
+        elif cv < 1.0:
+            base_score = 55
+        else:
+            base_score = 40
+        
+        out[i] = min(100, max(0, base_score + trend_bonus))
+    return out
 
 
 class RevenueMomentumScanner(BaseScanner):
@@ -40,245 +253,178 @@ class RevenueMomentumScanner(BaseScanner):
             'consistency': wagi.get('consistency', 0.10)
         }
     
-    def _score_momentum(self, row) -> float:
-        rev_qq = row.get('Rev_QQ', 0)
-        rev_o4k = row.get('Rev_O4K', 0)
+    def _score_momentum(self, rev_qq: np.ndarray, rev_o4k: np.ndarray) -> np.ndarray:
+        if HAS_NUMBA:
+            return _momentum_kernel(rev_qq, rev_o4k)
         
         # QQ scoring
-        if rev_qq < 0:
-            qq_score = max(0, 30 + rev_qq)
-        elif rev_qq < 5:
-            qq_score = 40
-        elif rev_qq < 15:
-            qq_score = 60 + rev_qq
-        elif rev_qq < 30:
-            qq_score = 90
-        elif rev_qq < 50:
-            qq_score = 100
-        elif rev_qq < 100:
-            qq_score = 85
-        else:
-            qq_score = 60
+        qq_score = np.select(
+            [rev_qq < 0, rev_qq < 5, rev_qq < 15, rev_qq < 30, rev_qq < 50, rev_qq < 100],
+            [np.fmax(0, 30 + rev_qq), 40, 60 + rev_qq, 90, 100, 85],
+            default=60
+        )
         
         # O4K scoring
-        if rev_o4k < 0:
-            o4k_score = max(0, 30 + rev_o4k)
-        elif rev_o4k < 5:
-            o4k_score = 50
-        elif rev_o4k < 15:
-            o4k_score = 70
-        elif rev_o4k < 30:
-            o4k_score = 100
-        elif rev_o4k < 50:
-            o4k_score = 90
-        else:
-            o4k_score = 70
+        o4k_score = np.select(
+            [rev_o4k < 0, rev_o4k < 5, rev_o4k < 15, rev_o4k < 30, rev_o4k < 50],
+            [np.fmax(0, 30 + rev_o4k), 50, 70, 100, 90],
+            default=70
+        )
         
         return qq_score * 0.5 + o4k_score * 0.5
     
-    def _score_quality(self, row) -> float:
-        roe = row.get('ROE', 0)
-        roa = row.get('ROA', 0)
-        op_margin = row.get('OpMargin', 0)
+    def _score_quality(self, roe: np.ndarray, roa: np.ndarray, op_margin: np.ndarray) -> np.ndarray:
+        if HAS_NUMBA:
+            return _quality_kernel(roe, roa, op_margin)
         
         # ROE (35%)
-        if roe < 5:
-            roe_score = max(0, roe * 10)
-        elif roe < 10:
-            roe_score = 50 + (roe - 5) * 6
-        elif roe < 15:
-            roe_score = 80 + (roe - 10) * 2
-        elif roe < 25:
-            roe_score = 90 + (roe - 15) * 1
-        elif roe < 40:
-            roe_score = 100
-        else:
-            roe_score = 95
+        roe_score = np.select(
+            [roe < 5, roe < 10, roe < 15, roe < 25, roe < 40],
+            [np.fmax(0, roe * 10), 50 + (roe - 5) * 6, 80 + (roe - 10) * 2, 90 + (roe - 15) * 1, 100],
+            default=95
+        )
         
         # ROA (25%)
-        if roa < 3:
-            roa_score = max(0, roa * 15)
-        elif roa < 8:
-            roa_score = 45 + (roa - 3) * 8
-        elif roa < 15:
-            roa_score = 85 + (roa - 8) * 2
-        else:
-            roa_score = 100
+        roa_score = np.select(
+            [roa < 3, roa < 8, roa < 15],
+            [np.fmax(0, roa * 15), 45 + (roa - 3) * 8, 85 + (roa - 8) * 2],
+            default=100
+        )
         
         # Marża (40%)
-        if op_margin < 3:
-            margin_score = max(0, op_margin * 15)
-        elif op_margin < 8:
-            margin_score = 45 + (op_margin - 3) * 7
-        elif op_margin < 15:
-            margin_score = 80 + (op_margin - 8) * 2
-        elif op_margin < 25:
-            margin_score = 94 + (op_margin - 15) * 0.6
-        else:
-            margin_score = 100
+        margin_score = np.select(
+            [op_margin < 3, op_margin < 8, op_margin < 15, op_margin < 25],
+            [np.fmax(0, op_margin * 15), 45 + (op_margin - 3) * 7, 80 + (op_margin - 8) * 2,
+             94 + (op_margin - 15) * 0.6],
+            default=100
+        )
         
         return roe_score * 0.35 + roa_score * 0.25 + margin_score * 0.40
     
-    def _score_safety(self, row) -> float:
-        debt_ratio = row.get('Debt_Ratio', 0)
-        asset_cov = row.get('Asset_Coverage', 0)
+    def _score_safety(self, debt_ratio: np.ndarray, asset_cov: np.ndarray) -> np.ndarray:
+        if HAS_NUMBA:
+            return _safety_kernel(debt_ratio, asset_cov)
         
         # Zadłużenie (60%)
-        if debt_ratio <= 0:
-            debt_score = 50
-        elif debt_ratio < 0.2:
-            debt_score = 100
-        elif debt_ratio < 0.35:
-            debt_score = 90
-        elif debt_ratio < 0.5:
-            debt_score = 75
-        elif debt_ratio < 0.6:
-            debt_score = 55
-        elif debt_ratio < 0.7:
-            debt_score = 35
-        else:
-            debt_score = max(0, 35 - (debt_ratio - 0.7) * 100)
+        debt_score = np.select(
+            [debt_ratio <= 0, debt_ratio < 0.2, debt_ratio < 0.35, debt_ratio < 0.5,
+             debt_ratio < 0.6, debt_ratio < 0.7],
+            [50, 100, 90, 75, 55, 35],
+            default=np.fmax(0, 35 - (debt_ratio - 0.7) * 100)
+        )
         
         # Pokrycie (40%)
-        if asset_cov <= 0:
-            cov_score = 30
-        elif asset_cov < 1.0:
-            cov_score = max(20, asset_cov * 50)
-        elif asset_cov < 1.3:
-            cov_score = 50 + (asset_cov - 1.0) * 100
-        elif asset_cov < 2.0:
-            cov_score = 80 + (asset_cov - 1.3) * 28
-        elif asset_cov < 3.0:
-            cov_score = 100
-        else:
-            cov_score = 95
+        cov_score = np.select(
+            [asset_cov <= 0, asset_cov < 1.0, asset_cov < 1.3, asset_cov < 2.0, asset_cov < 3.0],
+            [30, np.fmax(20, asset_cov * 50), 50 + (asset_cov - 1.0) * 100, 80 + (asset_cov - 1.3) * 28, 100],
+            default=95
+        )
         
         return debt_score * 0.60 + cov_score * 0.40
     
-    def _score_value(self, row) -> float:
-        pe = row.get('P_E', 0)
-        rev_3y = row.get('Rev_3Y', 0)
-        rev_o4k = row.get('Rev_O4K', 0)
+    def _score_value(self, pe: np.ndarray, rev_3y: np.ndarray, rev_o4k: np.ndarray) -> np.ndarray:
+        if HAS_NUMBA:
+            return _value_kernel(pe, rev_3y, rev_o4k)
         
-        growth = max(1, (rev_3y + rev_o4k) / 2) if rev_3y > 0 or rev_o4k > 0 else 10
+        # fmax jak max() Pythona: NaN nie wygrywa ze stałą
+        growth = np.where((rev_3y > 0) | (rev_o4k > 0), np.fmax(1, (rev_3y + rev_o4k) / 2), 10)
         
         # P/E (60%)
-        if pe <= 0:
-            pe_score = 20
-        elif pe < 5:
-            pe_score = 60
-        elif pe < 8:
-            pe_score = 90
-        elif pe < 12:
-            pe_score = 100
-        elif pe < 16:
-            pe_score = 85
-        elif pe < 20:
-            pe_score = 65
-        elif pe < 25:
-            pe_score = 45
-        else:
-            pe_score = max(10, 45 - (pe - 25) * 2)
+        pe_score = np.select(
+            [pe <= 0, pe < 5, pe < 8, pe < 12, pe < 16, pe < 20, pe < 25],
+            [20, 60, 90, 100, 85, 65, 45],
+            default=np.fmax(10, 45 - (pe - 25) * 2)
+        )
         
-        # PEG (40%)
-        if pe <= 0 or growth <= 0:
-            peg_score = 30
-        else:
-            peg = pe / growth
-            if peg < 0.3:
-                peg_score = 70
-            elif peg < 0.5:
-                peg_score = 90
-            elif peg < 1.0:
-                peg_score = 100
-            elif peg < 1.5:
-                peg_score = 80
-            elif peg < 2.0:
-                peg_score = 60
-            else:
-                peg_score = max(20, 60 - (peg - 2) * 15)
+        # PEG (40%) - growth >= 1 zawsze, dzielenie bezpieczne
+        peg = pe / growth
+        peg_score = np.where(
+            (pe <= 0) | (growth <= 0),
+            30,
+            np.select(
+                [peg < 0.3, peg < 0.5, peg < 1.0, peg < 1.5, peg < 2.0],
+                [70, 90, 100, 80, 60],
+                default=np.fmax(20, 60 - (peg - 2) * 15)
+            )
+        )
         
         return pe_score * 0.60 + peg_score * 0.40
     
-    def _score_consistency(self, row) -> float:
-        rev_qq = row.get('Rev_QQ', 0)
-        rev_o4k = row.get('Rev_O4K', 0)
-        rev_3y = row.get('Rev_3Y', 0)
+    def _score_consistency(self, rev_qq: np.ndarray, rev_o4k: np.ndarray, rev_3y: np.ndarray) -> np.ndarray:
+        """Spójność wzrostu (CV trzech okresów + trend) - od razu na kolumnach"""
+        if HAS_NUMBA:
+            return _consistency_kernel(rev_qq, rev_o4k, rev_3y)
         
-        all_positive = rev_qq > 0 and rev_o4k > 0 and rev_3y > 0
+        rev = np.column_stack([rev_qq, rev_o4k, rev_3y])
+        positive = rev > 0
+        all_positive = positive.all(axis=1)
         
-        if not all_positive:
-            positive_count = sum([1 for x in [rev_qq, rev_o4k, rev_3y] if x > 0])
-            return 30 + positive_count * 15
-        
-        avg = (rev_qq + rev_o4k + rev_3y) / 3
-        if avg <= 0:
-            return 40
-        
-        variance = ((rev_qq - avg)**2 + (rev_o4k - avg)**2 + (rev_3y - avg)**2) / 3
-        cv = (variance ** 0.5) / avg if avg > 0 else 1
+        # Wszystkie dodatnie => avg > 0, więc CV zawsze zdefiniowane
+        avg = rev.mean(axis=1)
+        cv = np.sqrt(rev.var(axis=1)) / np.where(all_positive, avg, 1.0)
         
         # Trend
-        if rev_qq >= rev_o4k >= rev_3y:
-            trend_bonus = 15
-        elif rev_qq >= rev_o4k or rev_o4k >= rev_3y:
-            trend_bonus = 5
-        elif rev_qq < rev_3y * 0.5:
-            trend_bonus = -15
-        else:
-            trend_bonus = 0
+        trend_bonus = np.select(
+            [(rev_qq >= rev_o4k) & (rev_o4k >= rev_3y), (rev_qq >= rev_o4k) | (rev_o4k >= rev_3y), rev_qq < rev_3y * 0.5],
+            [15, 5, -15],
+            default=0
+        )
         
-        if cv < 0.2:
-            base_score = 100
-        elif cv < 0.4:
-            base_score = 85
-        elif cv < 0.6:
-            base_score = 70
-        elif cv < 1.0:
-            base_score = 55
-        else:
-            base_score = 40
+        base_score = np.select(
+            [cv < 0.2, cv < 0.4, cv < 0.6, cv < 1.0],
+            [100, 85, 70, 55],
+            default=40
+        )
         
-        return min(100, max(0, base_score + trend_bonus))
+        return np.where(
+            all_positive,
+            np.clip(base_score + trend_bonus, 0, 100),
+            30 + positive.sum(axis=1) * 15
+        ).astype(np.float64)
     
     def score(self, df: pd.DataFrame) -> pd.DataFrame:
-        df = df.copy()
-        
-        df['S_Momentum'] = df.apply(self._score_momentum, axis=1)
-        df['S_Quality'] = df.apply(self._score_quality, axis=1)
-        df['S_Safety'] = df.apply(self._score_safety, axis=1)
-        df['S_Value'] = df.apply(self._score_value, axis=1)
-        df['S_Consistency'] = df.apply(self._score_consistency, axis=1)
-        
-        df['Total'] = (
-            df['S_Momentum'] * self.weights['momentum'] +
-            df['S_Quality'] * self.weights['quality'] +
-            df['S_Safety'] * self.weights['safety'] +
-            df['S_Value'] * self.weights['value'] +
-            df['S_Consistency'] * self.weights['consistency']
-        )
+        # Komponenty liczone od razu na kolumnach (bez pętli po wierszach)
+        cols = column_arrays(df, ['Rev_QQ', 'Rev_O4K', 'Rev_3Y', 'ROE', 'ROA', 'OpMargin',
+                                  'Debt_Ratio', 'Asset_Coverage', 'P_E'])
+        components = {
+            'S_Momentum': self._score_momentum(cols['Rev_QQ'], cols['Rev_O4K']),
+            'S_Quality': self._score_quality(cols['ROE'], cols['ROA'], cols['OpMargin']),
+            'S_Safety': self._score_safety(cols['Debt_Ratio'], cols['Asset_Coverage']),
+            'S_Value': self._score_value(cols['P_E'], cols['Rev_3Y'], cols['Rev_O4K']),
+            'S_Consistency': self._score_consistency(cols['Rev_QQ'], cols['Rev_O4K'], cols['Rev_3Y']),
+        }
+        
+        total = self.weighted_total([
+            (components['S_Momentum'], 'momentum'),
+            (components['S_Quality'], 'quality'),
+            (components['S_Safety'], 'safety'),
+            (components['S_Value'], 'value'),
+            (components['S_Consistency'], 'consistency'),
+        ])
         
-        return df
+        return df.assign(**components, Total=total)
     
-    def get_flags(self, row) -> str:
-        flags = []
-        if row.get('Rev_QQ', 0) > 20 and row.get('Rev_O4K', 0) > 15:
-            flags.append('[M]')
-        if row.get('ROE', 0) > 20 and row.get('OpMargin', 0) > 15:
-            flags.append('[Q]')
-        if row.get('Debt_Ratio', 1) < 0.35 and row.get('Asset_Coverage', 0) > 1.5:
-            flags.append('[S]')
-        pe = row.get('P_E', 0)
-        growth = (row.get('Rev_3Y', 0) + row.get('Rev_O4K', 0)) / 2
-        if pe > 0 and growth > 0 and pe / growth < 1.0:
-            flags.append('[G]')
-        if row.get('Rev_QQ', 0) > row.get('Rev_O4K', 0) > row.get('Rev_3Y', 0) > 0:
-            flags.append('[A]')
-        if row.get('Debt_Ratio', 0) > 0.6:
-            flags.append('[!]')
-        if row.get('Rev_QQ', 0) > 100:
-            flags.append('[?]')
-        return ''.join(flags)
+    def flag_masks(self, df: pd.DataFrame) -> List[Tuple[str, np.ndarray]]:
+        cols = column_arrays(df, ['Rev_QQ', 'Rev_O4K', 'Rev_3Y', 'Debt_Ratio', 'P_E',
+                                  'ROE', 'OpMargin', 'Asset_Coverage'])
+        rev_qq, rev_o4k, rev_3y = cols['Rev_QQ'], cols['Rev_O4K'], cols['Rev_3Y']
+        debt_ratio = cols['Debt_Ratio']
+        pe = cols['P_E']
+        
+        # [G] GARP: P/E do wzrostu < 1 (dzielenie tylko tam, gdzie wzrost > 0)
+        growth = (rev_3y + rev_o4k) / 2
+        peg = np.divide(pe, growth, out=np.full_like(pe, np.inf), where=growth > 0)
+        
+        return [
+            ('M', (rev_qq > 20) & (rev_o4k > 15)),
+            ('Q', (cols['ROE'] > 20) & (cols['OpMargin'] > 15)),
+            # Brak Debt_Ratio traktowany tu jako 1 (nie 0) - osobne wyciągnięcie z innym default
+            ('S', (column_values(df, 'Debt_Ratio', 1) < 0.35) & (cols['Asset_Coverage'] > 1.5)),
+            ('G', (pe > 0) & (growth > 0) & (peg < 1.0)),
+            ('A', (rev_qq > rev_o4k) & (rev_o4k > rev_3y) & (rev_3y > 0)),
+            ('!', debt_ratio > 0.6),
+            ('?', rev_qq > 100),
+        ]
     
     def get_output_columns(self) -> List[str]:
         return ['Rank', 'Ticker', 'Rynek', 'Flags', 'Total',
@@ -287,6 +433,10 @@ class RevenueMomentumScanner(BaseScanner):
                 'Debt_Ratio', 'Asset_Coverage', 'P_E', 'P_BV']
 
 
+# Klasa skanera dla run.py (bez przeszukiwania modułu)
+__scanner_class__ = RevenueMomentumScanner
+
+
 if __name__ == "__main__":
     import logging
     logging.basicConfig(level=logging.INFO, format='%(message)s')
@@ -308,6 +458,6 @@ if __name__ == "__main__":
             print(f"{'Rank':<5} {'Ticker':<8} {'Flags':<14} {'Score':<7} {'RevQQ':<7} {'RevO4K':<7} {'Debt':<6}")
             print("-" * 70)
             
-            for _, row in scanner.get_top(10).iterrows():
+            for row in scanner.get_top(10).to_dict('records'):
                 print(f"{row['Rank']:<5} {row['Ticker']:<8} {row['Flags']:<14} {row['Total']:<7.1f} "
                       f"{row.get('Rev_QQ',0):<7.1f} {row.get('Rev_O4K',0):<7.1f} {row.get('Debt_Ratio',0):<6.2f}")
@@ -12,9 +12,55 @@ SKANERY_DIR = os.path.dirname(SCANNER_DIR)
 BASE_DIR = os.path.dirname(SKANERY_DIR)
 sys.path.insert(0, SKANERY_DIR)
 
+import numpy as np
 import pandas as pd
-from typing import Set, List
-from base import BaseScanner, load_data, load_config
+from typing import Set, List, Tuple
+from base import BaseScanner, load_data, load_config, column_arrays, njit, HAS_NUMBA
+
+
+# =============================================================================
+# KERNELE NUMBA - ta sama logika co wersje NumPy, jedna pętla
+# (używane tylko gdy numba jest dostępna)
+# =============================================================================
+
+@njit(cache=True)
+def _value_kernel(pbv, pe):
+    out = np.empty_like(pbv)
+    for i in range(pbv.size):
+        b = pbv[i]
+        p = pe[i]
+        pbv_score = max(0.0, min(100.0, (1.5 - b) / 1.5 * 100)) if b > 0 else 50.0
+        pe_score = max(0.0, min(100.0, (15 - p) / 15 * 100)) if p > 0 else 50.0
+        out[i] = pbv_score * 0.5 + pe_score * 0.5
+    return out
+
+
+@njit(cache=True)
+def _quality_kernel(roe, roa):
+    out = np.empty_like(roe)
+    for i in range(roe.size):
+        roe_score = max(0.0, min(100.0, roe[i] / 30 * 100))
+        roa_score = max(0.0, min(100.0, roa[i] / 20 * 100))
+        out[i] = roe_score * 0.7 + roa_score * 0.3
+    return out
+
+
+@njit(cache=True)
+def _deep_value_kernel(pbv):
+    out = np.empty_like(pbv)
+    for i in range(pbv.size):
+        b = pbv[i]
+        if b <= 0:
+            out[i] = 0.0
+        elif b < 0.5:
+            out[i] = 100.0
+        elif b < 0.7:
+            out[i] = 80.0
+        elif b < 1.0:
+            out[i] = 50.0
+        else:
+            out[i] = 0.0
+    return out
 
 
 class TurnaroundScanner(BaseScanner):
@@ -39,76 +85,70 @@ class TurnaroundScanner(BaseScanner):
             'deep_value': wagi.get('deep_value', 0.15)
         }
     
-    def _score_value(self, row) -> float:
-        pbv = row.get('P_BV', 0)
-        pe = row.get('P_E', 0)
+    def _score_value(self, pbv: np.ndarray, pe: np.ndarray) -> np.ndarray:
+        if HAS_NUMBA:
+            return _value_kernel(pbv, pe)
         
-        pbv_score = max(0, min(100, (1.5 - pbv) / 1.5 * 100)) if pbv > 0 else 50
-        pe_score = max(0, min(100, (15 - pe) / 15 * 100)) if pe > 0 else 50
+        # fmin/fmax jak min()/max() Pythona ze stałą na początku (NaN nie wygrywa)
+        pbv_score = np.where(pbv > 0, np.fmax(0, np.fmin(100, (1.5 - pbv) / 1.5 * 100)), 50)
+        pe_score = np.where(pe > 0, np.fmax(0, np.fmin(100, (15 - pe) / 15 * 100)), 50)
         
         return pbv_score * 0.5 + pe_score * 0.5
     
-    def _score_quality(self, row) -> float:
-        roe = row.get('ROE', 0)
-        roa = row.get('ROA', 0)
+    def _score_quality(self, roe: np.ndarray, roa: np.ndarray) -> np.ndarray:
+        if HAS_NUMBA:
+            return _quality_kernel(roe, roa)
         
-        roe_score = max(0, min(100, roe / 30 * 100))
-        roa_score = max(0, min(100, roa / 20 * 100))
+        roe_score = np.fmax(0, np.fmin(100, roe / 30 * 100))
+        roa_score = np.fmax(0, np.fmin(100, roa / 20 * 100))
         return roe_score * 0.7 + roa_score * 0.3
     
-    def _score_contrarian(self, row) -> float:
-        margin_yy = row.get('Margin_YY', 0)
-        margin_qq = row.get('Margin_QQ', 0)
-        
-        if margin_yy < 50 and margin_qq > 0:
-            return 80
-        elif margin_yy > 200:
-            return 40
-        else:
-            return 60
+    def _score_contrarian(self, margin_yy: np.ndarray, margin_qq: np.ndarray) -> np.ndarray:
+        return np.select(
+            [(margin_yy < 50) & (margin_qq > 0), margin_yy > 200],
+            [80, 40],
+            default=60
+        ).astype(np.float64)
     
-    def _score_deep_value(self, row) -> float:
-        pbv = row.get('P_BV', 0)
+    def _score_deep_value(self, pbv: np.ndarray) -> np.ndarray:
+        if HAS_NUMBA:
+            return _deep_value_kernel(pbv)
         
-        if pbv <= 0:
-            return 0
-        elif pbv < 0.5:
-            return 100
-        elif pbv < 0.7:
-            return 80
-        elif pbv < 1.0:
-            return 50
-        else:
-            return 0
+        return np.select(
+            [pbv <= 0, pbv < 0.5, pbv < 0.7, pbv < 1.0],
+            [0, 100, 80, 50],
+            default=0
+        ).astype(np.float64)
     
     def score(self, df: pd.DataFrame) -> pd.DataFrame:
-        df = df.copy()
-        
-        df['S_Value'] = df.apply(self._score_value, axis=1)
-        df['S_Quality'] = df.apply(self._score_quality, axis=1)
-        df['S_Contrarian'] = df.apply(self._score_contrarian, axis=1)
-        df['S_DeepVal'] = df.apply(self._score_deep_value, axis=1)
+        # Komponenty liczone od razu na kolumnach (bez pętli po wierszach)
+        cols = column_arrays(df, ['P_BV', 'P_E', 'ROE', 'ROA', 'Margin_YY', 'Margin_QQ'])
+        components = {
+            'S_Value': self._score_value(cols['P_BV'], cols['P_E']),
+            'S_Quality': self._score_quality(cols['ROE'], cols['ROA']),
+            'S_Contrarian': self._score_contrarian(cols['Margin_YY'], cols['Margin_QQ']),
+            'S_DeepVal': self._score_deep_value(cols['P_BV']),
+        }
         
-        df['Total'] = (
-            df['S_Value'] * self.weights['value'] +
-            df['S_Quality'] * self.weights['quality'] +
-            df['S_Contrarian'] * self.weights['contrarian'] +
-            df['S_DeepVal'] * self.weights['deep_value']
-        )
+        total = self.weighted_total([
+            (components['S_Value'], 'value'),
+            (components['S_Quality'], 'quality'),
+            (components['S_Contrarian'], 'contrarian'),
+            (components['S_DeepVal'], 'deep_value'),
+        ])
         
-        return df
+        return df.assign(**components, Total=total)
     
-    def get_flags(self, row) -> str:
-        flags = []
-        if row.get('P_BV', 0) < 0.5:
-            flags.append('[D]')
-        if row.get('ROE', 0) > 20:
-            flags.append('[Q]')
-        if row.get('Margin_QQ', 0) > 20 and row.get('Margin_YY', 0) < 100:
-            flags.append('[T]')
-        if row.get('P_E', 0) < 5 and row.get('P_E', 0) > 0 and row.get('ROE', 0) > 10:
-            flags.append('[S]')
-        return ''.join(flags)
+    def flag_masks(self, df: pd.DataFrame) -> List[Tuple[str, np.ndarray]]:
+        cols = column_arrays(df, ['ROE', 'P_E', 'P_BV', 'Margin_QQ', 'Margin_YY'])
+        roe = cols['ROE']
+        pe = cols['P_E']
+        return [
+            ('D', cols['P_BV'] < 0.5),
+            ('Q', roe > 20),
+            ('T', (cols['Margin_QQ'] > 20) & (cols['Margin_YY'] < 100)),
+            ('S', (pe < 5) & (pe > 0) & (roe > 10)),
+        ]
     
     def get_output_columns(self) -> List[str]:
         return ['Rank', 'Ticker', 'Rynek', 'Flags', 'Total',
@@ -116,6 +156,10 @@ class TurnaroundScanner(BaseScanner):
                 'ROE', 'ROA', 'P_E', 'P_BV', 'Margin_QQ', 'Margin_YY']
 
 
+# Klasa skanera dla run.py (bez przeszukiwania modułu)
+__scanner_class__ = TurnaroundScanner
+
+
 if __name__ == "__main__":
     import logging
     logging.basicConfig(level=logging.INFO, format='%(message)s')
@@ -137,6 +181,6 @@ if __name__ == "__main__":
             print(f"{'Rank':<5} {'Ticker':<8} {'Flags':<12} {'Score':<7} {'ROE%':<7} {'P/BV':<7} {'P/E':<7}")
             print("-" * 70)
             
-            for _, row in scanner.get_top(10).iterrows():
+            for row in scanner.get_top(10).to_dict('records'):
                 print(f"{row['Rank']:<5} {row['Ticker']:<8} {row['Flags']:<12} {row['Total']:<7.1f} "
                       f"{row.get('ROE',0):<7.1f} {row.get('P_BV',0):<7.2f} {row.get('P_E',0):<7.2f}")
@@ -9,6 +9,7 @@ co może oznaczać undervalued growth lub re-rating opportunity.
 
 import sys
 import os
+import functools
 
 # Setup path
 SCANNER_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -16,9 +17,251 @@ SKANERY_DIR = os.path.dirname(SCANNER_DIR)
 BASE_DIR = os.path.dirname(SKANERY_DIR)
 sys.path.insert(0, SKANERY_DIR)
 
+import numpy as np
 import pandas as pd
-from typing import Set, List
-from base import BaseScanner, load_data, load_config
+from typing import Set, List, Tuple
+from base import BaseScanner, load_data, load_config, column_arrays, step_lookup, POSITIVE_MIN, njit, HAS_NUMBA
+
+
+# =============================================================================
+# PROGI SCORINGU - (breakpoints, scores) dla step_lookup
+# =============================================================================
+
+# Kompresja P/E: drabinka "pe_yy > próg" od góry, liczona na -P_E_YY (wtedy "< próg" jak w step_lookup)
+# > 20: 10, > 10: 25, > 0: 40, > -10: 55, > -20: 75, > -40: 100, > -60: 100, > -80: 80, > -90: 60, dalej 50
+_PE_COMPRESSION_STEPS = (
+    np.array([-20.0, -10.0, 0.0, 10.0, 20.0, 40.0, 60.0, 80.0, 90.0]),
+    np.array([10, 25, 40, 55, 75, 100, 100, 80, 60, 50]),
+)
+
+# Kompresja P/BV (też na -P_BV_YY): > 10: 15, > 0: 35, > -10: 55, > -20: 85, > -35: 100, > -50: 75, dalej 50
+_PBV_COMPRESSION_STEPS = (
+    np.array([-10.0, 0.0, 10.0, 20.0, 35.0, 50.0]),
+    np.array([15, 35, 55, 85, 100, 75, 50]),
+)
+
+# P/BV absolutne: <=0: 30, <0.5: 70, <1.0: 100, <1.5: 90, <2.5: 70, <4.0: 50, <7.0: 35, dalej 20
+_PBV_ABSOLUTE_STEPS = (
+    np.array([POSITIVE_MIN, 0.5, 1.0, 1.5, 2.5, 4.0, 7.0]),
+    np.array([30, 70, 100, 90, 70, 50, 35, 20]),
+)
+
+# EV/EBITDA: <=0: 30, <1: 50, <3: 90, <5: 100, <8: 80, <10: 60, <12: 45, dalej 30
+_EV_EBITDA_STEPS = (
+    np.array([POSITIVE_MIN, 1.0, 3.0, 5.0, 8.0, 10.0, 12.0]),
+    np.array([30, 50, 90, 100, 80, 60, 45, 30]),
+)
+
+# Trend pary (r/r, k/k): indeks z bitów [r/r < 0, k/k < 0, k/k < r/r]
+_TREND_LUT = np.array([
+    25, 25,     # Oba rosną - źle
+    50, 50,     # Nowy trend spadkowy (k/k < 0, r/r >= 0)
+    60, 60,     # Odbicie krótkoterminowe (k/k >= 0, r/r < 0)
+    85,         # Trend potwierdzony
+    100,        # Kompresja przyspiesza (k/k < r/r < 0)
+])
+
+
+# =============================================================================
+# KERNELE NUMBA - skalarne funkcje scoringu (do wywołań wiersz po wierszu) i pętle
+# po kolumnach na nich oparte (używane w score() tylko gdy numba jest dostępna)
+# =============================================================================
+
+@njit(cache=True)
+def _pe_compression_score(pe_yy):
+    if pe_yy > 20:
+        return 10
+    elif pe_yy > 10:
+        return 25
+    elif pe_yy > 0:
+        return 40
+    elif pe_yy > -10:
+        return 55
+    elif pe_yy > -20:
+        return 75
+    elif pe_yy > -60:
+        return 100
+    elif pe_yy > -80:
+        return 80
+    elif pe_yy > -90:
+        return 60
+    return 50
+
+
+@njit(cache=True)
+def _pbv_compression_score(pbv_yy):
+    if pbv_yy > 10:
+        return 15
+    elif pbv_yy > 0:
+        return 35
+    elif pbv_yy > -10:
+        return 55
+    elif pbv_yy > -20:
+        return 85
+    elif pbv_yy > -35:
+        return 100
+    elif pbv_yy > -50:
+        return 75
+    return 50
+
+
+@njit(cache=True)
+def _trend_pair_score(yy, qq):
+    if yy < 0 and qq < 0:
+        if qq < yy:
+            return 100
+        return 85
+    elif qq < 0 and yy >= 0:
+        return 50
+    elif qq >= 0 and yy < 0:
+        return 60
+    return 25
+
+
+@njit(cache=True)
+def _absolute_value_score(pbv, ev_ebitda):
+    if pbv <= 0:
+        pbv_score = 30
+    elif pbv < 0.5:
+        pbv_score = 70
+    elif pbv < 1.0:
+        pbv_score = 100
+    elif pbv < 1.5:
+        pbv_score = 90
+    elif pbv < 2.5:
+        pbv_score = 70
+    elif pbv < 4.0:
+        pbv_score = 50
+    elif pbv < 7.0:
+        pbv_score = 35
+    else:
+        pbv_score = 20
+    
+    if ev_ebitda <= 0:
+        ev_score = 30
+    elif ev_ebitda < 1:
+        ev_score = 50
+    elif ev_ebitda < 3:
+        ev_score = 90
+    elif ev_ebitda < 5:
+        ev_score = 100
+    elif ev_ebitda < 8:
+        ev_score = 80
+    elif ev_ebitda < 10:
+        ev_score = 60
+    elif ev_ebitda < 12:
+        ev_score = 45
+    else:
+        ev_score = 30
+    
+    return pbv_score * 0.50 + ev_score * 0.50
+
+
+@njit(cache=True)
+def _safety_check_score(pe_yy, pbv_yy, pbv, ev_ebitda):
+    base_score = 80
+    
+    if pe_yy < -90:
+        base_score -= 30
+    elif pe_yy < -80:
+        base_score -= 15
+    
+    if pbv_yy < -50:
+        base_score -= 20
+    elif pbv_yy < -40:
+        base_score -= 10
+    
+    if 0 < pbv < 0.3:
+        base_score -= 20
+    
+    if 0 < ev_ebitda < 1:
+        base_score -= 20
+    
+    if -60 < pe_yy < -20 and -35 < pbv_yy < -10:
+        base_score += 20
+    
+    return max(0, min(100, base_score))
+
+
+@njit(cache=True)
+def _pe_compression_kernel(pe_yy):
+    out = np.empty(pe_yy.size, dtype=np.int64)
+    for i in range(pe_yy.size):
+        out[i] = _pe_compression_score(pe_yy[i])
+    return out
+
+
+@njit(cache=True)
+def _pbv_compression_kernel(pbv_yy):
+    out = np.empty(pbv_yy.size, dtype=np.int64)
+    for i in range(pbv_yy.size):
+        out[i] = _pbv_compression_score(pbv_yy[i])
+    return out
+
+
+@njit(cache=True)
+def _trend_confirmation_kernel(pe_yy, pe_qq, pbv_yy, pbv_qq):
+    out = np.empty(pe_yy.size, dtype=np.float64)
+    for i in range(pe_yy.size):
+        out[i] = (_trend_pair_score(pe_yy[i], pe_qq[i]) + _trend_pair_score(pbv_yy[i], pbv_qq[i])) / 2
+    return out
+
+
+@njit(cache=True)
+def _absolute_value_kernel(pbv, ev_ebitda):
+    out = np.empty(pbv.size, dtype=np.float64)
+    for i in range(pbv.size):
+        out[i] = _absolute_value_score(pbv[i], ev_ebitda[i])
+    return out
+
+
+@njit(cache=True)
+def _safety_check_kernel(pe_yy, pbv_yy, pbv, ev_ebitda):
+    out = np.empty(pe_yy.size, dtype=np.int64)
+    for i in range(pe_yy.size):
+        out[i] = _safety_check_score(pe_yy[i], pbv_yy[i], pbv[i], ev_ebitda[i])
+    return out
+
+
+@functools.lru_cache(maxsize=None)
+def _score_all_kernel(weights: Tuple[float, ...]):
+    """
+    Kernel liczący wszystkie pięć komponentów i Total w jednej pętli,
+    specjalizowany pod krotkę wag (jeden na zestaw wag z configu).
+    Wagi są zmiennymi domknięcia - numba wkompilowuje je jako stałe.
+    Każda kolumna wejściowa czytana raz.
+    """
+    w_pe, w_pbv, w_trend, w_abs, w_safety = weights
+    
+    # Bez cache=True - numba nie zapisuje na dysk kerneli z domknięciem
+    @njit
+    def kernel(pe_yy, pe_qq, pbv_yy, pbv_qq, pbv, ev_ebitda):
+        n = pe_yy.size
+        out_pe = np.empty(n, dtype=np.int64)
+        out_pbv = np.empty(n, dtype=np.int64)
+        out_trend = np.empty(n, dtype=np.float64)
+        out_abs = np.empty(n, dtype=np.float64)
+        out_safety = np.empty(n, dtype=np.int64)
+        total = np.empty(n, dtype=np.float64)
+        for i in range(n):
+            e_yy = pe_yy[i]
+            b_yy = pbv_yy[i]
+            b = pbv[i]
+            ev = ev_ebitda[i]
+            s_pe = _pe_compression_score(e_yy)
+            s_pbv = _pbv_compression_score(b_yy)
+            s_trend = (_trend_pair_score(e_yy, pe_qq[i]) + _trend_pair_score(b_yy, pbv_qq[i])) / 2
+            s_abs = _absolute_value_score(b, ev)
+            s_safety = _safety_check_score(e_yy, b_yy, b, ev)
+            out_pe[i] = s_pe
+            out_pbv[i] = s_pbv
+            out_trend[i] = s_trend
+            out_abs[i] = s_abs
+            out_safety[i] = s_safety
+            total[i] = s_pe * w_pe + s_pbv * w_pbv + s_trend * w_trend + s_abs * w_abs + s_safety * w_safety
+        return out_pe, out_pbv, out_trend, out_abs, out_safety, total
+    
+    return kernel
 
 
 class ValuationCompressionScanner(BaseScanner):
@@ -50,252 +293,151 @@ class ValuationCompressionScanner(BaseScanner):
             'absolute_value': wagi.get('absolute_value', 0.15),
             'safety_check': wagi.get('safety_check', 0.10)
         }
+        # Wektor wag w kolejności COMPONENTS - Total to jedno (N, 5) @ wagi bez słownika w score()
+        self._weight_vec = np.array([self.weights[key] for _, key in self.COMPONENTS], dtype=np.float64)
+        # Kompilacja leniwa (przy pierwszym wywołaniu) - bez numba to zwykła funkcja, nieużywana w score()
+        self._score_all = _score_all_kernel(tuple(self._weight_vec.tolist()))
+    
+    # Kolumny komponentów i odpowiadające im klucze wag
+    COMPONENTS: List[Tuple[str, str]] = [
+        ('S_PE_Comp', 'pe_compression'),
+        ('S_PBV_Comp', 'pbv_compression'),
+        ('S_TrendConf', 'trend_confirmation'),
+        ('S_AbsValue', 'absolute_value'),
+        ('S_Safety', 'safety_check'),
+    ]
     
-    def _score_pe_compression(self, row) -> float:
+    # Kolumny wejściowe scoringu - wyciągane z df raz na wywołanie score()
+    SCORE_COLUMNS: List[str] = ['P_E_YY', 'P_E_QQ', 'P_BV_YY', 'P_BV_QQ', 'P_BV', 'EV_EBITDA']
+    
+    def _score_pe_compression(self, pe_yy: np.ndarray) -> np.ndarray:
         """
         Ocenia kompresję P/E r/r.
         Im bardziej ujemny (do -60%), tym lepiej.
         Ekstremalne wartości (<-80%) są podejrzane.
         """
-        pe_yy = row.get('P_E_YY', 0)
+        if HAS_NUMBA:
+            return _pe_compression_kernel(pe_yy)
         
-        # Wycena rośnie - źle
-        if pe_yy > 20:
-            return 10
-        elif pe_yy > 10:
-            return 25
-        elif pe_yy > 0:
-            return 40
-        # Lekka kompresja
-        elif pe_yy > -10:
-            return 55
-        elif pe_yy > -20:
-            return 75
-        # Sweet spot: -20% do -60%
-        elif pe_yy > -40:
-            return 100
-        elif pe_yy > -60:
-            return 100
-        # Silna kompresja
-        elif pe_yy > -80:
-            return 80
-        # Ekstremalna - podejrzana
-        elif pe_yy > -90:
-            return 60
-        else:
-            return 50  # Bardzo ekstremalna - sprawdź!
+        # Wycena rośnie - źle; lekka kompresja; sweet spot -20% do -60%; silna; ekstremalna - podejrzana
+        return step_lookup(-pe_yy, *_PE_COMPRESSION_STEPS)
     
-    def _score_pbv_compression(self, row) -> float:
+    def _score_pbv_compression(self, pbv_yy: np.ndarray) -> np.ndarray:
         """
         Ocenia kompresję P/BV r/r.
         Sweet spot: -10% do -35%
         """
-        pbv_yy = row.get('P_BV_YY', 0)
+        if HAS_NUMBA:
+            return _pbv_compression_kernel(pbv_yy)
         
-        # Wycena rośnie - źle
-        if pbv_yy > 10:
-            return 15
-        elif pbv_yy > 0:
-            return 35
-        # Lekka kompresja
-        elif pbv_yy > -10:
-            return 55
-        # Sweet spot: -10% do -35%
-        elif pbv_yy > -20:
-            return 85
-        elif pbv_yy > -35:
-            return 100
-        # Silna kompresja
-        elif pbv_yy > -50:
-            return 75
-        # Ekstremalna
-        else:
-            return 50
+        # Wycena rośnie - źle; lekka kompresja; sweet spot -10% do -35%; silna; ekstremalna
+        return step_lookup(-pbv_yy, *_PBV_COMPRESSION_STEPS)
+    
+    @staticmethod
+    def _score_trend_pair(yy: np.ndarray, qq: np.ndarray) -> np.ndarray:
+        """Trend jednej pary r/r, k/k - stan jako indeks 3-bitowy do _TREND_LUT"""
+        idx = ((yy < 0).astype(np.intp) << 2) | ((qq < 0).astype(np.intp) << 1) | (qq < yy)
+        # NaN w parze: żaden warunek trendu nie jest spełniony - jak "oba rosną"
+        idx[np.isnan(yy) | np.isnan(qq)] = 0
+        return _TREND_LUT[idx]
     
-    def _score_trend_confirmation(self, row) -> float:
+    def _score_trend_confirmation(self, pe_yy: np.ndarray, pe_qq: np.ndarray,
+                                  pbv_yy: np.ndarray, pbv_qq: np.ndarray) -> np.ndarray:
         """
         Sprawdza czy k/k potwierdza r/r.
         Najlepiej gdy kompresja przyspiesza (k/k < r/r < 0).
         """
-        pe_yy = row.get('P_E_YY', 0)
-        pe_qq = row.get('P_E_QQ', 0)
-        pbv_yy = row.get('P_BV_YY', 0)
-        pbv_qq = row.get('P_BV_QQ', 0)
-        
-        scores = []
-        
-        # P/E trend
-        if pe_yy < 0 and pe_qq < 0:
-            if pe_qq < pe_yy:  # Kompresja przyspiesza
-                scores.append(100)
-            else:
-                scores.append(85)  # Trend potwierdzony
-        elif pe_qq < 0 and pe_yy >= 0:
-            scores.append(50)  # Nowy trend spadkowy
-        elif pe_qq >= 0 and pe_yy < 0:
-            scores.append(60)  # Odbicie krótkoterminowe
-        else:
-            scores.append(25)  # Oba rosną - źle
+        if HAS_NUMBA:
+            return _trend_confirmation_kernel(pe_yy, pe_qq, pbv_yy, pbv_qq)
         
-        # P/BV trend
-        if pbv_yy < 0 and pbv_qq < 0:
-            if pbv_qq < pbv_yy:  # Kompresja przyspiesza
-                scores.append(100)
-            else:
-                scores.append(85)  # Trend potwierdzony
-        elif pbv_qq < 0 and pbv_yy >= 0:
-            scores.append(50)  # Nowy trend spadkowy
-        elif pbv_qq >= 0 and pbv_yy < 0:
-            scores.append(60)  # Odbicie krótkoterminowe
-        else:
-            scores.append(25)  # Oba rosną - źle
-        
-        return sum(scores) / len(scores) if scores else 50
+        pe_score = self._score_trend_pair(pe_yy, pe_qq)
+        pbv_score = self._score_trend_pair(pbv_yy, pbv_qq)
+        return (pe_score + pbv_score) / 2
     
-    def _score_absolute_value(self, row) -> float:
+    def _score_absolute_value(self, pbv: np.ndarray, ev_ebitda: np.ndarray) -> np.ndarray:
         """
         Ocenia absolutną wycenę (P/BV i EV/EBITDA).
         """
-        pbv = row.get('P_BV', 0)
-        ev_ebitda = row.get('EV_EBITDA', 0)
+        if HAS_NUMBA:
+            return _absolute_value_kernel(pbv, ev_ebitda)
         
-        # P/BV scoring (50%)
-        if pbv <= 0:
-            pbv_score = 30  # Brak danych lub ujemny
-        elif pbv < 0.5:
-            pbv_score = 70  # Value trap risk
-        elif pbv < 1.0:
-            pbv_score = 100  # Poniżej book value
-        elif pbv < 1.5:
-            pbv_score = 90  # Tania
-        elif pbv < 2.5:
-            pbv_score = 70  # OK
-        elif pbv < 4.0:
-            pbv_score = 50  # Droga
-        elif pbv < 7.0:
-            pbv_score = 35  # Bardzo droga
-        else:
-            pbv_score = 20  # Ekstremalnie droga
+        # P/BV scoring (50%) - poniżej book value najlepiej, < 0.5 ryzyko value trap
+        pbv_score = step_lookup(pbv, *_PBV_ABSOLUTE_STEPS)
         
-        # EV/EBITDA scoring (50%)
-        if ev_ebitda <= 0:
-            ev_score = 30  # Brak danych
-        elif ev_ebitda < 1:
-            ev_score = 50  # Bardzo niski - kryzys?
-        elif ev_ebitda < 3:
-            ev_score = 90  # Bardzo tania
-        elif ev_ebitda < 5:
-            ev_score = 100  # Sweet spot
-        elif ev_ebitda < 8:
-            ev_score = 80  # OK
-        elif ev_ebitda < 10:
-            ev_score = 60  # Droga
-        elif ev_ebitda < 12:
-            ev_score = 45  # Bardzo droga
-        else:
-            ev_score = 30  # Ekstremalnie droga
+        # EV/EBITDA scoring (50%) - sweet spot 3-5, < 1 kryzys?
+        ev_score = step_lookup(ev_ebitda, *_EV_EBITDA_STEPS)
         
         return pbv_score * 0.50 + ev_score * 0.50
     
-    def _score_safety_check(self, row) -> float:
+    def _score_safety_check(self, pe_yy: np.ndarray, pbv_yy: np.ndarray,
+                            pbv: np.ndarray, ev_ebitda: np.ndarray) -> np.ndarray:
         """
         Filtr bezpieczeństwa - kara za ekstremalne wartości.
         """
-        pe_yy = row.get('P_E_YY', 0)
-        pbv_yy = row.get('P_BV_YY', 0)
-        pbv = row.get('P_BV', 0)
-        ev_ebitda = row.get('EV_EBITDA', 0)
+        if HAS_NUMBA:
+            return _safety_check_kernel(pe_yy, pbv_yy, pbv, ev_ebitda)
         
-        base_score = 80  # Neutralny start
+        # Kary i bonus jako maski bool razy waga - jedna kombinacja liniowa zamiast kolejnych odejmowań
+        penalty = (30 * (pe_yy < -90)                                    # Ekstremalna kompresja P/E
+                   + 15 * ((pe_yy < -80) & (pe_yy >= -90))
+                   + 20 * (pbv_yy < -50)                                 # Ekstremalna kompresja P/BV
+                   + 10 * ((pbv_yy < -40) & (pbv_yy >= -50))
+                   + 20 * ((pbv > 0) & (pbv < 0.3))                      # Value trap risk
+                   + 20 * ((ev_ebitda > 0) & (ev_ebitda < 1)))           # Kryzys?
         
-        # Kary za ekstremalne wartości
-        if pe_yy < -90:
-            base_score -= 30  # Ekstremalna kompresja P/E
-        elif pe_yy < -80:
-            base_score -= 15
+        # Bonus za "zdrową" kompresję - idealny zakres
+        bonus = 20 * ((pe_yy > -60) & (pe_yy < -20) & (pbv_yy > -35) & (pbv_yy < -10))
         
-        if pbv_yy < -50:
-            base_score -= 20  # Ekstremalna kompresja P/BV
-        elif pbv_yy < -40:
-            base_score -= 10
-        
-        if 0 < pbv < 0.3:
-            base_score -= 20  # Value trap risk
-        
-        if 0 < ev_ebitda < 1:
-            base_score -= 20  # Kryzys?
-        
-        # Bonus za "zdrową" kompresję
-        if -60 < pe_yy < -20 and -35 < pbv_yy < -10:
-            base_score += 20  # Idealny zakres
-        
-        return max(0, min(100, base_score))
+        return np.clip(80 - penalty + bonus, 0, 100)                     # 80 - neutralny start
     
     def score(self, df: pd.DataFrame) -> pd.DataFrame:
         """Oblicza score dla każdej spółki."""
-        df = df.copy()
-        
-        df['S_PE_Comp'] = df.apply(self._score_pe_compression, axis=1)
-        df['S_PBV_Comp'] = df.apply(self._score_pbv_compression, axis=1)
-        df['S_TrendConf'] = df.apply(self._score_trend_confirmation, axis=1)
-        df['S_AbsValue'] = df.apply(self._score_absolute_value, axis=1)
-        df['S_Safety'] = df.apply(self._score_safety_check, axis=1)
+        # Jedno wyciągnięcie kolumn; wszystkie komponenty liczone z tych samych tablic
+        cols = column_arrays(df, self.SCORE_COLUMNS)
+        pe_yy, pe_qq = cols['P_E_YY'], cols['P_E_QQ']
+        pbv_yy, pbv_qq = cols['P_BV_YY'], cols['P_BV_QQ']
+        pbv, ev_ebitda = cols['P_BV'], cols['EV_EBITDA']
         
-        df['Total'] = (
-            df['S_PE_Comp'] * self.weights['pe_compression'] +
-            df['S_PBV_Comp'] * self.weights['pbv_compression'] +
-            df['S_TrendConf'] * self.weights['trend_confirmation'] +
-            df['S_AbsValue'] * self.weights['absolute_value'] +
-            df['S_Safety'] * self.weights['safety_check']
-        )
+        if HAS_NUMBA:
+            # Jeden przebieg po wierszach zamiast pięciu, Total z wag wkompilowanych w kernel
+            *scores, total = self._score_all(pe_yy, pe_qq, pbv_yy, pbv_qq, pbv, ev_ebitda)
+            components = dict(zip([column for column, _ in self.COMPONENTS], scores))
+        else:
+            components = {
+                'S_PE_Comp': self._score_pe_compression(pe_yy),
+                'S_PBV_Comp': self._score_pbv_compression(pbv_yy),
+                'S_TrendConf': self._score_trend_confirmation(pe_yy, pe_qq, pbv_yy, pbv_qq),
+                'S_AbsValue': self._score_absolute_value(pbv, ev_ebitda),
+                'S_Safety': self._score_safety_check(pe_yy, pbv_yy, pbv, ev_ebitda),
+            }
+            scores = np.column_stack([components[column] for column, _ in self.COMPONENTS]).astype(np.float64, copy=False)
+            total = scores @ self._weight_vec
         
-        return df
+        return df.assign(**components, Total=total)
     
-    def get_flags(self, row) -> str:
-        """Generuje flagi dla spółki."""
-        flags = []
-        
-        pe_yy = row.get('P_E_YY', 0)
-        pe_qq = row.get('P_E_QQ', 0)
-        pbv_yy = row.get('P_BV_YY', 0)
-        pbv_qq = row.get('P_BV_QQ', 0)
-        pbv = row.get('P_BV', 0)
-        ev_ebitda = row.get('EV_EBITDA', 0)
-        
-        # [C] Compression - podstawowa kompresja wyceny
-        if pe_yy < -30 and pbv_yy < -15:
-            flags.append('[C]')
-        
-        # [V] Value - atrakcyjna absolutna wycena
-        if pbv < 1.0 or (0 < ev_ebitda < 5):
-            flags.append('[V]')
+    def flag_masks(self, df: pd.DataFrame) -> List[Tuple[str, np.ndarray]]:
+        """Generuje flagi dla spółek (maski po kolumnach)."""
+        cols = column_arrays(df, self.SCORE_COLUMNS)
+        pe_yy, pe_qq = cols['P_E_YY'], cols['P_E_QQ']
+        pbv_yy, pbv_qq = cols['P_BV_YY'], cols['P_BV_QQ']
+        pbv, ev_ebitda = cols['P_BV'], cols['EV_EBITDA']
         
-        # [A] Acceleration - kompresja przyspiesza (k/k < r/r)
-        accel_count = 0
-        if pe_qq < pe_yy < 0:
-            accel_count += 1
-        if pbv_qq < pbv_yy < 0:
-            accel_count += 1
-        if accel_count >= 1:
-            flags.append('[A]')
-        
-        # [D] Deep Compression - silna kompresja
-        if pe_yy < -50 and pbv_yy < -25:
-            flags.append('[D]')
-        
-        # [T] Trend Confirmed - k/k i r/r zgodne
-        if pe_qq < 0 and pe_yy < 0 and pbv_qq < 0 and pbv_yy < 0:
-            flags.append('[T]')
-        
-        # [!] Warning - ekstremalne wartości
-        if pe_yy < -90 or pbv_yy < -50:
-            flags.append('[!]')
-        
-        # [?] Verify - wycena rośnie (przeciwny sygnał)
-        if pe_yy > 0 and pbv_yy > 0:
-            flags.append('[?]')
-        
-        return ''.join(flags)
+        return [
+            # [C] Compression - podstawowa kompresja wyceny
+            ('C', (pe_yy < -30) & (pbv_yy < -15)),
+            # [V] Value - atrakcyjna absolutna wycena
+            ('V', (pbv < 1.0) | ((ev_ebitda > 0) & (ev_ebitda < 5))),
+            # [A] Acceleration - kompresja przyspiesza (k/k < r/r) dla P/E lub P/BV
+            ('A', ((pe_qq < pe_yy) & (pe_yy < 0)) | ((pbv_qq < pbv_yy) & (pbv_yy < 0))),
+            # [D] Deep Compression - silna kompresja
+            ('D', (pe_yy < -50) & (pbv_yy < -25)),
+            # [T] Trend Confirmed - k/k i r/r zgodne
+            ('T', (pe_qq < 0) & (pe_yy < 0) & (pbv_qq < 0) & (pbv_yy < 0)),
+            # [!] Warning - ekstremalne wartości
+            ('!', (pe_yy < -90) | (pbv_yy < -50)),
+            # [?] Verify - wycena rośnie (przeciwny sygnał)
+            ('?', (pe_yy > 0) & (pbv_yy > 0)),
+        ]
     
     def get_output_columns(self) -> List[str]:
         """Zwraca listę kolumn do eksportu."""
@@ -306,6 +448,10 @@ class ValuationCompressionScanner(BaseScanner):
         ]
 
 
+# Klasa skanera dla run.py (bez przeszukiwania modułu)
+__scanner_class__ = ValuationCompressionScanner
+
+
 # Standalone run
 if __name__ == "__main__":
     import logging
@@ -325,10 +471,16 @@ if __name__ == "__main__":
             print(f"\n{'='*85}")
             print(f"TOP 10 - {scanner.name}")
             print(f"{'='*85}")
-            print(f"{'Rank':<5} {'Ticker':<10} {'Flags':<14} {'Score':<7} {'P/E_YY':<9} {'P/BV_YY':<9} {'P/BV':<7} {'EV/EBITDA':<9}")
+            # Cała tabela jednym to_string; brakujące kolumny wskaźników jako 0 (jak wcześniej row.get)
+            top = scanner.get_top(10).reindex(
+                columns=['Rank', 'Ticker', 'Flags', 'Total', 'P_E_YY', 'P_BV_YY', 'P_BV', 'EV_EBITDA'], fill_value=0)
+            table = top.to_string(
+                index=False, justify='left',
+                header=['Rank', 'Ticker', 'Flags', 'Score', 'P/E_YY', 'P/BV_YY', 'P/BV', 'EV/EBITDA'],
+                formatters={'Rank': '{:<5}'.format, 'Ticker': '{:<10}'.format, 'Flags': '{:<14}'.format,
+                            'Total': '{:<7.1f}'.format, 'P_E_YY': '{:<9.1f}'.format, 'P_BV_YY': '{:<9.1f}'.format,
+                            'P_BV': '{:<7.2f}'.format, 'EV_EBITDA': '{:<9.2f}'.format})
+            header, _, rows = table.partition('\n')
+            print(header)
             print("-" * 85)
-            
-            for _, row in scanner.get_top(10).iterrows():
-                print(f"{row['Rank']:<5} {row['Ticker']:<10} {row['Flags']:<14} {row['Total']:<7.1f} "
-                      f"{row.get('P_E_YY', 0):<9.1f} {row.get('P_BV_YY', 0):<9.1f} "
-                      f"{row.get('P_BV', 0):<7.2f} {row.get('EV_EBITDA', 0):<9.2f}")
+            print(rows)